@@ -0,0 +1,166 @@
+"""
+Semantic Scholar paper search client for the academic sources.
+
+Every request goes through the shared pooled session and one adaptive rate
+limiter, so search terms can run concurrently while staying inside the API
+quota. The limiter spaces requests at a rate that grows slowly after each
+success, halves on a 429 (honouring Retry-After), and is capped by the quota
+left in the X-RateLimit-* headers whenever the API sends them.
+
+Each term's highest publication year is kept in the academic_sync
+collection. Later runs only ask for papers from that year onwards instead of
+repeating the full search.
+"""
+import os
+import time
+import asyncio
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from .http_client import get_session
+from .metrics import span
+
+# Semantic Scholar Graph API; overridable so benchmarks can use a local stub.
+SEMANTIC_SCHOLAR_API_URL = os.getenv("SEMANTIC_SCHOLAR_API_URL", "https://api.semanticscholar.org/graph/v1")
+# Optional; keyed requests get a dedicated quota instead of the shared pool.
+SEMANTIC_SCHOLAR_API_KEY = os.getenv("SEMANTIC_SCHOLAR_API_KEY")
+# Starting and highest request rate, in requests per second.
+SEMANTIC_SCHOLAR_RPS = float(os.getenv("SEMANTIC_SCHOLAR_RPS", "1"))
+SEMANTIC_SCHOLAR_MAX_RPS = float(os.getenv("SEMANTIC_SCHOLAR_MAX_RPS", "10"))
+SEMANTIC_SCHOLAR_MAX_RETRIES = int(os.getenv("SEMANTIC_SCHOLAR_MAX_RETRIES", "5"))
+
+# The search endpoint returns at most 100 results per page and 1,000 per query.
+ACADEMIC_PAGE_SIZE = 100
+ACADEMIC_MAX_RESULTS = min(1000, int(os.getenv("ACADEMIC_MAX_RESULTS", "1000")))
+# Search terms harvested at the same time; the rate limiter is shared by all of them.
+ACADEMIC_TERM_CONCURRENCY = int(os.getenv("ACADEMIC_TERM_CONCURRENCY", "8"))
+
+PAPER_FIELDS = "title,abstract,url,authors,year,venue"
+
+ACADEMIC_SYNC_COLLECTION = "academic_sync"
+
+MIN_RPS = 0.05
+# Rate added after each successful request.
+RPS_INCREASE = 0.1
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Retry-After as seconds; it may be given as seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def _reset_seconds(value: Optional[str]) -> Optional[float]:
+    """X-RateLimit-Reset as seconds from now; APIs send either a delay or an epoch time."""
+    try:
+        reset = float(value)
+    except (TypeError, ValueError):
+        return None
+    return reset - time.time() if reset > 1e9 else reset
+
+class AdaptiveRateLimiter:
+    """
+    Spaces requests 1/rate seconds apart. Waiters are served in FIFO order
+    because the lock is held while sleeping.
+    """
+
+    def __init__(self, rate: float, max_rate: float):
+        self.rate = rate
+        self.max_rate = max(rate, max_rate)
+        self.next_at = 0.0
+        self.paused_until = 0.0
+        self.throttled = 0
+        self._lock = None
+
+    async def acquire(self):
+        # Created on first use so the lock belongs to the running event loop.
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            delay = max(self.next_at, self.paused_until) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.next_at = time.monotonic() + 1 / self.rate
+
+    def update(self, status: int, headers):
+        """Adjusts the rate from a response's status and rate-limit headers."""
+        now = time.monotonic()
+        if status == 429:
+            self.throttled += 1
+            self.rate = max(MIN_RPS, self.rate / 2)
+            retry_after = _retry_after_seconds(headers.get("Retry-After"))
+            self.paused_until = max(self.paused_until, now + (retry_after if retry_after is not None else 1 / self.rate))
+            return
+        if status < 400:
+            self.rate = min(self.max_rate, self.rate + RPS_INCREASE)
+
+        try:
+            remaining = int(headers.get("X-RateLimit-Remaining"))
+        except (TypeError, ValueError):
+            return
+        reset = _reset_seconds(headers.get("X-RateLimit-Reset"))
+        if reset is None or reset <= 0:
+            return
+        if remaining <= 0:
+            self.paused_until = max(self.paused_until, now + reset)
+        else:
+            # Spread what is left of the window evenly over the time until it resets.
+            self.rate = max(MIN_RPS, min(self.rate, remaining / reset))
+
+class AcademicFetchError(Exception):
+    """A paper search failed after retries, or with an error that is not retried."""
+
+academic_limiter = AdaptiveRateLimiter(SEMANTIC_SCHOLAR_RPS, SEMANTIC_SCHOLAR_MAX_RPS)
+
+async def search_papers(search_term: str, offset: int, limit: int, min_year: Optional[int] = None) -> dict:
+    """
+    One page of paper search results, retrying rate limiting and server
+    errors. Returns the decoded response; raises AcademicFetchError if the
+    search failed, so the scheduler backs the term off like a broken feed.
+    """
+    params = {"query": search_term, "offset": str(offset), "limit": str(limit), "fields": PAPER_FIELDS}
+    if min_year:
+        params["year"] = f"{min_year}-"
+    headers = {"x-api-key": SEMANTIC_SCHOLAR_API_KEY} if SEMANTIC_SCHOLAR_API_KEY else {}
+    url = f"{SEMANTIC_SCHOLAR_API_URL}/paper/search"
+
+    session = get_session()
+    for attempt in range(SEMANTIC_SCHOLAR_MAX_RETRIES + 1):
+        await academic_limiter.acquire()
+        with span("academic_fetch") as fetch_span:
+            async with session.get(url, params=params, headers=headers) as response:
+                status = response.status
+                academic_limiter.update(status, response.headers)
+                if status == 200:
+                    data = await response.json()
+                    fetch_span["items"] = len(data.get("data") or [])
+                    return data
+        if status != 429 and status < 500:
+            raise AcademicFetchError(f"Academic search for '{search_term}' failed: HTTP {status}")
+        print(f"Academic search for '{search_term}' got HTTP {status}, retrying")
+        if status >= 500:
+            # The limiter only slows down for 429s; back off from server errors here.
+            await asyncio.sleep(min(30, 2 ** attempt))
+
+    raise AcademicFetchError(
+        f"Academic search for '{search_term}' failed after {SEMANTIC_SCHOLAR_MAX_RETRIES + 1} attempts: HTTP {status}"
+    )
+
+async def get_sync_state(database: AsyncIOMotorDatabase, search_term: str) -> dict:
+    return await database.get_collection(ACADEMIC_SYNC_COLLECTION).find_one({"_id": search_term}) or {}
+
+async def save_sync_state(database: AsyncIOMotorDatabase, search_term: str, max_year: Optional[int], fetched: int):
+    """Records a completed harvest of the term, so the next one starts from max_year."""
+    update = {"synced_at": datetime.now(), "fetched": fetched}
+    if max_year:
+        update["max_year"] = max_year
+    await database.get_collection(ACADEMIC_SYNC_COLLECTION).update_one(
+        {"_id": search_term}, {"$set": update}, upsert=True
+    )
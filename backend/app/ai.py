@@ -1,148 +1,144 @@
 import os
-import aiohttp
-import tempfile
-from fastapi import HTTPException
-from openai import OpenAI, RateLimitError, APIError
-from .models import Category
+import json
+from typing import List, Optional
+from openai import RateLimitError, APIError
+from pydantic import ValidationError
+from .models import Category, Enrichment
+from .llm import get_llm
+from .ai_cache import enrichment_cache, cache_key
+from .transcription import transcribe_url
 
-_openai_client = None
+ENRICHMENT_MODEL = os.getenv("ENRICHMENT_MODEL", "gpt-3.5-turbo")
+TRANSCRIPTION_MODEL = "whisper-1"
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+# Shortened embeddings keep the in-memory vector index small (1 KB per item as float32).
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "256"))
+# Embedding input is cut to roughly the model's context window.
+EMBEDDING_INPUT_CHARS = 8000
 
-def get_openai_client():
-    """Lazily initialize and return the OpenAI client."""
-    global _openai_client
-    if _openai_client is None:
-        api_key = os.environ.get("OPENAI_API_KEY")
-        if api_key:
-            _openai_client = OpenAI(api_key=api_key)
-    return _openai_client
+# Bump whenever ENRICHMENT_PROMPT changes so cached results from the old prompt are ignored.
+ENRICHMENT_PROMPT_VERSION = "1"
 
-async def get_summary(text: str) -> str:
-    client = get_openai_client()
-    if not client:
-        return ""
+ENRICHMENT_PROMPT = (
+    "You are an expert in AI and human rights. For the following text, respond with a JSON object "
+    "with exactly these keys:\n"
+    '"summary": a 1-2 sentence summary of the text,\n'
+    f'"category": either "{Category.RISK.value}" or "{Category.OPPORTUNITY.value}",\n'
+    '"relevance_score": a number from 0.0 to 1.0 rating how relevant the text is to AI and human rights '
+    "topics, where 1.0 is highly relevant and 0.0 is not relevant at all."
+)
+
+def build_enrichment_request(text: str) -> dict:
+    """Chat completion arguments for the combined enrichment call."""
+    return {
+        "model": ENRICHMENT_MODEL,
+        "messages": [
+            {"role": "system", "content": ENRICHMENT_PROMPT},
+            {"role": "user", "content": text}
+        ],
+        "response_format": {"type": "json_object"},
+        "max_tokens": 200,
+        "temperature": 0.2,
+    }
+
+def parse_enrichment(raw: str) -> Enrichment:
+    """Validates the model's JSON answer, falling back to defaults for missing fields."""
+    return Enrichment.model_validate(json.loads(raw))
+
+async def enrich_content(text: str) -> Enrichment:
     """
-    Generates a summary for the given text using the OpenAI API.
+    Generates the summary, category and relevance score for the given text
+    with a single structured OpenAI call.
     """
+    llm = get_llm()
+    if not llm:
+        return Enrichment()
+
+    key = cache_key(text, ENRICHMENT_MODEL, ENRICHMENT_PROMPT_VERSION)
+    cached = await enrichment_cache.get(key)
+    if cached is not None:
+        return Enrichment.model_validate(cached)
+
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that summarizes articles about AI and human rights. Summarize the following text in 1-2 sentences."},
-                {"role": "user", "content": text}
-            ],
-            max_tokens=150,
-            temperature=0.3,
-        )
-        summary = response.choices[0].message.content.strip()
-        return summary
+        response = await llm.chat_completion(**build_enrichment_request(text))
+        enrichment = parse_enrichment(response.choices[0].message.content)
+        # Only successful answers are cached; fallbacks are retried next time.
+        await enrichment_cache.set(key, enrichment.model_dump(mode="json"))
+        return enrichment
+    except (json.JSONDecodeError, ValidationError) as e:
+        print(f"Invalid enrichment response: {e}")
+        return Enrichment()
     except (RateLimitError, APIError) as e:
-        print(f"OpenAI API error generating summary: {e}")
-        return ""
+        print(f"OpenAI API error during enrichment: {e}")
+        return Enrichment()
     except Exception as e:
-        # Catching other potential exceptions, e.g., network issues
-        print(f"An unexpected error occurred while generating summary: {e}")
-        return ""
+        print(f"An unexpected error occurred during enrichment: {e}")
+        return Enrichment()
 
-async def get_category(text: str) -> Category:
-    client = get_openai_client()
-    if not client:
-        return Category.UNCATEGORIZED
+async def embed_texts(texts: List[str]) -> Optional[List[List[float]]]:
     """
-    Categorizes the given text as Risk-focused or Opportunity-focused using the OpenAI API.
+    Embeds texts with one OpenAI call, in input order. Returns None if the
+    client is not configured or the call fails, so callers can store items
+    without an embedding and backfill later.
     """
+    llm = get_llm()
+    if not llm or not texts:
+        return None
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": f"You are an expert in AI and human rights. Your task is to categorize the following article as either '{Category.RISK.value}' or '{Category.OPPORTUNITY.value}'. Respond with only one of these two options."},
-                {"role": "user", "content": text}
-            ],
-            max_tokens=10,
-            temperature=0.0,
+        response = await llm.embeddings(
+            model=EMBEDDING_MODEL,
+            input=[text[:EMBEDDING_INPUT_CHARS] or " " for text in texts],
+            dimensions=EMBEDDING_DIMENSIONS,
         )
-        category_str = response.choices[0].message.content.strip()
-        if category_str == Category.OPPORTUNITY.value:
-            return Category.OPPORTUNITY
-        return Category.RISK
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
     except (RateLimitError, APIError) as e:
-        print(f"OpenAI API error getting category: {e}")
-        return Category.RISK # Default to risk on failure
+        print(f"OpenAI API error during embedding: {e}")
+        return None
     except Exception as e:
-        print(f"An unexpected error occurred while categorizing: {e}")
-        return Category.RISK # Default to risk on failure
+        print(f"An unexpected error occurred during embedding: {e}")
+        return None
+
+async def embed_query(text: str) -> Optional[List[float]]:
+    """Embeds a search query, caching the result so repeated queries cost nothing."""
+    key = cache_key(text, EMBEDDING_MODEL, f"query-{EMBEDDING_DIMENSIONS}")
+    cached = await enrichment_cache.get(key)
+    if cached is not None:
+        return cached["embedding"]
+    embeddings = await embed_texts([text])
+    if not embeddings:
+        return None
+    await enrichment_cache.set(key, {"embedding": embeddings[0]})
+    return embeddings[0]
 
 async def transcribe_audio(audio_url: str) -> str:
-    client = get_openai_client()
-    if not client:
-        print("Audio transcription is disabled: API key not configured")
-        return ""
     """
     Downloads audio from URL and transcribes it using OpenAI Whisper API.
+    Long episodes are split into segments that are transcribed concurrently.
     """
+    llm = get_llm()
+    if not llm:
+        print("Audio transcription is disabled: API key not configured")
+        return ""
+
+    # Episodes often reappear under a new page link but keep the same audio file.
+    key = cache_key(audio_url, TRANSCRIPTION_MODEL, "1")
+    cached = await enrichment_cache.get(key)
+    if cached is not None:
+        return cached["transcript"]
+
     try:
-        # Download audio file
-        async with aiohttp.ClientSession() as session:
-            async with session.get(audio_url) as response:
-                if response.status != 200:
-                    print(f"Failed to download audio from {audio_url}")
-                    return "(Audio transcription failed: Could not download file)"
-                    return ""
-                
-                # Save to temporary file
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-                    temp_file.write(await response.read())
-                    temp_file_path = temp_file.name
-        
-        # Transcribe using OpenAI Whisper
-        with open(temp_file_path, "rb") as audio_file:
-            transcript = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="text"
-            )
-        
-        # Clean up temporary file
-        os.unlink(temp_file_path)
-        
+        # Stream, split and transcribe segments concurrently
+        transcript = await transcribe_url(llm, audio_url, TRANSCRIPTION_MODEL)
+        if transcript is None:
+            return ""
+
+        if transcript:
+            await enrichment_cache.set(key, {"transcript": transcript})
         return transcript
-        
+
     except (RateLimitError, APIError) as e:
         print(f"OpenAI API error during transcription: {e}")
         return ""
     except Exception as e:
         print(f"Error transcribing audio from {audio_url}: {e}")
         return ""
-
-async def analyze_relevance(text: str) -> float:
-    client = get_openai_client()
-    if not client:
-        return 0.5
-    """
-    Analyzes the relevance of content to AI and human rights topics.
-    Returns a score between 0.0 and 1.0.
-    """
-    try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an expert in AI and human rights. Rate the relevance of the following text to AI and human rights topics on a scale of 0.0 to 1.0, where 1.0 is highly relevant and 0.0 is not relevant at all. Respond with only the numerical score."},
-                {"role": "user", "content": text}
-            ],
-            max_tokens=10,
-            temperature=0.0,
-        )
-        
-        score_str = response.choices[0].message.content.strip()
-        try:
-            score = float(score_str)
-            return max(0.0, min(1.0, score))  # Ensure score is between 0 and 1
-        except ValueError:
-            print(f"Invalid relevance score format: {score_str}")
-            return 0.5  # Default to medium relevance
-            
-    except (RateLimitError, APIError) as e:
-        print(f"OpenAI API error during relevance analysis: {e}")
-        return 0.5
-    except Exception as e:
-        print(f"Error analyzing relevance: {e}")
-        return 0.5 # Default to risk on failure
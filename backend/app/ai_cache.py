@@ -0,0 +1,119 @@
+import os
+import time
+import hashlib
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional
+from pymongo import UpdateOne
+from .db import get_database
+
+ENRICHMENT_CACHE_SIZE = int(os.getenv("ENRICHMENT_CACHE_SIZE", "5000"))
+ENRICHMENT_CACHE_TTL_SECONDS = int(os.getenv("ENRICHMENT_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+
+ENRICHMENT_CACHE_COLLECTION = "enrichment_cache"
+
+def normalize_text(text: str) -> str:
+    """Collapses formatting differences so syndicated copies of a story hash the same."""
+    return " ".join(unicodedata.normalize("NFKC", text or "").split())
+
+def cache_key(text: str, model: str, prompt_version: str) -> str:
+    """Content address of an AI result: the normalized input, the model and the prompt version."""
+    payload = f"{model}\n{prompt_version}\n{normalize_text(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class EnrichmentCache:
+    """
+    Two-tier cache for AI results: an in-process LRU in front of a Mongo
+    collection whose TTL index expires old entries. The Mongo tier is
+    skipped when no database connection is available.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def _collection(self):
+        database = get_database()
+        if database is None:
+            return None
+        return database.get_collection(ENRICHMENT_CACHE_COLLECTION)
+
+    def _remember(self, key: str, value: dict):
+        self.entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[dict]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self.entries.move_to_end(key)
+                self.memory_hits += 1
+                return value
+            del self.entries[key]
+
+        collection = self._collection()
+        if collection is not None:
+            try:
+                doc = await collection.find_one({"_id": key})
+            except Exception as e:
+                print(f"Error reading enrichment cache: {e}")
+                doc = None
+            if doc is not None:
+                self._remember(key, doc["value"])
+                self.persistent_hits += 1
+                return doc["value"]
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: dict):
+        self._remember(key, value)
+        collection = self._collection()
+        if collection is None:
+            return
+        try:
+            await collection.update_one(
+                {"_id": key},
+                {"$set": {"value": value, "created_at": datetime.now()}},
+                upsert=True,
+            )
+        except Exception as e:
+            print(f"Error writing enrichment cache: {e}")
+
+    async def set_many(self, values: Dict[str, dict]):
+        """set() for many keys, written to Mongo in one bulk write."""
+        if not values:
+            return
+        for key, value in values.items():
+            self._remember(key, value)
+        collection = self._collection()
+        if collection is None:
+            return
+        now = datetime.now()
+        try:
+            await collection.bulk_write([
+                UpdateOne({"_id": key}, {"$set": {"value": value, "created_at": now}}, upsert=True)
+                for key, value in values.items()
+            ], ordered=False)
+        except Exception as e:
+            print(f"Error writing enrichment cache: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.persistent_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self.entries),
+        }
+
+enrichment_cache = EnrichmentCache(ENRICHMENT_CACHE_SIZE, ENRICHMENT_CACHE_TTL_SECONDS)
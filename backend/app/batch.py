@@ -0,0 +1,392 @@
+"""
+Offline enrichment through the OpenAI Batch API.
+
+Items stored with status "pending_enrichment" (see ENRICHMENT_MODE in
+pipeline.py) are written to a JSONL batch file, submitted, polled until the
+batch finishes and their results bulk-applied to the content collection.
+Pre-filtered items a curator approves also wait in pending_enrichment; the
+worker's "enrich" job batches them, or enriches them inline outside batch mode.
+
+Usage:
+    python -m app.batch run      # submit pending items and wait for the results
+    python -m app.batch submit   # submit pending items and exit
+    python -m app.batch poll     # apply results of every batch still in progress
+
+Set OPENAI_BASE_URL to point the client at a local stub server
+(see backend/stubs/openai_stub.py).
+"""
+import os
+import sys
+import json
+import asyncio
+import tempfile
+from datetime import datetime
+from typing import Dict, Optional
+from bson import Binary, ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import UpdateMany, UpdateOne
+from pydantic import ValidationError
+from .ai import build_enrichment_request, parse_enrichment, enrich_content, ENRICHMENT_MODEL, ENRICHMENT_PROMPT_VERSION
+from .ai_cache import enrichment_cache, cache_key
+from .llm import get_llm
+from .metrics import record_llm_usage
+from .models import ContentStatus, Enrichment, APPROVE_WHEN_ENRICHED
+from .pipeline import ENRICHMENT_MODE, TRANSCRIPT_ENRICHMENT_CHARS
+from .vector_index import embed_items
+from .response_cache import response_cache
+from .content_stats import count_tracked, tracked_update
+
+# The Batch API accepts at most 50,000 requests per input file.
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "50000"))
+BATCH_POLL_INTERVAL_SECONDS = float(os.getenv("BATCH_POLL_INTERVAL_SECONDS", "60"))
+BATCH_WRITE_CHUNK = 1000
+# Batches an item may fail in (error response, unparseable answer, expiry)
+# before it is parked in pending_enrichment and no longer submitted.
+BATCH_MAX_ATTEMPTS = int(os.getenv("BATCH_MAX_ATTEMPTS", "3"))
+
+BATCH_COLLECTION = "enrichment_batches"
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+def submittable_query(not_submitted_since: Optional[datetime] = None) -> dict:
+    """pending_enrichment items not in a batch and not parked, optionally leaving out those submitted since a time."""
+    find_filter = {
+        "status": ContentStatus.PENDING_ENRICHMENT.value,
+        "enrichment_batch_id": {"$exists": False},
+        "enrichment_attempts": {"$not": {"$gte": BATCH_MAX_ATTEMPTS}},
+    }
+    if not_submitted_since is not None:
+        find_filter["enrichment_submitted_at"] = {"$not": {"$gte": not_submitted_since}}
+    return find_filter
+
+def enrichment_input(doc: dict) -> str:
+    """The text an item is enriched from, matching what inline enrichment uses."""
+    if doc.get("original_text"):
+        return doc["original_text"]
+    return (doc.get("transcript") or "")[:TRANSCRIPT_ENRICHMENT_CHARS]
+
+def enrichment_update(enrichment: Enrichment, token: ObjectId, embedding: Optional[Binary] = None) -> list:
+    """
+    Update that moves an item out of pending_enrichment into the curation
+    queue, or straight to approved if a curator already approved it.
+    """
+    fields = {
+        "summary": [enrichment.summary],
+        "category": enrichment.category.value,
+        "relevance_score": enrichment.relevance_score,
+        "updated_at": datetime.now(),
+    }
+    if embedding is not None:
+        fields["embedding"] = embedding
+    approved = {"$eq": [f"${APPROVE_WHEN_ENRICHED}", True]}
+    return tracked_update(
+        fields,
+        token,
+        unset=["enrichment_batch_id", APPROVE_WHEN_ENRICHED],
+        expressions={
+            "status": {"$cond": [approved, ContentStatus.APPROVED.value, ContentStatus.PENDING.value]},
+            # Keeps a summary the curator wrote while approving.
+            "summary": {"$cond": [
+                {"$gt": [{"$size": {"$ifNull": ["$summary", []]}}, 0]},
+                "$summary",
+                {"$literal": [enrichment.summary]},
+            ]},
+        },
+    )
+
+def duplicate_update(enrichment: Enrichment, token: ObjectId) -> list:
+    """
+    Update that gives a near-duplicate its canonical item's enrichment. Duplicates
+    stored while the canonical was pending_enrichment only carry placeholders
+    (see pipeline.store_new_items).
+    """
+    return tracked_update(
+        {
+            "summary": [enrichment.summary],
+            "category": enrichment.category.value,
+            "relevance_score": enrichment.relevance_score,
+        },
+        token,
+    )
+
+async def _apply_to_duplicates(collection: AsyncIOMotorCollection, enrichments: Dict[ObjectId, Enrichment]):
+    """Copies each canonical item's enrichment to its linked near-duplicates in one bulk write."""
+    if not enrichments:
+        return
+    token = ObjectId()
+    operations = [
+        UpdateMany(
+            {"duplicate_of": canonical_id, "status": ContentStatus.DUPLICATE.value},
+            duplicate_update(enrichment, token),
+        )
+        for canonical_id, enrichment in enrichments.items()
+    ]
+    result = await collection.bulk_write(operations, ordered=False)
+    if result.modified_count:
+        await count_tracked(collection, list(enrichments), token, field="duplicate_of")
+
+async def _bulk_apply(
+    collection: AsyncIOMotorCollection,
+    enrichments: Dict[ObjectId, Enrichment],
+    embeddings: Optional[Dict[ObjectId, Binary]] = None,
+) -> int:
+    """
+    Applies enrichments to items still pending_enrichment, and to their linked
+    near-duplicates, and moves their stats counters.
+    """
+    embeddings = embeddings or {}
+    content_ids = list(enrichments)
+    modified = 0
+    token = ObjectId()
+    for start in range(0, len(content_ids), BATCH_WRITE_CHUNK):
+        chunk = content_ids[start:start + BATCH_WRITE_CHUNK]
+        operations = [
+            UpdateOne(
+                {"_id": content_id, "status": ContentStatus.PENDING_ENRICHMENT.value},
+                enrichment_update(enrichments[content_id], token, embeddings.get(content_id)),
+            )
+            for content_id in chunk
+        ]
+        result = await collection.bulk_write(operations, ordered=False)
+        if result.modified_count:
+            modified += result.modified_count
+            # Items that left pending_enrichment another way were not updated and are not counted.
+            applied = await count_tracked(collection, chunk, token)
+            await _apply_to_duplicates(collection, {content_id: enrichments[content_id] for content_id in applied})
+    if modified:
+        await response_cache.invalidate()
+    return modified
+
+async def enrich_pending_inline(collection: AsyncIOMotorCollection, limit: int = BATCH_WRITE_CHUNK) -> int:
+    """
+    Enriches and embeds pending_enrichment items with direct calls instead of
+    a batch, for ENRICHMENT_MODE=inline, where the only such items are
+    pre-filtered ones a curator approved. Returns the number applied; items
+    whose enrichment failed stay pending_enrichment for the next job.
+    """
+    docs = await collection.find(
+        submittable_query(), {"title": 1, "original_text": 1, "transcript": 1},
+    ).limit(limit).to_list(limit)
+    if not docs:
+        return 0
+    texts = [enrichment_input(doc) for doc in docs]
+    results, vectors = await asyncio.gather(
+        asyncio.gather(*(enrich_content(text) for text in texts)),
+        embed_items([(doc.get("title", ""), text) for doc, text in zip(docs, texts)]),
+    )
+    # enrich_content falls back to an empty Enrichment on errors; those are retried later.
+    enrichments = {doc["_id"]: result for doc, result in zip(docs, results) if result.summary}
+    embeddings = {doc["_id"]: vector for doc, vector in zip(docs, vectors) if vector is not None}
+    return await _bulk_apply(collection, enrichments, embeddings) if enrichments else 0
+
+async def enrich_pending(collection: AsyncIOMotorCollection) -> dict:
+    """Job handler for "enrich": sends pending_enrichment items to a batch or enriches them inline."""
+    if ENRICHMENT_MODE == "batch":
+        batch_id = await submit_pending(collection)
+        return {"status": "success", "message": "Batch submitted" if batch_id else "Nothing to submit", "batch_id": batch_id}
+    applied = await enrich_pending_inline(collection)
+    return {"status": "success", "message": f"Enriched {applied} items", "applied": applied}
+
+async def submit_pending(
+    collection: AsyncIOMotorCollection,
+    limit: int = BATCH_MAX_REQUESTS,
+    not_submitted_since: Optional[datetime] = None,
+) -> Optional[str]:
+    """
+    Submits up to limit pending_enrichment items as one batch and returns its id.
+    Items already answered by the enrichment cache are applied directly.
+    With not_submitted_since, items submitted at or after that time (e.g. in
+    an earlier batch of the same run that failed them) are left for later.
+    Returns None if there was nothing to submit.
+    """
+    llm = get_llm()
+    if not llm:
+        print("Batch enrichment is disabled: API key not configured")
+        return None
+
+    cursor = collection.find(
+        submittable_query(not_submitted_since),
+        {"original_text": 1, "transcript": 1},
+    ).limit(limit)
+
+    cached_enrichments = {}
+    submitted_ids = []
+    with tempfile.NamedTemporaryFile("w", delete=False, suffix=".jsonl", encoding="utf-8") as batch_file:
+        batch_file_path = batch_file.name
+        async for doc in cursor:
+            text = enrichment_input(doc)
+            cached = await enrichment_cache.get(cache_key(text, ENRICHMENT_MODEL, ENRICHMENT_PROMPT_VERSION))
+            if cached is not None:
+                cached_enrichments[doc["_id"]] = Enrichment.model_validate(cached)
+                continue
+            batch_file.write(json.dumps({
+                "custom_id": str(doc["_id"]),
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": build_enrichment_request(text),
+            }) + "\n")
+            submitted_ids.append(doc["_id"])
+
+    try:
+        if cached_enrichments:
+            applied = await _bulk_apply(collection, cached_enrichments)
+            print(f"Applied {applied} cached enrichments")
+
+        if not submitted_ids:
+            return None
+
+        with open(batch_file_path, "rb") as f:
+            input_file = await llm.client.files.create(file=f, purpose="batch")
+    finally:
+        os.unlink(batch_file_path)
+
+    batch = await llm.client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h",
+    )
+
+    await collection.update_many(
+        {"_id": {"$in": submitted_ids}},
+        {
+            "$set": {"enrichment_batch_id": batch.id, "enrichment_submitted_at": datetime.now()},
+            "$inc": {"enrichment_attempts": 1},
+        },
+    )
+    await collection.database.get_collection(BATCH_COLLECTION).insert_one({
+        "_id": batch.id,
+        "status": batch.status,
+        "item_count": len(submitted_ids),
+        "submitted_at": datetime.now(),
+    })
+    print(f"Submitted batch {batch.id} with {len(submitted_ids)} items")
+    return batch.id
+
+async def _cache_results(collection: AsyncIOMotorCollection, enrichments: Dict[ObjectId, Enrichment]):
+    """Stores batch answers in the enrichment cache, as inline enrichment does, so re-runs hit it."""
+    values = {}
+    content_ids = list(enrichments)
+    for start in range(0, len(content_ids), BATCH_WRITE_CHUNK):
+        chunk = content_ids[start:start + BATCH_WRITE_CHUNK]
+        async for doc in collection.find({"_id": {"$in": chunk}}, {"original_text": 1, "transcript": 1}):
+            key = cache_key(enrichment_input(doc), ENRICHMENT_MODEL, ENRICHMENT_PROMPT_VERSION)
+            values[key] = enrichments[doc["_id"]].model_dump(mode="json")
+    await enrichment_cache.set_many(values)
+
+async def apply_batch_results(collection: AsyncIOMotorCollection, batch) -> int:
+    """Bulk-applies and caches a finished batch's output and releases failed items for resubmission."""
+    llm = get_llm()
+    enrichments = {}
+    failed_ids = []
+
+    if batch.output_file_id:
+        output = await llm.client.files.content(batch.output_file_id)
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            content_id = ObjectId(result["custom_id"])
+            response = result.get("response") or {}
+            if response.get("status_code") != 200:
+                failed_ids.append(content_id)
+                continue
+            usage = response.get("body", {}).get("usage")
+            if usage:
+                record_llm_usage(
+                    response["body"].get("model", ""),
+                    usage.get("prompt_tokens", 0),
+                    usage.get("completion_tokens", 0),
+                    batch=True,
+                )
+            try:
+                raw = response["body"]["choices"][0]["message"]["content"]
+                enrichment = parse_enrichment(raw)
+            except (KeyError, IndexError, json.JSONDecodeError, ValidationError) as e:
+                print(f"Invalid batch result for {content_id}: {e}")
+                failed_ids.append(content_id)
+                continue
+            enrichments[content_id] = enrichment
+
+    if enrichments:
+        await _cache_results(collection, enrichments)
+    applied = await _bulk_apply(collection, enrichments) if enrichments else 0
+
+    # Anything the batch did not answer (errors, expiry) goes back into the pending
+    # pool; items that have used up BATCH_MAX_ATTEMPTS stay there but are not resubmitted.
+    parked = await collection.count_documents({
+        "enrichment_batch_id": batch.id,
+        "status": ContentStatus.PENDING_ENRICHMENT.value,
+        "enrichment_attempts": {"$gte": BATCH_MAX_ATTEMPTS},
+    })
+    await collection.update_many(
+        {"enrichment_batch_id": batch.id, "status": ContentStatus.PENDING_ENRICHMENT.value},
+        {"$unset": {"enrichment_batch_id": ""}},
+    )
+    if parked:
+        print(f"Parked {parked} items that failed {BATCH_MAX_ATTEMPTS} batches")
+
+    await collection.database.get_collection(BATCH_COLLECTION).update_one(
+        {"_id": batch.id},
+        {"$set": {
+            "status": batch.status,
+            "applied_count": applied,
+            "failed_count": len(failed_ids),
+            "completed_at": datetime.now(),
+        }},
+    )
+    print(f"Batch {batch.id} {batch.status}: applied {applied}, failed {len(failed_ids)}")
+    return applied
+
+async def poll_batch(collection: AsyncIOMotorCollection, batch_id: str, wait: bool = False) -> str:
+    """Checks a batch and applies its results once it reaches a terminal status."""
+    llm = get_llm()
+    while True:
+        batch = await llm.client.batches.retrieve(batch_id)
+        if batch.status in TERMINAL_STATUSES:
+            await apply_batch_results(collection, batch)
+            return batch.status
+        if not wait:
+            return batch.status
+        await asyncio.sleep(BATCH_POLL_INTERVAL_SECONDS)
+
+async def poll_open_batches(collection: AsyncIOMotorCollection, wait: bool = False) -> dict:
+    """Polls every batch that has not yet been applied."""
+    batches = collection.database.get_collection(BATCH_COLLECTION)
+    statuses = {}
+    async for batch_doc in batches.find({"completed_at": {"$exists": False}}, {"_id": 1}):
+        statuses[batch_doc["_id"]] = await poll_batch(collection, batch_doc["_id"], wait=wait)
+    return statuses
+
+async def run_batch_enrichment(collection: AsyncIOMotorCollection) -> dict:
+    """Submits everything pending and waits for the results, one batch at a time."""
+    applied_batches = {}
+    # Items a batch of this run failed are left for a later run, not resubmitted straight away.
+    started_at = datetime.now()
+    while True:
+        batch_id = await submit_pending(collection, not_submitted_since=started_at)
+        if batch_id is None:
+            break
+        status = await poll_batch(collection, batch_id, wait=True)
+        applied_batches[batch_id] = status
+        if status != "completed":
+            break
+    return {"status": "success", "message": "Batch enrichment complete", "batches": applied_batches}
+
+async def main(command: str):
+    from .db import connect_to_mongo, close_mongo_connection, get_database
+    await connect_to_mongo()
+    try:
+        collection = get_database().get_collection("content")
+        if command == "submit":
+            print(await submit_pending(collection))
+        elif command == "poll":
+            print(await poll_open_batches(collection))
+        elif command == "run":
+            print(await run_batch_enrichment(collection))
+        else:
+            raise SystemExit(f"Unknown command: {command}")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "run"))
@@ -0,0 +1,194 @@
+"""
+Materialized content counters, one document per (status, category,
+content_type, source), so status and category breakdowns never scan the
+content collection.
+
+Every write that inserts content or changes an item's status or category
+keeps the counters in step with $inc. Guarded writes that may lose a race
+(e.g. "approve while still pending") go through tracked_update and
+count_tracked, so only the updates that actually applied are counted. If the
+counters ever drift (e.g. after manual edits in the database), rebuild them
+from the content collection:
+
+    python -m app.content_stats rebuild
+"""
+import sys
+import asyncio
+from collections import Counter
+from enum import Enum
+from typing import Dict, Iterable, Optional, Tuple
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+CONTENT_STATS_COLLECTION = "content_stats"
+CONTENT_COLLECTION = "content"
+
+STATS_FIELDS = ("status", "category", "content_type", "source")
+
+# Projection that fetches just what stats_key needs.
+STATS_PROJECTION = {field: 1 for field in STATS_FIELDS}
+
+# Where tracked_update records the counter a document moved out of and into.
+STATS_CHANGE_FIELD = "stats_change"
+
+def _value(value):
+    return value.value if isinstance(value, Enum) else value
+
+def stats_key(doc: dict, **overrides) -> tuple:
+    """The counter a content document belongs to, optionally with some fields replaced."""
+    return tuple(_value(overrides.get(field, doc.get(field))) for field in STATS_FIELDS)
+
+def _key_document(key: tuple) -> dict:
+    return dict(zip(STATS_FIELDS, key))
+
+async def apply_counts(database: AsyncIOMotorDatabase, changes: Counter):
+    """Applies net counter changes keyed by stats_key in one bulk write."""
+    operations = [
+        UpdateOne({"_id": _key_document(key)}, {"$inc": {"count": delta}}, upsert=True)
+        for key, delta in changes.items()
+        if delta
+    ]
+    if operations:
+        await database.get_collection(CONTENT_STATS_COLLECTION).bulk_write(operations, ordered=False)
+
+async def count_inserted(database: AsyncIOMotorDatabase, documents: Iterable[dict]):
+    await apply_counts(database, Counter(stats_key(doc) for doc in documents))
+
+async def count_transitions(database: AsyncIOMotorDatabase, transitions: Iterable[Tuple[dict, dict]]):
+    """
+    Moves documents, given as they were before an update together with the
+    fields the update set, from their old counters to their new ones.
+    """
+    deltas = Counter()
+    for before, changes in transitions:
+        old_key, new_key = stats_key(before), stats_key(before, **changes)
+        if old_key != new_key:
+            deltas[old_key] -= 1
+            deltas[new_key] += 1
+    await apply_counts(database, deltas)
+
+async def count_changed(database: AsyncIOMotorDatabase, before: Iterable[dict], **changes):
+    """count_transitions for documents that all received the same change (e.g. status="approved")."""
+    await count_transitions(database, ((doc, changes) for doc in before))
+
+def set_stage(fields: dict, expressions: Optional[dict] = None) -> dict:
+    """
+    A $set pipeline stage for fields, taken literally so values starting with
+    "$" are not read as field paths, plus expressions evaluated against the
+    document as it was before the update.
+    """
+    expressions = expressions or {}
+    stage = {name: {"$literal": _value(value)} for name, value in fields.items() if name not in expressions}
+    stage.update(expressions)
+    return {"$set": stage}
+
+def tracked_update(
+    fields: dict,
+    token: ObjectId,
+    unset: Iterable[str] = (),
+    expressions: Optional[dict] = None,
+) -> list:
+    """
+    Update pipeline that sets fields (and expressions, see set_stage) and
+    records, under token, the stats key the document had when the update
+    applied and the one it moved to.
+    """
+    stage = set_stage(fields, expressions)
+    stage["$set"][STATS_CHANGE_FIELD] = {
+        "token": token,
+        "from": {field: f"${field}" for field in STATS_FIELDS},
+        "to": {field: stage["$set"][field] for field in STATS_FIELDS if field in stage["$set"]},
+    }
+    stages = [stage]
+    unset = list(unset)
+    if unset:
+        stages.append({"$unset": unset})
+    return stages
+
+async def count_tracked(
+    collection: AsyncIOMotorCollection,
+    content_ids: Iterable[ObjectId],
+    token: ObjectId,
+    field: str = "_id",
+) -> Dict[ObjectId, dict]:
+    """
+    Moves the counters of the documents that token's tracked_update was applied
+    to, read back in one query on an indexed field (the updated ids by default).
+    Returns the stats fields each of them moved to, by id.
+    """
+    applied = {}
+    transitions = []
+    cursor = collection.find(
+        {field: {"$in": list(content_ids)}, f"{STATS_CHANGE_FIELD}.token": token}, {STATS_CHANGE_FIELD: 1}
+    )
+    async for doc in cursor:
+        change = doc[STATS_CHANGE_FIELD]
+        applied[doc["_id"]] = change.get("to", {})
+        transitions.append((change["from"], change.get("to", {})))
+    await count_transitions(collection.database, transitions)
+    return applied
+
+async def rebuild_content_stats(database: AsyncIOMotorDatabase):
+    """Recomputes every counter from the content collection and atomically replaces the old ones."""
+    await database.get_collection(CONTENT_COLLECTION).aggregate([
+        {"$group": {
+            "_id": {field: f"${field}" for field in STATS_FIELDS},
+            "count": {"$sum": 1},
+        }},
+        {"$out": CONTENT_STATS_COLLECTION},
+    ]).to_list(None)
+
+async def ensure_content_stats(database: AsyncIOMotorDatabase):
+    """Builds the counters on first start against an existing content collection."""
+    if await database.get_collection(CONTENT_STATS_COLLECTION).find_one({}) is not None:
+        return
+    if await database.get_collection(CONTENT_COLLECTION).find_one({}, {"_id": 1}) is None:
+        return
+    print("Building content stats from the content collection")
+    await rebuild_content_stats(database)
+
+async def status_counts(database: AsyncIOMotorDatabase) -> dict:
+    counts = await database.get_collection(CONTENT_STATS_COLLECTION).aggregate([
+        {"$group": {"_id": "$_id.status", "count": {"$sum": "$count"}}},
+        {"$match": {"count": {"$gt": 0}}},
+    ]).to_list(None)
+    return {item["_id"]: item["count"] for item in counts}
+
+async def categories(database: AsyncIOMotorDatabase) -> list:
+    values = await database.get_collection(CONTENT_STATS_COLLECTION).distinct(
+        "_id.category", {"count": {"$gt": 0}}
+    )
+    return [value for value in values if value]
+
+async def breakdown(database: AsyncIOMotorDatabase, field: str, status: Optional[str] = None) -> dict:
+    """Item counts per value of field (source, category or content_type), split by status."""
+    match = {"count": {"$gt": 0}}
+    if status:
+        match["_id.status"] = status
+    counts = await database.get_collection(CONTENT_STATS_COLLECTION).aggregate([
+        {"$match": match},
+        {"$group": {
+            "_id": {"value": f"$_id.{field}", "status": "$_id.status"},
+            "count": {"$sum": "$count"},
+        }},
+    ]).to_list(None)
+    result = {}
+    for item in counts:
+        result.setdefault(item["_id"]["value"], {})[item["_id"]["status"]] = item["count"]
+    return result
+
+async def main(command: str):
+    from .db import connect_to_mongo, close_mongo_connection, get_database
+    await connect_to_mongo()
+    try:
+        if command == "rebuild":
+            await rebuild_content_stats(get_database())
+            print(await status_counts(get_database()))
+        else:
+            raise SystemExit(f"Unknown command: {command}")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "rebuild"))
@@ -1,6 +1,9 @@
+import os
 from motor.motor_asyncio import AsyncIOMotorClient
 from .models import DATABASE_URL
 
+DATABASE_NAME = os.getenv("DATABASE_NAME", "human_rights_ai_monitor")
+
 class DB:
     client: AsyncIOMotorClient = None
 
@@ -9,6 +12,12 @@ db = DB()
 async def get_database_client() -> AsyncIOMotorClient:
     return db.client
 
+def get_database():
+    """Returns the application database, or None before connect_to_mongo has run."""
+    if db.client is None:
+        return None
+    return db.client[DATABASE_NAME]
+
 async def connect_to_mongo():
     print("Connecting to MongoDB...")
     if not DATABASE_URL:
@@ -0,0 +1,129 @@
+"""
+Near-duplicate detection for syndicated stories.
+
+Each item's text is reduced to a MinHash signature over word shingles,
+whose agreement estimates the Jaccard similarity of two texts. Signatures
+are cut into LSH bands and stored in the fingerprints collection with a
+multikey index on the bands, so a lookup only compares against items sharing
+at least one band and never scans the index. With 16 bands of 4 rows, texts
+with a similarity of 0.7 become candidates 99% of the time; candidates are
+then confirmed against the full signature.
+"""
+import os
+import re
+import random
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError
+from .ai_cache import normalize_text
+
+FINGERPRINTS_COLLECTION = "fingerprints"
+
+# Only recent items are candidates; older fingerprints expire through a TTL index.
+FINGERPRINT_RETENTION_SECONDS = int(os.getenv("FINGERPRINT_RETENTION_DAYS", "90")) * 24 * 3600
+
+# Estimated Jaccard similarity of word bigrams above which two items are the same story.
+DUPLICATE_SIMILARITY = float(os.getenv("DUPLICATE_SIMILARITY", "0.5"))
+
+SHINGLE_SIZE = 2
+BAND_COUNT = 16
+BAND_ROWS = 4
+SIGNATURE_SIZE = BAND_COUNT * BAND_ROWS
+
+# Short texts (a one-line teaser) are too generic to fingerprint reliably.
+MIN_FINGERPRINT_WORDS = 20
+
+_PRIME = (1 << 61) - 1
+# Fixed seed: signatures must stay comparable across processes and restarts.
+_rng = random.Random(20240601)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(SIGNATURE_SIZE)]
+
+def minhash(text: str) -> Optional[List[int]]:
+    """MinHash signature of the text's word shingles, or None if the text is too short."""
+    words = re.findall(r"\w+", normalize_text(text).lower())
+    if len(words) < MIN_FINGERPRINT_WORDS:
+        return None
+
+    shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big") % _PRIME
+        for shingle in shingles
+    ]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+def bands(signature: List[int]) -> List[str]:
+    keys = []
+    for i in range(BAND_COUNT):
+        rows = signature[i * BAND_ROWS:(i + 1) * BAND_ROWS]
+        digest = hashlib.blake2b(",".join(map(str, rows)).encode("ascii"), digest_size=8).hexdigest()
+        keys.append(f"{i}:{digest}")
+    return keys
+
+def similarity(a: List[int], b: List[int]) -> float:
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / SIGNATURE_SIZE
+
+async def find_near_duplicates(
+    database: AsyncIOMotorDatabase,
+    items: List[Tuple[ObjectId, str]],
+) -> Tuple[Dict[ObjectId, ObjectId], Dict[ObjectId, List[int]]]:
+    """
+    Checks a batch of (content id, text) against the fingerprint index and
+    against earlier items in the same batch, using one query for the batch.
+    Returns the canonical content id for each duplicate, and the signatures
+    of the remaining items for save_fingerprints once they are stored.
+    """
+    signatures = {content_id: minhash(text) for content_id, text in items}
+    item_bands = {content_id: bands(sig) for content_id, sig in signatures.items() if sig is not None}
+    all_bands = {band for keys in item_bands.values() for band in keys}
+
+    by_band = {}
+    if all_bands:
+        cursor = database.get_collection(FINGERPRINTS_COLLECTION).find(
+            {"bands": {"$in": list(all_bands)}}, {"signature": 1, "bands": 1}
+        )
+        async for doc in cursor:
+            for band in doc["bands"]:
+                by_band.setdefault(band, []).append((doc["_id"], doc["signature"]))
+
+    duplicate_of = {}
+    canonical = {}
+    for content_id, _ in items:
+        if content_id not in item_bands:
+            continue
+        signature = signatures[content_id]
+        candidates = {
+            other_id: other
+            for band in item_bands[content_id]
+            for other_id, other in by_band.get(band, [])
+        }
+        best = max(
+            ((similarity(signature, other), other_id) for other_id, other in candidates.items()),
+            default=None,
+            key=lambda match: match[0],
+        )
+        if best is not None and best[0] >= DUPLICATE_SIMILARITY:
+            duplicate_of[content_id] = best[1]
+            continue
+        canonical[content_id] = signature
+        # Later items in the batch can match this one before it is saved.
+        for band in item_bands[content_id]:
+            by_band.setdefault(band, []).append((content_id, signature))
+    return duplicate_of, canonical
+
+async def save_fingerprints(database: AsyncIOMotorDatabase, signatures: Dict[ObjectId, List[int]]):
+    """Indexes the signatures of newly stored canonical items."""
+    if not signatures:
+        return
+    now = datetime.now()
+    documents = [
+        {"_id": content_id, "signature": signature, "bands": bands(signature), "created_at": now}
+        for content_id, signature in signatures.items()
+    ]
+    try:
+        await database.get_collection(FINGERPRINTS_COLLECTION).insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        print(f"Error saving fingerprints: {e.details.get('writeErrors', [])[:3]}")
@@ -0,0 +1,227 @@
+"""
+Bulk export of content for offline analysis.
+
+Rows are streamed from a Motor cursor in fixed-size batches and written out
+in chunks, so memory stays flat whatever the size of the collection. The
+cursor is sorted on the updated_at index; with since, only items updated at
+or after that time are exported, for incremental pulls.
+
+NDJSON and CSV stream straight into the /content/export response, optionally
+gzipped. Parquet needs the whole file before it can be read (its schema and
+row group index are in the footer), so it is a CLI snapshot mode written
+batch by batch to disk. It requires the optional pyarrow package.
+
+    python -m app.export ndjson --out approved.ndjson.gz --gzip
+    python -m app.export parquet --out approved.parquet --since 2024-06-01T00:00:00
+"""
+import io
+import csv
+import sys
+import json
+import zlib
+import asyncio
+import argparse
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from .models import ContentStatus
+
+EXPORT_FORMATS = ("ndjson", "csv")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+# Response header with the since value for the next incremental pull.
+NEXT_SINCE_HEADER = "X-Next-Since"
+
+# Documents fetched per round trip, and bytes buffered before a chunk is sent.
+EXPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_BYTES = 64 * 1024
+PARQUET_ROW_GROUP_SIZE = 10000
+
+# Everything an analyst needs; the embedding and the legacy feedback list are left out.
+EXPORT_FIELDS = (
+    "_id", "url", "title", "summary", "original_text", "transcript", "source",
+    "content_type", "category", "relevance_score", "helpful_votes", "not_helpful_votes",
+    "status", "editor_notes", "metadata", "duplicate_of", "published_at", "created_at",
+    "updated_at", "curated",
+)
+EXPORT_PROJECTION = {field: 1 for field in EXPORT_FIELDS}
+EXPORT_SORT = [("updated_at", 1)]
+EXPORT_HINT = "updated_at"
+
+def export_query(status: ContentStatus = ContentStatus.APPROVED, since: Optional[datetime] = None) -> dict:
+    find_filter = {"status": status.value}
+    if since is not None:
+        find_filter["updated_at"] = {"$gte": since}
+    return find_filter
+
+async def iter_documents(
+    collection: AsyncIOMotorCollection,
+    status: ContentStatus = ContentStatus.APPROVED,
+    since: Optional[datetime] = None,
+) -> AsyncIterator[dict]:
+    cursor = collection.find(export_query(status, since), EXPORT_PROJECTION)
+    # Pinned to the updated_at index (see indexes.py) so the server never sorts the corpus in memory.
+    cursor = cursor.sort(EXPORT_SORT).hint(EXPORT_HINT).batch_size(EXPORT_BATCH_SIZE)
+    async for doc in cursor:
+        yield doc
+
+def _json_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def ndjson_line(doc: dict) -> str:
+    return json.dumps(doc, default=_json_default, ensure_ascii=False) + "\n"
+
+def csv_row(doc: dict) -> List[str]:
+    """One CSV row in EXPORT_FIELDS order; lists and dicts are embedded as JSON."""
+    row = []
+    for field in EXPORT_FIELDS:
+        value = doc.get(field)
+        if value is None:
+            row.append("")
+        elif isinstance(value, (list, dict)):
+            row.append(json.dumps(value, default=_json_default, ensure_ascii=False))
+        elif isinstance(value, datetime):
+            row.append(value.isoformat())
+        else:
+            row.append(str(value))
+    return row
+
+async def _text_chunks(documents: AsyncIterator[dict], export_format: str) -> AsyncIterator[str]:
+    """Serialized rows, grouped into chunks of about EXPORT_CHUNK_BYTES."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == "csv" else None
+    if writer is not None:
+        writer.writerow(EXPORT_FIELDS)
+    async for doc in documents:
+        if writer is not None:
+            writer.writerow(csv_row(doc))
+        else:
+            buffer.write(ndjson_line(doc))
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+async def export_chunks(
+    collection: AsyncIOMotorCollection,
+    export_format: str,
+    compress: bool = False,
+    status: ContentStatus = ContentStatus.APPROVED,
+    since: Optional[datetime] = None,
+) -> AsyncIterator[bytes]:
+    """The export as a stream of byte chunks, gzipped on the fly if compress is set."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # 31: gzip container
+    async for text in _text_chunks(iter_documents(collection, status, since), export_format):
+        data = text.encode("utf-8")
+        if compressor is None:
+            yield data
+        else:
+            compressed = compressor.compress(data)
+            if compressed:
+                yield compressed
+    if compressor is not None:
+        yield compressor.flush()
+
+def _parquet_schema():
+    import pyarrow as pa
+    timestamp = pa.timestamp("ms")
+    return pa.schema([
+        ("_id", pa.string()), ("url", pa.string()), ("title", pa.string()),
+        ("summary", pa.list_(pa.string())), ("original_text", pa.string()), ("transcript", pa.string()),
+        ("source", pa.string()), ("content_type", pa.string()), ("category", pa.string()),
+        ("relevance_score", pa.float64()), ("helpful_votes", pa.int64()), ("not_helpful_votes", pa.int64()),
+        ("status", pa.string()), ("editor_notes", pa.string()), ("metadata", pa.string()),
+        ("duplicate_of", pa.string()), ("published_at", timestamp), ("created_at", timestamp),
+        ("updated_at", timestamp), ("curated", pa.bool_()),
+    ])
+
+def _parquet_columns(rows: List[dict]) -> Dict[str, list]:
+    columns = {field: [doc.get(field) for doc in rows] for field in EXPORT_FIELDS}
+    columns["_id"] = [str(value) for value in columns["_id"]]
+    columns["duplicate_of"] = [str(value) if value is not None else None for value in columns["duplicate_of"]]
+    columns["metadata"] = [
+        json.dumps(value, default=_json_default, ensure_ascii=False) if value is not None else None
+        for value in columns["metadata"]
+    ]
+    return columns
+
+async def write_parquet(
+    collection: AsyncIOMotorCollection,
+    path: str,
+    status: ContentStatus = ContentStatus.APPROVED,
+    since: Optional[datetime] = None,
+) -> int:
+    """Writes a Parquet snapshot one row group at a time. Returns the number of rows."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet export requires pyarrow: pip install pyarrow")
+
+    schema = _parquet_schema()
+    written = 0
+    rows = []
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        async for doc in iter_documents(collection, status, since):
+            rows.append(doc)
+            if len(rows) == PARQUET_ROW_GROUP_SIZE:
+                writer.write_table(pa.Table.from_pydict(_parquet_columns(rows), schema=schema))
+                written += len(rows)
+                rows = []
+        if rows:
+            writer.write_table(pa.Table.from_pydict(_parquet_columns(rows), schema=schema))
+            written += len(rows)
+    return written
+
+async def export_to_file(
+    collection: AsyncIOMotorCollection,
+    export_format: str,
+    path: Optional[str],
+    compress: bool = False,
+    status: ContentStatus = ContentStatus.APPROVED,
+    since: Optional[datetime] = None,
+):
+    """NDJSON or CSV to a file, or to stdout without a path."""
+    out = open(path, "wb") if path else sys.stdout.buffer
+    try:
+        async for chunk in export_chunks(collection, export_format, compress, status, since):
+            out.write(chunk)
+    finally:
+        if path:
+            out.close()
+
+async def main(argv: List[str]):
+    parser = argparse.ArgumentParser(prog="python -m app.export", description="Export content")
+    parser.add_argument("format", choices=EXPORT_FORMATS + ("parquet",))
+    parser.add_argument("--out", help="Output path; NDJSON and CSV go to stdout without one")
+    parser.add_argument("--gzip", action="store_true", help="Gzip NDJSON or CSV output")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only items updated at or after this time")
+    parser.add_argument("--status", type=ContentStatus, default=ContentStatus.APPROVED)
+    args = parser.parse_args(argv)
+    if args.format == "parquet" and not args.out:
+        parser.error("parquet export needs --out")
+
+    from .db import connect_to_mongo, close_mongo_connection, get_database
+    # Keeps connection messages out of an export written to stdout.
+    with redirect_stdout(sys.stderr):
+        await connect_to_mongo()
+    try:
+        collection = get_database().get_collection("content")
+        if args.format == "parquet":
+            written = await write_parquet(collection, args.out, args.status, args.since)
+            print(f"Wrote {written} rows to {args.out}")
+        else:
+            await export_to_file(collection, args.format, args.out, args.gzip, args.status, args.since)
+    finally:
+        with redirect_stdout(sys.stderr):
+            await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
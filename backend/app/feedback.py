@@ -0,0 +1,76 @@
+from datetime import datetime
+from typing import Optional
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+FEEDBACK_COLLECTION = "feedback"
+CONTENT_COLLECTION = "content"
+
+async def record_feedback(
+    database: AsyncIOMotorDatabase,
+    content_id: ObjectId,
+    is_helpful: bool,
+    comments: Optional[str] = None,
+) -> bool:
+    """
+    Counts a vote on the content item and appends it to the feedback
+    collection. The counter update doubles as the existence check, so the
+    content document never grows with its votes. Returns False if the item
+    does not exist.
+    """
+    counter = "helpful_votes" if is_helpful else "not_helpful_votes"
+    content = await database.get_collection(CONTENT_COLLECTION).find_one_and_update(
+        {"_id": content_id},
+        {"$inc": {counter: 1}},
+        projection={"source": 1, "category": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if content is None:
+        return False
+
+    # Source and category are copied onto the event so stats never join back to content.
+    await database.get_collection(FEEDBACK_COLLECTION).insert_one({
+        "content_id": content_id,
+        "is_helpful": is_helpful,
+        "comments": comments,
+        "source": content.get("source"),
+        "category": content.get("category"),
+        "timestamp": datetime.now(),
+    })
+    return True
+
+def _group_votes(field: str) -> list:
+    return [
+        {"$group": {
+            "_id": f"${field}",
+            "helpful": {"$sum": {"$cond": ["$is_helpful", 1, 0]}},
+            "not_helpful": {"$sum": {"$cond": ["$is_helpful", 0, 1]}},
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+
+def _vote_summary(group: dict) -> dict:
+    total = group["helpful"] + group["not_helpful"]
+    return {
+        "helpful": group["helpful"],
+        "not_helpful": group["not_helpful"],
+        "total": total,
+        "helpful_ratio": group["helpful"] / total if total else 0.0,
+    }
+
+async def feedback_stats(database: AsyncIOMotorDatabase, since: Optional[datetime] = None) -> dict:
+    """Helpful and not-helpful vote totals per source and per category, in one aggregation."""
+    pipeline = []
+    if since:
+        pipeline.append({"$match": {"timestamp": {"$gte": since}}})
+    pipeline.append({"$facet": {
+        "by_source": _group_votes("source"),
+        "by_category": _group_votes("category"),
+    }})
+    results = await database.get_collection(FEEDBACK_COLLECTION).aggregate(pipeline).to_list(1)
+    facets = results[0] if results else {"by_source": [], "by_category": []}
+    return {
+        "by_source": {group["_id"]: _vote_summary(group) for group in facets["by_source"]},
+        "by_category": {group["_id"]: _vote_summary(group) for group in facets["by_category"]},
+    }
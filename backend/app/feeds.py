@@ -0,0 +1,97 @@
+import os
+import asyncio
+import hashlib
+import feedparser
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from motor.motor_asyncio import AsyncIOMotorCollection
+from .http_client import get_session
+from .metrics import span
+
+# feedparser is synchronous and CPU-bound, so parsing runs in a worker pool
+# to keep the event loop free for API requests while a pipeline run is active.
+FEED_PARSE_WORKERS = int(os.getenv("FEED_PARSE_WORKERS", "4"))
+
+FEED_STATE_COLLECTION = "feed_state"
+
+class FeedFetchError(Exception):
+    """A feed answered with an HTTP error."""
+
+_parse_executor = ThreadPoolExecutor(max_workers=FEED_PARSE_WORKERS, thread_name_prefix="feedparse")
+
+def get_feed_state_collection(collection: AsyncIOMotorCollection) -> AsyncIOMotorCollection:
+    """Returns the collection holding per-feed validators, next to the content collection."""
+    return collection.database.get_collection(FEED_STATE_COLLECTION)
+
+async def parse_feed(body: bytes, url: str, content_type: str = None):
+    """Parses a downloaded feed body off the event loop."""
+    response_headers = {"content-location": url}
+    if content_type:
+        response_headers["content-type"] = content_type
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _parse_executor,
+        partial(feedparser.parse, body, response_headers=response_headers),
+    )
+
+async def fetch_feed(url: str, state_collection: AsyncIOMotorCollection = None):
+    """
+    Downloads a feed over the shared session and parses it in the worker pool.
+
+    When a state collection is given, the stored ETag / Last-Modified are sent as
+    conditional headers and parsing is skipped on a 304 or an unchanged body hash.
+    Returns a (feed, state) tuple; feed is None if the feed is unchanged, in which
+    case any new validators have already been saved. Raises FeedFetchError on any
+    other status than 200 or 304. The caller should pass state to save_feed_state
+    once the feed's entries have been stored, so a failed run is retried next time.
+    """
+    previous_state = None
+    headers = {}
+    if state_collection is not None:
+        previous_state = await state_collection.find_one({"_id": url})
+        if previous_state:
+            if previous_state.get("etag"):
+                headers["If-None-Match"] = previous_state["etag"]
+            if previous_state.get("last_modified"):
+                headers["If-Modified-Since"] = previous_state["last_modified"]
+
+    session = get_session()
+    with span("feed_fetch"):
+        async with session.get(url, headers=headers) as response:
+            if response.status == 304:
+                print(f"Feed not modified: {url}")
+                return None, None
+            if response.status != 200:
+                # Raised rather than treated as "no new items" so the scheduler backs off and records it.
+                raise FeedFetchError(f"Failed to fetch feed {url}: HTTP {response.status}")
+            body = await response.read()
+            content_type = response.headers.get("Content-Type")
+            state = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "body_hash": hashlib.sha256(body).hexdigest(),
+            }
+
+    if previous_state and previous_state.get("body_hash") == state["body_hash"]:
+        print(f"Feed unchanged: {url}")
+        # Nothing to store, so the new validators can be saved now; otherwise a server
+        # that rotates its ETag would be re-downloaded in full on every run.
+        if any(previous_state.get(key) != state[key] for key in ("etag", "last_modified")):
+            await save_feed_state(state_collection, url, state)
+        return None, None
+
+    with span("feed_parse") as parse_span:
+        feed = await parse_feed(body, url, content_type)
+        parse_span["items"] = len(feed.entries)
+    return feed, state
+
+async def save_feed_state(state_collection: AsyncIOMotorCollection, url: str, state: dict):
+    """Persists the validators returned by fetch_feed for the next conditional request."""
+    if state_collection is None or not state:
+        return
+    await state_collection.update_one(
+        {"_id": url},
+        {"$set": {**state, "updated_at": datetime.now()}},
+        upsert=True,
+    )
@@ -0,0 +1,42 @@
+import os
+import aiohttp
+
+# Connection pool settings shared by every outbound HTTP call in the pipeline.
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "4"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+
+USER_AGENT = "HumanRightsAIMonitor/1.0"
+
+_session = None
+
+def get_session() -> aiohttp.ClientSession:
+    """Lazily initialize and return the shared, pooled aiohttp session."""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_MAX_CONNECTIONS,
+            limit_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+            ttl_dns_cache=300,
+        )
+        # No total timeout: podcast downloads can legitimately take minutes,
+        # so we only bound connecting and the gap between reads.
+        timeout = aiohttp.ClientTimeout(
+            total=None,
+            sock_connect=HTTP_CONNECT_TIMEOUT,
+            sock_read=HTTP_READ_TIMEOUT,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers={"User-Agent": USER_AGENT},
+        )
+    return _session
+
+async def close_session():
+    """Closes the shared session, if one was opened."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
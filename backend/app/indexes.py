@@ -0,0 +1,194 @@
+"""
+Declarative index registry, ensured idempotently at startup.
+
+Usage:
+    python -m app.indexes          # create any missing indexes
+    python -m app.indexes check    # explain every endpoint query, exit 1 on a COLLSCAN
+
+tests/test_query_plans.py runs the same check under pytest.
+"""
+import sys
+import asyncio
+from datetime import datetime
+from bson import ObjectId
+from typing import Iterator, List
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel, ASCENDING, DESCENDING, TEXT
+from pymongo.errors import OperationFailure
+from .ai_cache import ENRICHMENT_CACHE_COLLECTION, ENRICHMENT_CACHE_TTL_SECONDS
+from .jobs import JOBS_COLLECTION
+from .scheduler import SCHEDULE_COLLECTION
+from .feedback import FEEDBACK_COLLECTION
+from .dedup import FINGERPRINTS_COLLECTION, FINGERPRINT_RETENTION_SECONDS
+from .models import ContentStatus
+from .export import export_query, EXPORT_SORT, EXPORT_HINT
+from . import queries
+
+CONTENT_COLLECTION = "content"
+
+# Collection name -> indexes it must have. Names are explicit so changing an
+# index's definition means giving it a new name rather than silently diverging.
+INDEXES = {
+    CONTENT_COLLECTION: [
+        IndexModel([("url", ASCENDING)], unique=True, name="url_unique"),
+        # Listing indexes end in _id to match the keyset pagination sort (see queries.py).
+        IndexModel(
+            [("status", ASCENDING), ("published_at", DESCENDING), ("_id", DESCENDING)],
+            name="status_published_at_id",
+        ),
+        IndexModel(
+            [("status", ASCENDING), ("category", ASCENDING), ("published_at", DESCENDING), ("_id", DESCENDING)],
+            name="status_category_published_at_id",
+        ),
+        IndexModel(
+            [("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="status_created_at_id",
+        ),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+        # Near-duplicates stored while their canonical awaited a batch result get its enrichment later (see batch.py).
+        IndexModel(
+            [("duplicate_of", ASCENDING)],
+            partialFilterExpression={"duplicate_of": {"$exists": True}},
+            name="duplicate_of",
+        ),
+        # Incremental refreshes of the vector index read what changed since the last one.
+        IndexModel([("updated_at", ASCENDING)], name="updated_at"),
+        IndexModel(
+            [("title", TEXT), ("summary", TEXT)],
+            weights={"title": 10, "summary": 5},
+            name="title_summary_text",
+        ),
+    ],
+    ENRICHMENT_CACHE_COLLECTION: [
+        IndexModel([("created_at", ASCENDING)], expireAfterSeconds=ENRICHMENT_CACHE_TTL_SECONDS, name="created_at_ttl"),
+    ],
+    JOBS_COLLECTION: [
+        # One active job per kind and parameters; duplicate runs join it.
+        IndexModel(
+            [("dedup_key", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"active": True},
+            name="dedup_key_active_unique",
+        ),
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at"),
+    ],
+    SCHEDULE_COLLECTION: [
+        IndexModel([("next_run_at", ASCENDING)], name="next_run_at"),
+    ],
+    FEEDBACK_COLLECTION: [
+        IndexModel([("content_id", ASCENDING), ("timestamp", DESCENDING)], name="content_id_timestamp"),
+        IndexModel([("timestamp", DESCENDING)], name="timestamp"),
+    ],
+    FINGERPRINTS_COLLECTION: [
+        IndexModel([("bands", ASCENDING)], name="bands"),
+        IndexModel([("created_at", ASCENDING)], expireAfterSeconds=FINGERPRINT_RETENTION_SECONDS, name="created_at_ttl"),
+    ],
+}
+
+# Indexes superseded by the ones above, dropped when found.
+OBSOLETE_INDEXES = {
+    CONTENT_COLLECTION: [
+        "status_published_at",
+        "status_category_published_at",
+        "status_created_at",
+        "created_at",
+    ],
+}
+
+async def ensure_indexes(database: AsyncIOMotorDatabase):
+    """
+    Creates every registered index. Existing identical indexes are left alone;
+    an index that cannot be built (e.g. duplicate urls in old data) is reported
+    without stopping startup.
+    """
+    for collection_name, indexes in INDEXES.items():
+        collection = database.get_collection(collection_name)
+        for index in indexes:
+            try:
+                await collection.create_indexes([index])
+            except OperationFailure as e:
+                print(f"Could not create index {index.document['name']} on {collection_name}: {e}")
+
+    for collection_name, names in OBSOLETE_INDEXES.items():
+        collection = database.get_collection(collection_name)
+        existing = await collection.index_information()
+        for name in names:
+            if name in existing:
+                await collection.drop_index(name)
+                print(f"Dropped obsolete index {name} on {collection_name}")
+
+def endpoint_queries() -> List[tuple]:
+    """
+    (name, filter, sort, limit, hint) for every content query the API issues,
+    with representative arguments. hint is None unless the endpoint pins an index.
+    """
+    approved = queries.approved_content_query()
+    later_page = queries.encode_cursor({"published_at": datetime.now(), "_id": ObjectId()}, approved[1])
+    pending = queries.pending_content_query()
+    later_pending_page = queries.encode_cursor({"created_at": datetime.now(), "_id": ObjectId()}, pending[1])
+    search = queries.search_content_query("surveillance")
+    later_search_page = queries.encode_cursor({"published_at": datetime.now(), "_id": ObjectId()}, search[1])
+    return [
+        ("GET /content", *queries.recent_content_query(), 10, None),
+        ("GET /content/pending", *queries.pending_content_query(), 20, None),
+        ("GET /content/pending?status=filtered", *queries.pending_content_query(ContentStatus.FILTERED), 20, None),
+        ("POST /content/approve-latest", *queries.pending_content_query(), 10, None),
+        ("POST /content/curate/bulk filter", *queries.bulk_curation_query(
+            ContentStatus.FILTERED, source="https://example.org/feed", min_relevance=0.5,
+        ), 500, None),
+        ("GET /content/approved", *queries.approved_content_query(), 20, None),
+        ("GET /content/approved?category", *queries.approved_content_query("Risk-focused"), 20, None),
+        ("GET /content/approved?cursor", *queries.paginate(approved, later_page), 20, None),
+        ("GET /content/pending?cursor", *queries.paginate(pending, later_pending_page), 20, None),
+        ("GET /content/search", *search, 20, None),
+        ("GET /content/search?category&content_type", *queries.search_content_query("surveillance", "Risk-focused", "Article"), 20, None),
+        ("GET /content/search?cursor", *queries.paginate(search, later_search_page), 20, None),
+        ("GET /content/search?mode=hybrid", *queries.text_candidates_query("surveillance"), 100, None),
+        ("GET /content/export?since", export_query(since=datetime.now()), EXPORT_SORT, 500, EXPORT_HINT),
+    ]
+
+def _stages(plan) -> Iterator[str]:
+    """Yields every stage name in an explain plan, whatever the server's plan layout."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _stages(item)
+
+async def check_query_plans(database: AsyncIOMotorDatabase) -> List[str]:
+    """Explains each endpoint query and returns the names of those whose winning plan scans the collection."""
+    collection = database.get_collection(CONTENT_COLLECTION)
+    failures = []
+    for name, find_filter, sort, limit, hint in endpoint_queries():
+        cursor = collection.find(find_filter).sort(sort).limit(limit)
+        if hint is not None:
+            cursor = cursor.hint(hint)
+        explanation = await cursor.explain()
+        stages = set(_stages(explanation["queryPlanner"]["winningPlan"]))
+        if "COLLSCAN" in stages:
+            failures.append(name)
+            print(f"FAIL {name}: COLLSCAN")
+        elif "SORT" in stages:
+            print(f"WARN {name}: in-memory SORT")
+        else:
+            print(f"ok   {name}")
+    return failures
+
+async def main(command: str):
+    from .db import connect_to_mongo, close_mongo_connection, get_database
+    await connect_to_mongo()
+    try:
+        database = get_database()
+        await ensure_indexes(database)
+        if command == "check":
+            failures = await check_query_plans(database)
+            if failures:
+                raise SystemExit(1)
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "ensure"))
@@ -0,0 +1,171 @@
+import os
+import uuid
+import socket
+import hashlib
+import contextvars
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from .models import JobStatus
+
+JOBS_COLLECTION = "jobs"
+LOCKS_COLLECTION = "locks"
+
+# A running job whose worker has not sent a heartbeat for this long is requeued.
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "300"))
+SOURCE_LEASE_SECONDS = int(os.getenv("SOURCE_LEASE_SECONDS", "1800"))
+
+# Identifies this process as the owner of leases it takes outside a job.
+PROCESS_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+# The job the current task is executing, set by the worker. Pipeline code reads
+# it to report per-source progress without threading a job through every call.
+current_job = contextvars.ContextVar("current_job", default=None)
+
+def _dedup_key(kind: str, params: dict) -> str:
+    return f"{kind}:{hashlib.sha1(repr(sorted(params.items())).encode()).hexdigest()}"
+
+def _progress_key(source: str) -> str:
+    # Source labels are URLs, whose dots cannot be used in Mongo field paths.
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+
+async def enqueue_job(database: AsyncIOMotorDatabase, kind: str, params: dict = None) -> Tuple[dict, bool]:
+    """
+    Queues a job unless an identical one is already queued or running.
+    Returns (job, created); duplicate requests get the existing job back.
+    """
+    params = params or {}
+    jobs = database.get_collection(JOBS_COLLECTION)
+    dedup_key = _dedup_key(kind, params)
+    job = {
+        "kind": kind,
+        "params": params,
+        "status": JobStatus.QUEUED.value,
+        "active": True,
+        "dedup_key": dedup_key,
+        "progress": {},
+        "created_at": datetime.now(),
+    }
+    try:
+        result = await jobs.insert_one(job)
+        job["_id"] = result.inserted_id
+        return job, True
+    except DuplicateKeyError:
+        existing = await jobs.find_one({"dedup_key": dedup_key, "active": True})
+        if existing is None:
+            # The active job finished between our insert and lookup; try once more.
+            return await enqueue_job(database, kind, params)
+        return existing, False
+
+async def get_job(database: AsyncIOMotorDatabase, job_id: str) -> Optional[dict]:
+    return await database.get_collection(JOBS_COLLECTION).find_one({"_id": ObjectId(job_id)})
+
+async def claim_next_job(database: AsyncIOMotorDatabase, worker_id: str) -> Optional[dict]:
+    """Atomically moves the oldest queued job to running and returns it."""
+    now = datetime.now()
+    return await database.get_collection(JOBS_COLLECTION).find_one_and_update(
+        {"status": JobStatus.QUEUED.value},
+        {"$set": {
+            "status": JobStatus.RUNNING.value,
+            "worker_id": worker_id,
+            "started_at": now,
+            "heartbeat_at": now,
+        }},
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+async def heartbeat(database: AsyncIOMotorDatabase, job_id: ObjectId):
+    """Marks the job alive and renews the source leases it holds, however long its sources take."""
+    now = datetime.now()
+    await database.get_collection(JOBS_COLLECTION).update_one(
+        {"_id": job_id}, {"$set": {"heartbeat_at": now}}
+    )
+    await database.get_collection(LOCKS_COLLECTION).update_many(
+        {"owner": str(job_id)}, {"$set": {"expires_at": now + timedelta(seconds=SOURCE_LEASE_SECONDS)}}
+    )
+
+async def requeue_stale_jobs(database: AsyncIOMotorDatabase) -> int:
+    """Returns jobs abandoned by a crashed worker to the queue."""
+    cutoff = datetime.now() - timedelta(seconds=JOB_STALE_SECONDS)
+    result = await database.get_collection(JOBS_COLLECTION).update_many(
+        {"status": JobStatus.RUNNING.value, "heartbeat_at": {"$lt": cutoff}},
+        {"$set": {"status": JobStatus.QUEUED.value}, "$unset": {"worker_id": ""}},
+    )
+    return result.modified_count
+
+async def finish_job(database: AsyncIOMotorDatabase, job_id: ObjectId, result: dict = None, error: str = None, metrics: dict = None):
+    """
+    Marks a job succeeded or failed and frees its dedup key for new runs.
+    metrics is the run's per-stage timing and LLM spend (see metrics.RunSummary).
+    """
+    update = {
+        "status": JobStatus.FAILED.value if error else JobStatus.SUCCEEDED.value,
+        "active": False,
+        "finished_at": datetime.now(),
+    }
+    if result is not None:
+        update["result"] = result
+    if error:
+        update["error"] = error
+    if metrics is not None:
+        update["metrics"] = metrics
+    await database.get_collection(JOBS_COLLECTION).update_one({"_id": job_id}, {"$set": update})
+
+async def report_progress(database: AsyncIOMotorDatabase, source: str, **fields):
+    """Records per-source progress on the current job. A no-op outside a job."""
+    job = current_job.get()
+    if job is None:
+        return
+    key = f"progress.{_progress_key(source)}"
+    update = {f"{key}.source": source, f"{key}.updated_at": datetime.now()}
+    update.update({f"{key}.{name}": value for name, value in fields.items()})
+    await database.get_collection(JOBS_COLLECTION).update_one({"_id": job["_id"]}, {"$set": update})
+
+@asynccontextmanager
+async def source_lease(database: AsyncIOMotorDatabase, source: str, ttl_seconds: int = SOURCE_LEASE_SECONDS):
+    """
+    Holds a lease on a source for the duration of the block so two runs never
+    process the same source at once. Yields False if another owner holds it.
+    Inside a job the worker's heartbeat keeps renewing the lease; it expires on
+    its own if the holder dies.
+    """
+    job = current_job.get()
+    owner = str(job["_id"]) if job else PROCESS_ID
+    locks = database.get_collection(LOCKS_COLLECTION)
+    now = datetime.now()
+    try:
+        await locks.update_one(
+            {"_id": source, "$or": [{"expires_at": {"$lt": now}}, {"owner": owner}]},
+            {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=ttl_seconds)}},
+            upsert=True,
+        )
+        acquired = True
+    except DuplicateKeyError:
+        acquired = False
+
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            await locks.delete_one({"_id": source, "owner": owner})
+
+def job_to_response(job: dict) -> dict:
+    """Shapes a job document for the status endpoint."""
+    return {
+        "job_id": str(job["_id"]),
+        "kind": job["kind"],
+        "params": job.get("params", {}),
+        "status": job["status"],
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+        "progress": sorted(job.get("progress", {}).values(), key=lambda p: p["source"]),
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "metrics": job.get("metrics"),
+    }
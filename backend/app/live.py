@@ -0,0 +1,172 @@
+"""
+Live content updates for the dashboards, pushed as server-sent events.
+
+One watcher per API process follows the content collection and fans every
+insert and status change out to all connected clients, so N open dashboards
+cost one server-side cursor instead of N polling loops. The watcher uses a
+MongoDB change stream, which needs a replica set; on a standalone server it
+falls back to polling the created_at and updated_at indexes. It starts with
+the first subscriber and stops when the last one leaves.
+
+Each event carries the item as a ContentSummary. Clients add it to or drop
+it from their lists based on its status. A client that falls too far behind
+gets a "resync" event instead and should re-fetch its list.
+"""
+import os
+import json
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional, Set
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pydantic import TypeAdapter, ValidationError
+from pymongo.errors import OperationFailure, PyMongoError
+from .models import ContentSummary
+from . import queries
+
+LIVE_POLL_SECONDS = float(os.getenv("LIVE_POLL_SECONDS", "3"))
+LIVE_KEEPALIVE_SECONDS = float(os.getenv("LIVE_KEEPALIVE_SECONDS", "15"))
+# Events buffered per client before it is told to resync.
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "500"))
+# Delay before reopening a change stream after an error.
+RECONNECT_SECONDS = 2.0
+# Polls re-read a little before the last one, so writes racing it are not missed.
+POLL_OVERLAP = timedelta(seconds=2)
+# Statuses remembered by the poller, to skip updates that did not change the status.
+SEEN_STATUS_SIZE = 10000
+
+# Change stream errors meaning "not a replica set": fall back to polling.
+CHANGE_STREAM_UNSUPPORTED = {40573, 40324}
+
+# Client-side retry delay sent in the stream, in milliseconds.
+CLIENT_RETRY_MS = 5000
+
+_summary_adapter = TypeAdapter(ContentSummary)
+
+RESYNC = {"type": "resync"}
+
+def _event(doc: dict) -> Optional[dict]:
+    try:
+        summary = _summary_adapter.validate_python(doc)
+    except ValidationError as e:
+        print(f"Skipping live update for {doc.get('_id')}: {e}")
+        return None
+    return {"type": "content", "content": json.loads(_summary_adapter.dump_json(summary, by_alias=True))}
+
+class ContentFeed:
+    def __init__(self):
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.task: Optional[asyncio.Task] = None
+        self.mode: Optional[str] = None
+        self.resume_token = None
+
+    def publish(self, event: Optional[dict]):
+        if event is None:
+            return
+        for queue in self.subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Events were lost, so the client's list is stale: replace the backlog with a resync.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+
+    def subscribe(self, collection: AsyncIOMotorCollection) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=LIVE_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run(collection))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+        if not self.subscribers and self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def _run(self, collection: AsyncIOMotorCollection):
+        if self.mode != "poll":
+            try:
+                await self._watch(collection)
+                return
+            except OperationFailure as e:
+                if e.code not in CHANGE_STREAM_UNSUPPORTED:
+                    raise
+                print("Change streams are not available; polling for live updates")
+                self.mode = "poll"
+        await self._poll(collection)
+
+    async def _watch(self, collection: AsyncIOMotorCollection):
+        """Follows inserts and status changes through a change stream, resuming after errors."""
+        pipeline = [
+            {"$match": {"$or": [
+                {"operationType": {"$in": ["insert", "replace"]}},
+                {"operationType": "update", "updateDescription.updatedFields.status": {"$exists": True}},
+            ]}},
+            {"$project": {f"fullDocument.{field}": 1 for field in queries.SUMMARY_PROJECTION}},
+        ]
+        while True:
+            try:
+                async with collection.watch(
+                    pipeline, full_document="updateLookup", resume_after=self.resume_token
+                ) as stream:
+                    self.mode = "change_stream"
+                    async for change in stream:
+                        self.resume_token = stream.resume_token
+                        if change.get("fullDocument"):
+                            self.publish(_event(change["fullDocument"]))
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAM_UNSUPPORTED:
+                    raise
+                # The resume point fell off the oplog; clients may have missed events.
+                print(f"Live change stream failed: {e}")
+                self.resume_token = None
+                self.publish(RESYNC)
+            except PyMongoError as e:
+                print(f"Live change stream interrupted: {e}")
+            await asyncio.sleep(RECONNECT_SECONDS)
+
+    async def _poll(self, collection: AsyncIOMotorCollection):
+        """Re-reads items created or updated since the last poll, publishing new statuses."""
+        seen = OrderedDict()
+        since = datetime.now()
+        while True:
+            await asyncio.sleep(LIVE_POLL_SECONDS)
+            started_at = datetime.now()
+            try:
+                # New items have no updated_at yet; both fields are indexed.
+                window = {"$gte": since - POLL_OVERLAP}
+                cursor = collection.find(
+                    {"$or": [{"created_at": window}, {"updated_at": window}]}, queries.SUMMARY_PROJECTION
+                )
+                async for doc in cursor:
+                    if seen.get(doc["_id"]) == doc.get("status"):
+                        continue
+                    seen[doc["_id"]] = doc.get("status")
+                    seen.move_to_end(doc["_id"])
+                    if len(seen) > SEEN_STATUS_SIZE:
+                        seen.popitem(last=False)
+                    self.publish(_event(doc))
+                since = started_at
+            except PyMongoError as e:
+                print(f"Live update poll failed: {e}")
+
+content_feed = ContentFeed()
+
+async def event_stream(collection: AsyncIOMotorCollection, is_disconnected) -> AsyncIterator[str]:
+    """Server-sent events for one client, with keepalive comments so proxies keep the connection open."""
+    queue = content_feed.subscribe(collection)
+    try:
+        yield f"retry: {CLIENT_RETRY_MS}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=LIVE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    return
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        content_feed.unsubscribe(queue)
@@ -0,0 +1,202 @@
+import os
+import time
+import random
+import asyncio
+from openai import AsyncOpenAI, RateLimitError, APIConnectionError, APITimeoutError, InternalServerError
+from .metrics import span, record_llm_usage
+
+# Limits for the account tier; the defaults are conservative for gpt-3.5-turbo.
+OPENAI_RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", "500"))
+OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "160000"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "6"))
+OPENAI_BACKOFF_BASE = float(os.getenv("OPENAI_BACKOFF_BASE", "1.0"))
+OPENAI_BACKOFF_MAX = float(os.getenv("OPENAI_BACKOFF_MAX", "60.0"))
+
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+class TokenBucket:
+    """
+    Refills continuously at capacity-per-minute. Waiters are served in FIFO
+    order because the lock is held while sleeping for the deficit.
+    """
+
+    def __init__(self, capacity_per_minute: int):
+        self.capacity = float(capacity_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount: float):
+        # A single request larger than the bucket would otherwise wait forever.
+        amount = min(amount, self.capacity)
+        async with self.lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+    def adjust(self, amount: float):
+        """Returns (or charges) the difference between the estimate and actual usage."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+class RateLimitedLLM:
+    """
+    Wraps one shared AsyncOpenAI client with request- and token-per-minute
+    buckets, bounded concurrency and jittered retries on rate limiting.
+    """
+
+    def __init__(self, client: AsyncOpenAI, rpm: int, tpm: int, max_concurrency: int):
+        self.client = client
+        self.request_bucket = TokenBucket(rpm)
+        self.token_bucket = TokenBucket(tpm)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+
+    async def _run(self, request, estimated_tokens: int = 0, stage: str = "llm", model: str = ""):
+        """Runs request under the limits, timed as one span including queueing and retries."""
+        with span(stage, items=1):
+            response = await self._run_with_retries(request, estimated_tokens)
+        usage = getattr(response, "usage", None)
+        if usage is not None and model:
+            record_llm_usage(model, usage.prompt_tokens, getattr(usage, "completion_tokens", 0) or 0)
+        return response
+
+    async def _run_with_retries(self, request, estimated_tokens: int):
+        for attempt in range(OPENAI_MAX_RETRIES + 1):
+            self.queued += 1
+            waiting = True
+            try:
+                async with self.semaphore:
+                    await self.request_bucket.acquire(1)
+                    if estimated_tokens:
+                        await self.token_bucket.acquire(estimated_tokens)
+                    self.queued -= 1
+                    waiting = False
+
+                    self.in_flight += 1
+                    try:
+                        response = await request()
+                    finally:
+                        self.in_flight -= 1
+
+                usage = getattr(response, "usage", None)
+                if usage is not None and estimated_tokens:
+                    self.token_bucket.adjust(estimated_tokens - usage.total_tokens)
+                self.completed += 1
+                return response
+
+            except RETRYABLE_ERRORS as e:
+                if attempt == OPENAI_MAX_RETRIES:
+                    self.failed += 1
+                    raise
+                self.retries += 1
+                delay = _backoff_delay(attempt, e)
+                print(f"OpenAI call failed ({type(e).__name__}), retrying in {delay:.1f}s")
+            except Exception:
+                self.failed += 1
+                raise
+            finally:
+                if waiting:
+                    self.queued -= 1
+
+            await asyncio.sleep(delay)
+
+    async def chat_completion(self, **kwargs):
+        """Rate-limited client.chat.completions.create."""
+        estimated_tokens = estimate_tokens(kwargs.get("messages", [])) + kwargs.get("max_tokens", 0)
+        return await self._run(
+            lambda: self.client.chat.completions.create(**kwargs),
+            estimated_tokens,
+            stage="llm_chat",
+            model=kwargs.get("model", ""),
+        )
+
+    async def embeddings(self, **kwargs):
+        """Rate-limited client.embeddings.create."""
+        inputs = kwargs.get("input", [])
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        estimated_tokens = sum(len(text) for text in inputs) // 4
+        return await self._run(
+            lambda: self.client.embeddings.create(**kwargs),
+            estimated_tokens,
+            stage="llm_embeddings",
+            model=kwargs.get("model", ""),
+        )
+
+    async def transcribe_file(self, path: str, **kwargs):
+        """Rate-limited client.audio.transcriptions.create for a file on disk."""
+        async def request():
+            # Reopened on every attempt so a retry uploads the whole file again.
+            with open(path, "rb") as audio_file:
+                return await self.client.audio.transcriptions.create(file=audio_file, **kwargs)
+        return await self._run(request, stage="transcription")
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "max_concurrency": OPENAI_MAX_CONCURRENCY,
+            "rpm_limit": OPENAI_RPM_LIMIT,
+            "tpm_limit": OPENAI_TPM_LIMIT,
+        }
+
+def estimate_tokens(messages) -> int:
+    """Rough prompt size: about four characters per token for English text."""
+    return sum(len(message.get("content") or "") for message in messages) // 4 + 8 * len(messages)
+
+def _backoff_delay(attempt: int, error: Exception) -> float:
+    """Honours Retry-After when the API sends it, otherwise full-jitter exponential backoff."""
+    response = getattr(error, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return float(retry_after) + random.uniform(0, 1)
+            except ValueError:
+                pass
+    return random.uniform(0, min(OPENAI_BACKOFF_MAX, OPENAI_BACKOFF_BASE * 2 ** attempt))
+
+_llm = None
+
+def get_llm():
+    """
+    Lazily initialize and return the shared rate-limited client.
+    Returns None when no API key is configured. Created on first use so the
+    asyncio primitives belong to the running event loop.
+    """
+    global _llm
+    if _llm is None:
+        api_key = os.environ.get("OPENAI_API_KEY")
+        if api_key:
+            # Retries are handled by the limiter so they respect the shared budget.
+            client = AsyncOpenAI(
+                api_key=api_key,
+                # Lets tests and benchmarks point at a local stub server.
+                base_url=os.environ.get("OPENAI_BASE_URL") or None,
+                max_retries=0,
+            )
+            _llm = RateLimitedLLM(client, OPENAI_RPM_LIMIT, OPENAI_TPM_LIMIT, OPENAI_MAX_CONCURRENCY)
+    return _llm
+
+def get_llm_stats() -> dict:
+    """Returns queue and in-flight counters, or an idle snapshot before first use."""
+    llm = _llm
+    if llm is None:
+        return {"queued": 0, "in_flight": 0, "completed": 0, "failed": 0, "retries": 0, "enabled": bool(os.environ.get("OPENAI_API_KEY"))}
+    return {**llm.stats(), "enabled": True}
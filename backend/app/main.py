@@ -1,23 +1,56 @@
-from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional
-from pydantic import BaseModel
+import json
+import time
+from typing import List, MutableMapping, Optional
+from pydantic import BaseModel, Field, TypeAdapter
 from datetime import datetime
-from . import pipeline
-from .db import connect_to_mongo, close_mongo_connection, get_database_client
-from .models import Content
+from .db import connect_to_mongo, close_mongo_connection, get_database_client, DATABASE_NAME
+from .http_client import close_session
+from .llm import get_llm_stats
+from .ai_cache import enrichment_cache
+from .jobs import enqueue_job, get_job, job_to_response
+from .indexes import ensure_indexes
+from . import queries
+from .scheduler import get_schedule
+from .feedback import record_feedback, feedback_stats
+from .response_cache import response_cache
+from .vector_index import vector_index
+from .search import ranked_search, SemanticSearchUnavailable
+from . import content_stats
+from . import metrics
+from .live import event_stream
+from . import export
+from pymongo import ReturnDocument, UpdateOne
+from .models import Content, ContentSummary, ContentStatus, APPROVE_WHEN_ENRICHED
 from bson import ObjectId
 from contextlib import asynccontextmanager
 
+# Cache lifetimes for the public read endpoints; writes invalidate them sooner.
+CATEGORIES_CACHE_TTL_SECONDS = 300
+
+BULK_CURATION_MAX_ITEMS = 1000
+
+summary_list_adapter = TypeAdapter(List[ContentSummary])
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await connect_to_mongo()
     client = await get_database_client()
     app.state.db_client = client
-    app.state.db_collection = client.human_rights_ai_monitor.get_collection("content")
+    app.state.db_collection = client[DATABASE_NAME].get_collection("content")
+    await ensure_indexes(client[DATABASE_NAME])
+    await content_stats.ensure_content_stats(client[DATABASE_NAME])
+    try:
+        await vector_index.refresh(app.state.db_collection, force=True)
+        print(f"Loaded {len(vector_index)} embeddings into the vector index")
+    except Exception as e:
+        print(f"Error loading vector index: {e}")
     yield
     # Shutdown
+    await close_session()
     await close_mongo_connection()
 
 app = FastAPI(
@@ -43,32 +76,72 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[queries.NEXT_CURSOR_HEADER, "ETag", export.NEXT_SINCE_HEADER],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # The route template keeps ids out of the labels; unmatched paths share one series.
+        route = request.scope.get("route")
+        metrics.HTTP_SECONDS.observe(
+            time.perf_counter() - start,
+            request.method,
+            route.path if route is not None else "unmatched",
+            status,
+        )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Request latency and LLM usage in the Prometheus text format. Pipeline
+    stage timings are recorded by the worker and served on its own port.
+    """
+    llm_stats = get_llm_stats()
+    cache_stats = enrichment_cache.stats()
+    page_cache_stats = response_cache.stats()
+    gauges = {f"llm_{name}": llm_stats.get(name, 0) for name in ("queued", "in_flight", "completed", "failed", "retries")}
+    gauges.update({f"enrichment_cache_{name}": cache_stats[name] for name in ("memory_hits", "persistent_hits", "misses")})
+    gauges.update({f"response_cache_{name}": page_cache_stats[name] for name in ("hits", "misses", "not_modified", "errors")})
+    gauges["vector_index_items"] = len(vector_index)
+    return metrics.render(gauges)
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Human Rights & AI Monitor API"}
 
 @app.post("/content/approve-latest")
-async def approve_latest_content(request: Request):
+async def approve_latest_content(request: Request, limit: int = Query(10, ge=1, le=BULK_CURATION_MAX_ITEMS)):
     """
-    A temporary endpoint to approve the 10 most recent pending articles.
+    A temporary endpoint to approve the most recent pending articles (10 by default).
     This helps in testing the main dashboard without manual curation.
     """
     try:
+        find_filter, sort = queries.pending_content_query()
         pending_articles = await request.app.state.db_collection.find(
-            {"status": "pending"}
-        ).sort("created_at", -1).limit(10).to_list(10)
+            find_filter, {"_id": 1}
+        ).sort(sort).limit(limit).to_list(limit)
 
         if not pending_articles:
             return {"status": "noop", "message": "No pending articles to approve."}
 
         article_ids = [article['_id'] for article in pending_articles]
 
+        # Articles another curator decided on meanwhile are left alone and not counted.
+        token = ObjectId()
         result = await request.app.state.db_collection.update_many(
-            {"_id": {"$in": article_ids}},
-            {"$set": {"status": "approved", "updated_at": datetime.now()}}
+            {"_id": {"$in": article_ids}, **find_filter},
+            content_stats.tracked_update({"status": "approved", "updated_at": datetime.now()}, token)
         )
+        if result.modified_count:
+            await content_stats.count_tracked(request.app.state.db_collection, article_ids, token)
+            await response_cache.invalidate()
 
         return {"status": "success", "message": f"{result.modified_count} articles approved."}
 
@@ -76,37 +149,82 @@ async def approve_latest_content(request: Request):
         print(f"Error approving latest content: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/pipeline/run")
+async def queue_pipeline_job(request: Request, kind: str):
+    job, created = await enqueue_job(request.app.state.db_collection.database, kind)
+    return {
+        "status": job["status"],
+        "job_id": str(job["_id"]),
+        "message": "Pipeline job queued" if created else "An identical pipeline job is already in progress",
+    }
+
+@app.post("/pipeline/run", status_code=202)
 async def run_pipeline_endpoint(request: Request):
     """
-    Triggers the content discovery pipeline to fetch new content from all sources.
+    Queues a run of the RSS content discovery pipeline and returns its job id.
+    Requests made while an identical run is queued or running join that job.
     """
     try:
-        result = await pipeline.fetch_and_store_feeds(request.app.state.db_collection)
-        return result
+        return await queue_pipeline_job(request, "rss")
     except Exception as e:
-        print(f"Error running pipeline: {e}")
+        print(f"Error queueing pipeline: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/pipeline/run-complete")
+@app.post("/pipeline/run-complete", status_code=202)
 async def run_complete_pipeline_endpoint(request: Request):
     """
-    Triggers the complete content pipeline including RSS, academic, and podcast sources.
+    Queues the complete content pipeline including RSS, academic, and podcast sources.
     """
     try:
-        result = await pipeline.run_complete_pipeline(request.app.state.db_collection)
-        return result
+        return await queue_pipeline_job(request, "complete")
     except Exception as e:
-        print(f"Error running complete pipeline: {e}")
+        print(f"Error queueing complete pipeline: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/content", response_model=List[Content])
+@app.get("/pipeline/jobs/{job_id}")
+async def get_pipeline_job(request: Request, job_id: str):
+    """
+    Reports a pipeline job's status and per-source progress.
+    """
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job ID")
+    try:
+        job = await get_job(request.app.state.db_collection.database, job_id)
+    except Exception as e:
+        print(f"Error fetching job: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_to_response(job)
+
+@app.get("/pipeline/schedule")
+async def get_pipeline_schedule(request: Request):
+    """
+    Lists every source with its current polling interval, next run and last outcome.
+    """
+    try:
+        return await get_schedule(request.app.state.db_collection.database)
+    except Exception as e:
+        print(f"Error fetching schedule: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/ai/stats")
+async def get_ai_stats():
+    """
+    Reports how many LLM calls are queued, in flight, completed and retried,
+    along with enrichment cache hit and miss counters.
+    """
+    return {**get_llm_stats(), "cache": enrichment_cache.stats()}
+
+@app.get("/content", response_model=List[ContentSummary])
 async def list_content(request: Request):
     """
     A test endpoint to retrieve the 10 most recent content entries from the database.
     """
     try:
-        contents = await request.app.state.db_collection.find().sort("created_at", -1).limit(10).to_list(10)
+        find_filter, sort = queries.recent_content_query()
+        contents = await request.app.state.db_collection.find(
+            find_filter, queries.SUMMARY_PROJECTION
+        ).sort(sort).limit(10).to_list(10)
         return contents
     except Exception as e:
         print(f"Error fetching content: {e}")
@@ -120,105 +238,289 @@ class CurationAction(BaseModel):
     edited_summary: Optional[str] = None
     edited_title: Optional[str] = None
 
+class CurationFilter(BaseModel):
+    action: str = "approve"  # "approve" or "reject"
+    status: ContentStatus = ContentStatus.PENDING  # "pending", or "filtered" for items the pre-filter held back
+    source: Optional[str] = None
+    category: Optional[str] = None
+    content_type: Optional[str] = None
+    min_relevance: Optional[float] = None
+    limit: int = Field(default=500, ge=1, le=BULK_CURATION_MAX_ITEMS)
+
+class BulkCuration(BaseModel):
+    actions: List[CurationAction] = Field(default_factory=list, max_length=BULK_CURATION_MAX_ITEMS)
+    filter: Optional[CurationFilter] = None  # Applies filter.action to every matching item in filter.status
+
 class FeedbackSubmission(BaseModel):
     content_id: str
     is_helpful: bool
     comments: Optional[str] = None
 
+def paginated_query(query: queries.Query, cursor: Optional[str]) -> queries.Query:
+    try:
+        return queries.paginate(query, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def fetch_page(request: Request, headers: MutableMapping[str, str], query: queries.Query, limit: int) -> list:
+    """
+    Fetches one page of a keyset-paginated query, projected to the list view
+    fields. The cursor for the next page, if there is one, is returned in the
+    X-Next-Cursor response header.
+    """
+    find_filter, sort = query
+    contents = await request.app.state.db_collection.find(
+        find_filter, queries.SUMMARY_PROJECTION
+    ).sort(sort).limit(limit + 1).to_list(limit + 1)
+    contents, next_cursor = queries.next_page(contents, limit, sort)
+    if next_cursor:
+        headers[queries.NEXT_CURSOR_HEADER] = next_cursor
+    return contents
+
 # Human Curation Endpoints
-@app.get("/content/pending", response_model=List[Content])
-async def get_pending_content(request: Request, limit: int = Query(20, ge=1, le=100)):
+@app.get("/content/pending", response_model=List[ContentSummary])
+async def get_pending_content(
+    request: Request,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    status: ContentStatus = Query(ContentStatus.PENDING)
+):
     """
-    Retrieves content that is pending human curation review.
+    Retrieves content that is pending human curation review, newest first.
+    With status=filtered, lists the items the relevance pre-filter held back
+    instead, so curators can approve the ones it got wrong.
+    Pass the X-Next-Cursor header of a page as cursor to fetch the next one.
     """
+    if status not in queries.CURATION_STATUSES:
+        raise HTTPException(status_code=400, detail="Status must be pending or filtered")
+    page_query = paginated_query(queries.pending_content_query(status), cursor)
     try:
-        contents = await request.app.state.db_collection.find(
-            {"status": "pending"}
-        ).sort("created_at", -1).limit(limit).to_list(limit)
-        return contents
+        return await fetch_page(request, response.headers, page_query, limit)
     except Exception as e:
         print(f"Error fetching pending content: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Curators never decide items still waiting for enrichment, or near-duplicates linked to another item.
+CURATABLE_FILTER = {"status": {"$nin": [ContentStatus.PENDING_ENRICHMENT.value, ContentStatus.DUPLICATE.value]}}
+
+def approval_expressions(update_data: dict) -> dict:
+    """
+    Pre-filtered items were never enriched, so approving one sends it to
+    pending_enrichment first; enrichment then approves it (see batch.py).
+    Evaluated against the item as it was before the update.
+    """
+    if update_data["status"] != ContentStatus.APPROVED.value:
+        return {}
+    was_filtered = {"$eq": ["$status", ContentStatus.FILTERED.value]}
+    return {
+        "status": {"$cond": [was_filtered, ContentStatus.PENDING_ENRICHMENT.value, ContentStatus.APPROVED.value]},
+        APPROVE_WHEN_ENRICHED: {"$cond": [was_filtered, True, "$$REMOVE"]},
+    }
+
+async def queue_enrichment(database):
+    await enqueue_job(database, "enrich")
+
+def curation_update(action: CurationAction) -> Optional[dict]:
+    """The $set applied by a curation action, or None if the action is not recognised."""
+    update_data = {
+        "updated_at": datetime.now(),
+        "editor_notes": action.editor_notes
+    }
+
+    if action.action == "approve":
+        update_data["status"] = "approved"
+    elif action.action == "reject":
+        update_data["status"] = "rejected"
+    elif action.action == "edit":
+        update_data["status"] = "approved"
+        if action.edited_summary:
+            update_data["summary"] = [action.edited_summary]
+        if action.edited_title:
+            update_data["title"] = action.edited_title
+    else:
+        return None
+    return update_data
+
 @app.post("/content/curate")
 async def curate_content(request: Request, action: CurationAction):
     """
-    Allows human curators to approve, reject, or edit content.
+    Allows human curators to approve, reject, or edit content. Approving a
+    pre-filtered item sends it to enrichment; it is approved once enriched.
+    Items waiting for enrichment and near-duplicates cannot be curated (409).
     """
+    if not ObjectId.is_valid(action.content_id):
+        raise HTTPException(status_code=400, detail="Invalid content ID")
+
+    update_data = curation_update(action)
+    if update_data is None:
+        raise HTTPException(status_code=400, detail="Invalid action")
+
+    collection = request.app.state.db_collection
     try:
-        content_id = ObjectId(action.content_id)
-        
-        content = await request.app.state.db_collection.find_one({"_id": content_id})
-        if not content:
-            raise HTTPException(status_code=404, detail="Content not found")
-        
-        update_data = {
-            "updated_at": datetime.now(),
-            "editor_notes": action.editor_notes
-        }
-        
-        if action.action == "approve":
-            update_data["status"] = "approved"
-        elif action.action == "reject":
-            update_data["status"] = "rejected"
-        elif action.action == "edit":
-            update_data["status"] = "approved"
-            if action.edited_summary:
-                update_data["summary"] = [action.edited_summary]
-            if action.edited_title:
-                update_data["title"] = action.edited_title
-        else:
-            raise HTTPException(status_code=400, detail="Invalid action")
-        
-        result = await request.app.state.db_collection.update_one(
-            {"_id": content_id},
-            {"$set": update_data}
+        # The pre-update document tells which stats counter the item moves out of.
+        before = await collection.find_one_and_update(
+            {"_id": ObjectId(action.content_id), **CURATABLE_FILTER},
+            [content_stats.set_stage(update_data, approval_expressions(update_data))],
+            projection=content_stats.STATS_PROJECTION,
+            return_document=ReturnDocument.BEFORE,
         )
-        
-        if result.modified_count == 0:
-            raise HTTPException(status_code=500, detail="Failed to update content")
-        
-        return {"status": "success", "message": f"Content {action.action}d successfully"}
-        
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid content ID")
+        exists = before is not None or await collection.find_one({"_id": ObjectId(action.content_id)}, {"_id": 1}) is not None
+        new_status = update_data["status"]
+        if before is not None:
+            if before.get("status") == ContentStatus.FILTERED.value and new_status == ContentStatus.APPROVED.value:
+                new_status = ContentStatus.PENDING_ENRICHMENT.value
+            await content_stats.count_changed(collection.database, [before], status=new_status)
+            await response_cache.invalidate()
+            if new_status == ContentStatus.PENDING_ENRICHMENT.value:
+                await queue_enrichment(collection.database)
     except Exception as e:
         print(f"Error curating content: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    if before is None:
+        if exists:
+            raise HTTPException(status_code=409, detail="Content is waiting for enrichment or is a duplicate")
+        raise HTTPException(status_code=404, detail="Content not found")
+    if new_status == ContentStatus.PENDING_ENRICHMENT.value:
+        return {"status": "success", "message": "Content sent to enrichment; it is approved once enriched"}
+    return {"status": "success", "message": f"Content {action.action}d successfully"}
+
+@app.post("/content/curate/bulk")
+async def bulk_curate_content(request: Request, bulk: BulkCuration):
+    """
+    Applies many curation actions at once: an explicit list of approve, reject
+    and edit actions, and/or one action for every pending (or pre-filtered)
+    item matching a filter (e.g. all pending from a source with relevance >= 0.8).
+    All updates go out in a single bulk write; results are reported per item.
+    Approved pre-filtered items are sent to enrichment first, as in curate_content.
+    """
+    if not bulk.actions and bulk.filter is None:
+        raise HTTPException(status_code=400, detail="Provide actions or a filter")
+    if bulk.filter and bulk.filter.action not in ("approve", "reject"):
+        raise HTTPException(status_code=400, detail="Filter action must be approve or reject")
+    if bulk.filter and bulk.filter.status not in queries.CURATION_STATUSES:
+        raise HTTPException(status_code=400, detail="Filter status must be pending or filtered")
+
+    results = {}
+    updates = {}
+    for action in bulk.actions:
+        if not ObjectId.is_valid(action.content_id):
+            results[action.content_id] = "invalid_id"
+            continue
+        update_data = curation_update(action)
+        if update_data is None:
+            results[action.content_id] = "invalid_action"
+            continue
+        updates[ObjectId(action.content_id)] = update_data
+
+    collection = request.app.state.db_collection
+    try:
+        # Items the filter picks only change while still in that status, so a concurrent curator's decision wins.
+        guarded = set()
+        if bulk.filter:
+            find_filter, sort = queries.bulk_curation_query(
+                bulk.filter.status,
+                bulk.filter.source,
+                bulk.filter.category,
+                bulk.filter.content_type,
+                bulk.filter.min_relevance,
+            )
+            matched = await collection.find(
+                find_filter, {"_id": 1}
+            ).sort(sort).limit(bulk.filter.limit).to_list(bulk.filter.limit)
+            filter_update = curation_update(CurationAction(content_id="", action=bulk.filter.action))
+            for doc in matched:
+                if doc["_id"] not in updates:
+                    updates[doc["_id"]] = filter_update
+                    guarded.add(doc["_id"])
+
+        # Each write records what it changed under token, so results and stats
+        # come only from the updates that applied (see content_stats.tracked_update).
+        token = ObjectId()
+        operations = [
+            UpdateOne(
+                {"_id": content_id, "status": bulk.filter.status.value} if content_id in guarded else {"_id": content_id, **CURATABLE_FILTER},
+                content_stats.tracked_update(update_data, token, expressions=approval_expressions(update_data)),
+            )
+            for content_id, update_data in updates.items()
+        ]
+        matched_count = modified_count = 0
+        applied = {}
+        existing = set()
+        if operations:
+            result = await collection.bulk_write(operations, ordered=False)
+            matched_count, modified_count = result.matched_count, result.modified_count
+            if matched_count:
+                applied = await content_stats.count_tracked(collection, list(updates), token)
+                await response_cache.invalidate()
+            if any(to.get("status") == ContentStatus.PENDING_ENRICHMENT.value for to in applied.values()):
+                await queue_enrichment(collection.database)
+            # Tells explicit items that are not open for curation from ids that do not exist.
+            unapplied = [content_id for content_id in updates if content_id not in applied and content_id not in guarded]
+            if unapplied:
+                existing = {doc["_id"] async for doc in collection.find({"_id": {"$in": unapplied}}, {"_id": 1})}
+    except Exception as e:
+        print(f"Error bulk curating content: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    for content_id in updates:
+        if content_id in applied:
+            if applied[content_id].get("status") == ContentStatus.PENDING_ENRICHMENT.value:
+                results[str(content_id)] = "sent_to_enrichment"
+            else:
+                results[str(content_id)] = "updated"
+        elif content_id in guarded:
+            # Curated by someone else after the filter matched it.
+            results[str(content_id)] = f"not_{bulk.filter.status.value}"
+        elif content_id in existing:
+            results[str(content_id)] = "not_curatable"
+        else:
+            results[str(content_id)] = "not_found"
+    return {
+        "status": "success",
+        "matched_count": matched_count,
+        "modified_count": modified_count,
+        "results": [{"content_id": content_id, "result": result} for content_id, result in results.items()],
+    }
+
 @app.get("/content/status-counts")
 async def get_status_counts(request: Request):
     """
     A diagnostic endpoint to get the count of content items by status.
+    Read from the maintained content stats; responses are cached until the next write.
     """
+    async def render():
+        counts = await content_stats.status_counts(request.app.state.db_collection.database)
+        return json.dumps(counts).encode("utf-8"), {}
+
     try:
-        pipeline = [
-            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
-        ]
-        counts = await request.app.state.db_collection.aggregate(pipeline).to_list(None)
-        return {item['_id']: item['count'] for item in counts}
+        return await response_cache.respond(request, "status-counts", render)
     except Exception as e:
         print(f"Error getting status counts: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/content/approved", response_model=List[Content])
+@app.get("/content/approved", response_model=List[ContentSummary])
 async def get_approved_content(
     request: Request,
     limit: int = Query(20, ge=1, le=100),
-    category: Optional[str] = Query(None)
+    category: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None)
 ):
     """
     Retrieves approved content for public display.
+    Pass the X-Next-Cursor header of a page as cursor to fetch the next one.
+    Responses are cached and carry an ETag for conditional requests.
     """
-    try:
-        find_filter = {"status": "approved"}
-        if category:
-            find_filter["category"] = category
+    page_query = paginated_query(queries.approved_content_query(category), cursor)
 
-        contents = await request.app.state.db_collection.find(
-            find_filter
-        ).sort("published_at", -1).limit(limit).to_list(limit)
-        return contents
+    async def render():
+        headers = {}
+        contents = await fetch_page(request, headers, page_query, limit)
+        return summary_list_adapter.dump_json(summary_list_adapter.validate_python(contents), by_alias=True), headers
+
+    try:
+        return await response_cache.respond(request, "approved", render)
     except Exception as e:
         print(f"Error fetching approved content: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -227,74 +529,166 @@ async def get_approved_content(
 async def submit_feedback(request: Request, feedback: FeedbackSubmission):
     """
     Allows users to submit feedback on content helpfulness.
+    The vote is counted on the content item and stored in the feedback collection.
     """
+    if not ObjectId.is_valid(feedback.content_id):
+        raise HTTPException(status_code=400, detail="Invalid content ID")
     try:
-        content_id = ObjectId(feedback.content_id)
-        
-        content = await request.app.state.db_collection.find_one({"_id": content_id})
-        if not content:
-            raise HTTPException(status_code=404, detail="Content not found")
-        
-        feedback_data = {
-            "content_id": content_id,
-            "is_helpful": feedback.is_helpful,
-            "comments": feedback.comments,
-            "timestamp": datetime.now()
-        }
-        
-        await request.app.state.db_collection.update_one(
-            {"_id": content_id},
-            {"$push": {"feedback": feedback_data}}
+        found = await record_feedback(
+            request.app.state.db_collection.database,
+            ObjectId(feedback.content_id),
+            feedback.is_helpful,
+            feedback.comments,
         )
-        
-        return {"status": "success", "message": "Feedback submitted successfully"}
-        
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid content ID")
     except Exception as e:
         print(f"Error submitting feedback: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    if not found:
+        raise HTTPException(status_code=404, detail="Content not found")
+    return {"status": "success", "message": "Feedback submitted successfully"}
+
+@app.get("/content/feedback/stats")
+async def get_feedback_stats(request: Request, since: Optional[datetime] = Query(None)):
+    """
+    Aggregates helpful and not-helpful votes per source and per category,
+    optionally counting only feedback submitted since a given time.
+    """
+    try:
+        return await feedback_stats(request.app.state.db_collection.database, since)
+    except Exception as e:
+        print(f"Error fetching feedback stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/content/categories", response_model=List[str])
 async def get_categories(request: Request):
     """
     Retrieves a list of unique content categories.
     """
+    async def render():
+        categories = await content_stats.categories(request.app.state.db_collection.database)
+        return json.dumps(categories).encode("utf-8"), {}
+
     try:
-        categories = await request.app.state.db_collection.distinct("category")
-        return [cat for cat in categories if cat]
+        return await response_cache.respond(request, "categories", render, ttl=CATEGORIES_CACHE_TTL_SECONDS)
     except Exception as e:
         print(f"Error fetching categories: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/content/search")
+@app.get("/content/breakdown")
+async def get_content_breakdown(
+    request: Request,
+    by: str = Query("source", pattern="^(source|category|content_type)$"),
+    status: Optional[str] = Query(None)
+):
+    """
+    Item counts per source, category or content type, split by status.
+    """
+    async def render():
+        counts = await content_stats.breakdown(request.app.state.db_collection.database, by, status)
+        return json.dumps(counts).encode("utf-8"), {}
+
+    try:
+        return await response_cache.respond(request, "breakdown", render)
+    except Exception as e:
+        print(f"Error fetching content breakdown: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/content/export")
+async def export_content(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    since: Optional[datetime] = Query(None, description="Only items updated at or after this time"),
+    status: ContentStatus = ContentStatus.APPROVED,
+):
+    """
+    Streams every item with the given status (approved by default) as NDJSON
+    or CSV, optionally gzipped. X-Next-Since holds the time the export
+    started: pass it as since on the next pull to fetch only what changed.
+    """
+    started_at = datetime.now()
+    filename = f"content-{status.value}.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        export.export_chunks(request.app.state.db_collection, format, gzip, status, since),
+        media_type="application/gzip" if gzip else export.MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            export.NEXT_SINCE_HEADER: started_at.isoformat(),
+        },
+    )
+
+@app.get("/content/stream")
+async def stream_content_updates(request: Request):
+    """
+    Server-sent events with every new item and status change, for the
+    dashboards to update their lists without polling. See live.py.
+    """
+    return StreamingResponse(
+        event_stream(request.app.state.db_collection, request.is_disconnected),
+        media_type="text/event-stream",
+        # Stops proxies such as nginx from buffering the stream.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/content/search", response_model=List[ContentSummary])
 async def search_content(
     request: Request,
-    query: str = Query(..., min_length=1),
+    response: Response,
+    query: Optional[str] = Query(None, min_length=1),
     category: Optional[str] = Query(None),
     content_type: Optional[str] = Query(None),
-    limit: int = Query(20, ge=1, le=100)
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    mode: str = Query("text", pattern="^(text|semantic|hybrid)$"),
+    like: Optional[str] = Query(None)
 ):
     """
     Search content by query, category, and content type.
+    mode=text (default) is keyword search, newest first; pass the X-Next-Cursor
+    header of a page as cursor to fetch the next one. mode=semantic ranks by
+    meaning and mode=hybrid blends both rankings; like=<content id> finds items
+    similar to that one. Ranked modes return a single page.
     """
+    like_id = None
+    if like is not None:
+        if not ObjectId.is_valid(like):
+            raise HTTPException(status_code=400, detail="Invalid content ID")
+        like_id = ObjectId(like)
+    elif not query:
+        raise HTTPException(status_code=400, detail="Provide query or like")
+
+    if mode == "text" and like_id is None:
+        page_query = paginated_query(queries.search_content_query(query, category, content_type), cursor)
+        try:
+            return await fetch_page(request, response.headers, page_query, limit)
+        except Exception as e:
+            print(f"Error searching content: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+
     try:
-        search_filter = {
-            "status": "approved",
-            "$text": {"$search": query}
-        }
-        
-        if category:
-            search_filter["category"] = category
-        if content_type:
-            search_filter["content_type"] = content_type
-        
-        contents = await request.app.state.db_collection.find(
-            search_filter
-        ).sort("published_at", -1).limit(limit).to_list(limit)
-        
-        return contents
-        
+        return await ranked_search(
+            request.app.state.db_collection, query, mode, category, content_type, limit, like_id
+        )
+    except SemanticSearchUnavailable:
+        raise HTTPException(status_code=503, detail="Semantic search is unavailable")
     except Exception as e:
         print(f"Error searching content: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+# Declared last so the fixed /content/... routes above take precedence over the path parameter.
+@app.get("/content/{content_id}", response_model=Content)
+async def get_content(request: Request, content_id: str):
+    """
+    Retrieves a single content item with all its fields, including the
+    original text, transcript and metadata left out of the list endpoints.
+    """
+    if not ObjectId.is_valid(content_id):
+        raise HTTPException(status_code=400, detail="Invalid content ID")
+    try:
+        content = await request.app.state.db_collection.find_one({"_id": ObjectId(content_id)})
+    except Exception as e:
+        print(f"Error fetching content item: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if not content:
+        raise HTTPException(status_code=404, detail="Content not found")
+    return content
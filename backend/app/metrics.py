@@ -0,0 +1,205 @@
+"""
+Timing spans, counters and histograms, rendered in the Prometheus text format.
+
+Pipeline code wraps each stage in span(), which records its duration and
+item count under the stage name and the current source. The source is taken
+from current_source, which run_source sets, so spans deep inside ai.py or
+store.py are attributed without passing the label around. Spans are also
+added to the current run's summary, which the worker stores on the job.
+
+The API serves its metrics at /metrics. The worker serves its own at
+WORKER_METRICS_PORT, since pipeline spans are recorded in the worker process.
+"""
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9100"))
+
+# Source being processed, for span labels. None outside run_source.
+current_source: ContextVar[Optional[str]] = ContextVar("current_source", default=None)
+# Summary of the job being run, if any.
+current_run: ContextVar[Optional["RunSummary"]] = ContextVar("current_run", default=None)
+
+# USD per 1M (input, output) tokens. Batch API requests cost half.
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+BATCH_DISCOUNT = 0.5
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+Labels = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_text(names: Labels, values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Labels = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, *label_values: str):
+        key = tuple(str(v) for v in label_values)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        for key, value in sorted(self.values.items()):
+            yield f"{self.name}{_label_text(self.labels, key)} {value}"
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Labels = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> (per-bucket counts, sum, count)
+        self.series: Dict[Labels, list] = {}
+
+    def observe(self, value: float, *label_values: str):
+        key = tuple(str(v) for v in label_values)
+        series = self.series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        for key, (counts, total, count) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _label_text(self.labels, key, 'le="%s"' % bound)
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _label_text(self.labels, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {count}"
+            yield f"{self.name}_sum{_label_text(self.labels, key)} {total}"
+            yield f"{self.name}_count{_label_text(self.labels, key)} {count}"
+
+STAGE_SECONDS = Histogram("pipeline_stage_seconds", "Duration of pipeline stages.", ("stage", "source"))
+STAGE_ITEMS = Counter("pipeline_stage_items_total", "Items handled by pipeline stages.", ("stage", "source"))
+STAGE_ERRORS = Counter("pipeline_stage_errors_total", "Pipeline stages that raised.", ("stage", "source"))
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens used by OpenAI calls.", ("model", "kind"))
+LLM_COST = Counter("llm_cost_dollars_total", "Estimated OpenAI spend in USD.", ("model",))
+HTTP_SECONDS = Histogram("http_request_duration_seconds", "API request latency.", ("method", "route", "status"))
+
+METRICS = [STAGE_SECONDS, STAGE_ITEMS, STAGE_ERRORS, LLM_TOKENS, LLM_COST, HTTP_SECONDS]
+
+class RunSummary:
+    """Per-job totals of every span, token and dollar, stored on the job document."""
+
+    def __init__(self):
+        self.stages: Dict[str, dict] = {}
+        self.tokens: Dict[str, int] = {}
+        self.cost = 0.0
+
+    def add_span(self, stage: str, seconds: float, items: int, failed: bool):
+        entry = self.stages.setdefault(stage, {"count": 0, "seconds": 0.0, "max_seconds": 0.0, "items": 0, "errors": 0})
+        entry["count"] += 1
+        entry["seconds"] += seconds
+        entry["max_seconds"] = max(entry["max_seconds"], seconds)
+        entry["items"] += items
+        entry["errors"] += int(failed)
+
+    def to_document(self) -> dict:
+        return {
+            "stages": {
+                stage: dict(entry, seconds=round(entry["seconds"], 3), max_seconds=round(entry["max_seconds"], 3))
+                for stage, entry in self.stages.items()
+            },
+            "tokens": self.tokens,
+            "cost_dollars": round(self.cost, 6),
+        }
+
+@contextmanager
+def span(stage: str, items: int = 0, source: Optional[str] = None):
+    """
+    Times a block as one pipeline stage. The yielded dict's "items" can be
+    updated inside the block once the count is known.
+    """
+    record = {"items": items}
+    source = source or current_source.get() or ""
+    failed = False
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        STAGE_SECONDS.observe(seconds, stage, source)
+        if record["items"]:
+            STAGE_ITEMS.inc(record["items"], stage, source)
+        if failed:
+            STAGE_ERRORS.inc(1, stage, source)
+        run = current_run.get()
+        if run is not None:
+            run.add_span(stage, seconds, record["items"], failed)
+
+def _prices(model: str) -> Tuple[float, float]:
+    """Prices for a model, matching dated snapshots such as gpt-4o-mini-2024-07-18 by prefix."""
+    if model in MODEL_PRICES:
+        return MODEL_PRICES[model]
+    matches = [name for name in MODEL_PRICES if model.startswith(name + "-")]
+    return MODEL_PRICES[max(matches, key=len)] if matches else (0.0, 0.0)
+
+def record_llm_usage(model: str, prompt_tokens: int, completion_tokens: int = 0, batch: bool = False):
+    """Counts tokens and their estimated cost. Models missing from MODEL_PRICES count tokens only."""
+    LLM_TOKENS.inc(prompt_tokens, model, "prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, model, "completion")
+    input_price, output_price = _prices(model)
+    cost = (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+    if batch:
+        cost *= BATCH_DISCOUNT
+    LLM_COST.inc(cost, model)
+
+    run = current_run.get()
+    if run is not None:
+        run.tokens[model] = run.tokens.get(model, 0) + prompt_tokens + completion_tokens
+        run.cost += cost
+
+def render(gauges: Dict[str, float] = None) -> str:
+    """All metrics in the Prometheus text format, plus point-in-time gauges."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    for name, value in sorted((gauges or {}).items()):
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+async def serve_metrics(port: int = WORKER_METRICS_PORT, gauges=None):
+    """Serves /metrics on its own port, for processes without an API (the worker). Returns the runner."""
+    from aiohttp import web
+
+    async def handle(request):
+        return web.Response(text=render(gauges() if gauges else None), content_type="text/plain")
+
+    app = web.Application()
+    app.add_routes([web.get("/metrics", handle)])
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", port).start()
+    return runner
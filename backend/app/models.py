@@ -1,6 +1,6 @@
 import os
 from dotenv import load_dotenv
-from pydantic import BaseModel, Field, HttpUrl, ConfigDict
+from pydantic import BaseModel, Field, HttpUrl, ConfigDict, field_validator
 from typing import List, Optional, Any
 from datetime import datetime
 from enum import Enum
@@ -38,9 +38,22 @@ class ContentType(str, Enum):
     PAPER = "Paper"
 
 class ContentStatus(str, Enum):
+    PENDING_ENRICHMENT = "pending_enrichment"  # Waiting for deferred enrichment (Batch API or an enrich job)
     PENDING = "pending"
     APPROVED = "approved"
     REJECTED = "rejected"
+    DUPLICATE = "duplicate"  # Near-duplicate of another item, see duplicate_of
+    FILTERED = "filtered"  # Scored irrelevant by the local pre-filter; never enriched
+
+# Set on pre-filtered items a curator approved: enrichment moves them to
+# approved rather than back to pending (see batch.enrichment_update).
+APPROVE_WHEN_ENRICHED = "approve_when_enriched"
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
 
 class Content(BaseModel):
     # Use our custom PyObjectId type for the id field.
@@ -60,7 +73,10 @@ class Content(BaseModel):
     status: ContentStatus = Field(default=ContentStatus.PENDING)
     editor_notes: Optional[str] = None
     metadata: Optional[dict] = None
-    feedback: Optional[List[dict]] = None
+    feedback: Optional[List[dict]] = None  # Legacy; votes now live in the feedback collection
+    duplicate_of: Optional[PyObjectId] = None  # Canonical item this one near-duplicates
+    prefilter_score: Optional[float] = None  # Pre-filter's estimate that a curator approves it
+    embedding: Optional[bytes] = Field(default=None, exclude=True)  # float32 vector, see vector_index.py
     published_at: datetime
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: Optional[datetime] = None
@@ -72,3 +88,59 @@ class Content(BaseModel):
         arbitrary_types_allowed=True, # Allow custom types like PyObjectId
         json_encoders={ObjectId: str}, # Tell Pydantic how to serialize ObjectId to JSON
     )
+
+
+class ContentSummary(BaseModel):
+    """
+    List view of a content item: what the dashboards render, without the
+    article text, transcript or metadata. Fetch a single item for those.
+    """
+    id: Optional[PyObjectId] = Field(alias="_id", default=None)
+    url: HttpUrl
+    title: str
+    summary: List[str]
+    source: str
+    content_type: ContentType
+    category: Category
+    relevance_score: float = Field(default=0.0)
+    helpful_votes: int = Field(default=0)
+    not_helpful_votes: int = Field(default=0)
+    status: ContentStatus = Field(default=ContentStatus.PENDING)
+    published_at: datetime
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: Optional[datetime] = None
+    curated: bool = Field(default=False)
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+        json_encoders={ObjectId: str},
+    )
+
+
+class Enrichment(BaseModel):
+    """Structured result of the single enrichment call made for each new item."""
+    summary: str = ""
+    category: Category = Category.RISK
+    relevance_score: float = Field(default=0.5)
+
+    @field_validator("summary", mode="before")
+    @classmethod
+    def strip_summary(cls, v: Any) -> str:
+        return str(v or "").strip()
+
+    @field_validator("category", mode="before")
+    @classmethod
+    def normalize_category(cls, v: Any) -> Category:
+        # The model occasionally answers "opportunity" or "Opportunity focused".
+        if isinstance(v, str) and "opportunit" in v.lower():
+            return Category.OPPORTUNITY
+        return Category.RISK
+
+    @field_validator("relevance_score", mode="before")
+    @classmethod
+    def clamp_relevance(cls, v: Any) -> float:
+        try:
+            return max(0.0, min(1.0, float(v)))  # Ensure score is between 0 and 1
+        except (TypeError, ValueError):
+            return 0.5  # Default to medium relevance
@@ -1,16 +1,34 @@
-import feedparser
 import asyncio
-import aiohttp
 import json
+from typing import List, Tuple
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorCollection
-from .models import Content, ContentType, Category
-from .ai import get_summary, get_category, transcribe_audio
+from .models import Content, ContentType, ContentStatus, Category
+from .ai import enrich_content, transcribe_audio
+from .feeds import fetch_feed, save_feed_state, get_feed_state_collection
+from .store import canonical_url, find_existing_urls, insert_content_documents
+from .dedup import find_near_duplicates, save_fingerprints
+from .prefilter import get_prefilter, content_text
+from .vector_index import embed_items
+from .jobs import source_lease, report_progress
+from .response_cache import response_cache
+from .metrics import span, current_source
+from .academic import (
+    search_papers, get_sync_state, save_sync_state, AcademicFetchError,
+    ACADEMIC_PAGE_SIZE, ACADEMIC_MAX_RESULTS, ACADEMIC_TERM_CONCURRENCY,
+)
 import re
 from datetime import datetime
 import os
-from urllib.parse import quote
 import xml.etree.ElementTree as ET
 
+# "inline" enriches each item as it is ingested; "batch" stores items as
+# pending_enrichment for app.batch to enrich through the OpenAI Batch API.
+ENRICHMENT_MODE = os.getenv("ENRICHMENT_MODE", "inline")
+
+# Only the start of a transcript is sent for enrichment to bound prompt size.
+TRANSCRIPT_ENRICHMENT_CHARS = 2000
+
 # A sample list of RSS feeds to start with
 RSS_FEEDS = [
     "https://www.wired.com/feed/category/security/rss",
@@ -38,176 +56,435 @@ PODCAST_FEEDS = [
     "https://feeds.feedburner.com/futureofwork"  # Future of Work podcast
 ]
 
-async def fetch_and_store_feeds(collection: AsyncIOMotorCollection):
+async def select_new_items(collection: AsyncIOMotorCollection, candidates):
+    """
+    Filters (url, item) pairs down to those not yet stored, keyed by canonical URL.
+    Uses one $in query for the whole batch instead of one lookup per item. The
+    raw links are looked up too, so content stored before canonicalization
+    (see "python -m app.store canonicalize") is still recognized.
+    """
+    by_url = {}
+    raw_urls = {}
+    for url, item in candidates:
+        try:
+            key = canonical_url(url)
+        except ValueError:
+            print(f"Skipping item with invalid URL: {url}")
+            continue
+        by_url.setdefault(key, item)
+        raw_urls.setdefault(key, set()).add(url)
+
+    with span("url_lookup", items=len(by_url)):
+        existing = await find_existing_urls(
+            collection, set(by_url).union(*raw_urls.values()),
+        )
+    return [
+        (url, item) for url, item in by_url.items()
+        if url not in existing and existing.isdisjoint(raw_urls[url])
+    ]
+
+# Source labels for search terms, so they share leases, progress and schedules with feeds.
+ACADEMIC_SOURCE_PREFIX = "academic:"
+
+def academic_source(search_term: str) -> str:
+    return f"{ACADEMIC_SOURCE_PREFIX}{search_term}"
+
+def all_sources() -> dict:
+    """Maps every configured source label to its kind: rss, podcast or academic."""
+    sources = {url: "rss" for url in RSS_FEEDS}
+    sources.update({url: "podcast" for url in PODCAST_FEEDS})
+    sources.update({academic_source(term): "academic" for term in ACADEMIC_SEARCH_TERMS})
+    return sources
+
+async def enrichment_fields(text: str, enrichment_mode: str) -> dict:
+    """Returns the AI-derived Content fields for text, or placeholders when enrichment is deferred."""
+    if enrichment_mode == "batch":
+        return {
+            "summary": [],
+            "category": Category.RISK,  # Placeholder until the batch result arrives
+            "status": ContentStatus.PENDING_ENRICHMENT,
+        }
+
+    # Get AI-powered summary, category and relevance in one call
+    enrichment = await enrich_content(text)
+    return {
+        "summary": [enrichment.summary],
+        "category": enrichment.category,
+        "relevance_score": enrichment.relevance_score,
+    }
+
+async def run_source(collection: AsyncIOMotorCollection, source: str, process, on_result=None) -> int:
+    """
+    Runs process() for one source under its lease, reporting progress on the
+    current job. Errors are contained to the source. Returns the number inserted.
+    on_result, if given, is awaited with (source, inserted, error) once the source has run.
+    """
+    database = collection.database
+    async with source_lease(database, source) as acquired:
+        if not acquired:
+            print(f"Skipping {source}: another run is processing it")
+            await report_progress(database, source, status="skipped")
+            return 0
+
+        await report_progress(database, source, status="running")
+        # Labels every span recorded while processing the source.
+        source_token = current_source.set(source)
+        try:
+            inserted = await process()
+        except Exception as e:
+            print(f"Error processing {source}: {e}")
+            await report_progress(database, source, status="failed", error=str(e))
+            if on_result:
+                await on_result(source, 0, str(e))
+            return 0
+        finally:
+            current_source.reset(source_token)
+
+        await report_progress(database, source, status="done", inserted=inserted)
+        if inserted:
+            await response_cache.invalidate()
+        if on_result:
+            await on_result(source, inserted, None)
+        return inserted
+
+async def fetch_and_store_feeds(collection: AsyncIOMotorCollection, enrichment_mode: str = ENRICHMENT_MODE):
     """Fetches content from RSS feeds and stores new entries in the database."""
-    for url in RSS_FEEDS:
-        print(f"Fetching feed: {url}")
-        feed = feedparser.parse(url)
-        
-        for entry in feed.entries:
-            # Check if the article already exists in the DB
-            existing_content = await collection.find_one({"url": entry.link})
-            if existing_content:
-                continue # Skip if it already exists
-
-            # Clean up the summary text from HTML tags
-            summary_text = re.sub('<[^<]+?>', '', entry.summary)
-
-            # Get AI-powered summary and category
-            ai_summary = await get_summary(summary_text)
-            ai_category = await get_category(summary_text)
-
-            # Create a Content object
-            content_item = Content(
-                url=entry.link,
-                title=entry.title,
-                summary=[ai_summary], # Use the AI-generated summary
-                source=feed.feed.title,
-                content_type=ContentType.ARTICLE, # Default to article
-                category=ai_category, # Use the AI-determined category
-                published_at=datetime(*entry.published_parsed[:6]) if hasattr(entry, 'published_parsed') else datetime.now(),
-            )
+    # All feeds are fetched concurrently; per-host limits are enforced by the shared session.
+    results = await asyncio.gather(*(
+        run_source(collection, url, lambda url=url: process_rss_feed(collection, url, enrichment_mode))
+        for url in RSS_FEEDS
+    ))
 
-            # Convert the Pydantic model to a dictionary for DB insertion, excluding None values
-            content_dict = content_item.dict(by_alias=True, exclude_none=True)
+    return {
+        "status": "success",
+        "message": "Feeds processed successfully",
+        "inserted": sum(results),
+    }
 
-            # Manually convert types that are not BSON-encodable
-            content_dict['url'] = str(content_item.url)
+# Fields a near-duplicate copies from its canonical item instead of being enriched.
+DUPLICATE_COPIED_FIELDS = ("summary", "category", "relevance_score")
 
-            # Insert the content into the database
-            result = await collection.insert_one(content_dict)
-            print(f"Inserted content with ID: {result.inserted_id}")
+async def store_new_items(
+    collection: AsyncIOMotorCollection,
+    items: List[Tuple[str, dict]],
+    enrichment_mode: str = ENRICHMENT_MODE,
+) -> int:
+    """
+    Enriches and stores new items, given as (text to enrich, Content fields).
+    Items that near-duplicate a recent stored item, or an earlier item of the
+    batch, skip enrichment: they are stored with status duplicate, linked to
+    the canonical item and carrying its summary and category (filled in by
+    batch.py when the canonical is still waiting for its batch result). Items the
+    local pre-filter scores below its threshold are stored as filtered,
+    also without enrichment. Returns the number inserted.
+    """
+    if not items:
+        return 0
+    database = collection.database
+    content_ids = [ObjectId() for _ in items]
+    with span("near_duplicate_lookup", items=len(items)):
+        duplicate_of, fingerprints = await find_near_duplicates(
+            database, [(content_id, text) for content_id, (text, _) in zip(content_ids, items)]
+        )
 
-    return {"status": "success", "message": "Feeds processed successfully"}
+    batch_ids = set(content_ids)
+    stored_canonical = {}
+    stored_ids = list(set(duplicate_of.values()) - batch_ids)
+    if stored_ids:
+        projection = {field: 1 for field in DUPLICATE_COPIED_FIELDS}
+        async for doc in collection.find({"_id": {"$in": stored_ids}}, projection):
+            stored_canonical[doc["_id"]] = doc
+    # A fingerprint can outlive its item (e.g. deleted by hand); such items are enriched as usual.
+    duplicate_of = {
+        content_id: canonical_id
+        for content_id, canonical_id in duplicate_of.items()
+        if canonical_id in batch_ids or canonical_id in stored_canonical
+    }
+
+    to_enrich = [(content_id, text, fields) for content_id, (text, fields) in zip(content_ids, items) if content_id not in duplicate_of]
+
+    enriched = {}
+    scores = {}
+    prefilter = await get_prefilter(database)
+    if prefilter is not None and to_enrich:
+        scored = prefilter.score_many([
+            content_text({"title": fields.get("title"), "original_text": text}) for _, text, fields in to_enrich
+        ])
+        scores = {content_id: float(score) for (content_id, _, _), score in zip(to_enrich, scored)}
+        for content_id, _, _ in to_enrich:
+            if scores[content_id] < prefilter.threshold:
+                enriched[content_id] = {"summary": [], "category": Category.RISK, "status": ContentStatus.FILTERED}
+        if enriched:
+            print(f"Pre-filter skipped enrichment of {len(enriched)} of {len(to_enrich)} items")
+        to_enrich = [item for item in to_enrich if item[0] not in enriched]
+
+    # Enrichment runs concurrently; the LLM layer bounds concurrency and rate.
+    # All embeddings of the batch come from one extra call alongside it.
+    enrichments, vectors = await asyncio.gather(
+        asyncio.gather(*(enrichment_fields(text, enrichment_mode) for _, text, _ in to_enrich)),
+        embed_items([(fields.get("title", ""), text) for _, text, fields in to_enrich]),
+    )
+    for (content_id, _, _), fields, vector in zip(to_enrich, enrichments, vectors):
+        enriched[content_id] = dict(fields, embedding=vector) if vector is not None else fields
+
+    content_items = []
+    for content_id, (_, fields) in zip(content_ids, items):
+        if content_id in duplicate_of:
+            canonical_id = duplicate_of[content_id]
+            canonical = enriched.get(canonical_id) or stored_canonical[canonical_id]
+            extra = {field: canonical[field] for field in DUPLICATE_COPIED_FIELDS if field in canonical}
+            extra.update(status=ContentStatus.DUPLICATE, duplicate_of=canonical_id)
+        else:
+            extra = dict(enriched[content_id], prefilter_score=scores.get(content_id))
+        content_items.append(Content(id=content_id, **fields, **extra))
+
+    inserted = await insert_content_documents(collection, content_items)
+    if duplicate_of:
+        print(f"Stored {len(duplicate_of)} near-duplicates without enrichment")
+
+    inserted_ids = {doc["_id"] for doc in inserted}
+    await save_fingerprints(database, {
+        content_id: value for content_id, value in fingerprints.items() if content_id in inserted_ids
+    })
+    return len(inserted)
+
+async def process_rss_feed(collection: AsyncIOMotorCollection, url: str, enrichment_mode: str = ENRICHMENT_MODE) -> int:
+    """Fetches a single RSS feed and stores its new entries. Returns the number inserted."""
+    print(f"Fetching feed: {url}")
+    state_collection = get_feed_state_collection(collection)
+    feed, feed_state = await fetch_feed(url, state_collection)
+    if feed is None:
+        return 0
+
+    new_entries = await select_new_items(
+        collection,
+        [(entry.link, entry) for entry in feed.entries if entry.get('link')],
+    )
+
+    def entry_fields(entry_url, entry) -> Tuple[str, dict]:
+        # Clean up the summary text from HTML tags
+        summary_text = re.sub('<[^<]+?>', '', entry.get('summary', ''))
+
+        return summary_text, dict(
+            url=entry_url,
+            title=entry.title,
+            original_text=summary_text,
+            source=feed.feed.get('title', url),
+            content_type=ContentType.ARTICLE, # Default to article
+            published_at=datetime(*entry.published_parsed[:6]) if entry.get('published_parsed') else datetime.now(),
+        )
 
-async def fetch_academic_content(collection: AsyncIOMotorCollection):
-    """Fetches academic content using Google Scholar-like search."""
+    inserted = await store_new_items(
+        collection,
+        [entry_fields(entry_url, entry) for entry_url, entry in new_entries],
+        enrichment_mode,
+    )
+    print(f"Inserted {inserted} new items from {url}")
+
+    await save_feed_state(state_collection, url, feed_state)
+    return inserted
+
+def paper_fields(paper_url: str, paper: dict) -> Tuple[str, dict]:
+    """The text to enrich and the Content fields of a Semantic Scholar paper."""
+    # Process academic paper
+    abstract = paper['abstract']
+
+    authors = [author.get('name', '') for author in paper.get('authors') or []]
+
+    return abstract, dict(
+        url=paper_url,
+        title=paper.get('title', 'Untitled Academic Paper'),
+        original_text=abstract,
+        source=f"Academic - {paper.get('venue') or 'Unknown Venue'}",
+        content_type=ContentType.ARTICLE,
+        published_at=datetime(paper['year'], 1, 1) if paper.get('year') else datetime.now(),
+        metadata={"authors": authors, "venue": paper.get('venue', '')}
+    )
+
+async def fetch_academic_content(collection: AsyncIOMotorCollection, enrichment_mode: str = ENRICHMENT_MODE):
+    """Harvests Semantic Scholar for every search term, several terms at a time."""
     print("Fetching academic content...")
-    
-    for search_term in ACADEMIC_SEARCH_TERMS:
+    # The API quota is enforced by the shared rate limiter in academic.py.
+    semaphore = asyncio.Semaphore(ACADEMIC_TERM_CONCURRENCY)
+
+    async def run_term(search_term: str) -> int:
+        async with semaphore:
+            return await run_source(
+                collection,
+                academic_source(search_term),
+                lambda: process_academic_term(collection, search_term, enrichment_mode),
+            )
+
+    results = await asyncio.gather(*(run_term(search_term) for search_term in ACADEMIC_SEARCH_TERMS))
+    return {"status": "success", "message": "Academic content processed", "inserted": sum(results)}
+
+async def process_academic_term(collection: AsyncIOMotorCollection, search_term: str, enrichment_mode: str = ENRICHMENT_MODE) -> int:
+    """
+    Pages through the Semantic Scholar results for one term, storing new papers
+    page by page. Once a term has been harvested, later runs only request
+    papers from its highest year seen onwards. Returns the number inserted;
+    raises AcademicFetchError if a page cannot be fetched.
+    """
+    database = collection.database
+    state = await get_sync_state(database, search_term)
+    min_year = state.get("max_year")
+    max_year = min_year
+    inserted = 0
+    fetched = 0
+    offset = 0
+
+    while offset < ACADEMIC_MAX_RESULTS:
         try:
-            # Use Semantic Scholar API as an alternative to Google Scholar
-            encoded_term = quote(search_term)
-            url = f"https://api.semanticscholar.org/graph/v1/paper/search?query={encoded_term}&limit=5&fields=title,abstract,url,authors,year,venue"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        for paper in data.get('data', []):
-                            # Check if paper already exists
-                            existing_content = await collection.find_one({"url": paper.get('url', '')})
-                            if existing_content:
-                                continue
-                            
-                            # Process academic paper
-                            abstract = paper.get('abstract', '')
-                            if abstract:
-                                ai_summary = await get_summary(abstract)
-                                ai_category = await get_category(abstract)
-                                
-                                authors = [author.get('name', '') for author in paper.get('authors', [])]
-                                
-                                content_item = Content(
-                                    url=paper.get('url', f"https://semanticscholar.org/paper/{paper.get('paperId', '')}"),
-                                    title=paper.get('title', 'Untitled Academic Paper'),
-                                    summary=[ai_summary],
-                                    source=f"Academic - {paper.get('venue', 'Unknown Venue')}",
-                                    content_type=ContentType.ARTICLE,
-                                    category=ai_category,
-                                    published_at=datetime(paper.get('year', datetime.now().year), 1, 1) if paper.get('year') else datetime.now(),
-                                    metadata={"authors": authors, "venue": paper.get('venue', '')}
-                                )
-                                
-                                content_dict = content_item.dict(by_alias=True, exclude_none=True)
-                                content_dict['url'] = str(content_item.url)
-                                
-                                result = await collection.insert_one(content_dict)
-                                print(f"Inserted academic content: {paper.get('title', 'Untitled')}")
-                    
-                    # Rate limiting for API
-                    await asyncio.sleep(1)
-                    
-        except Exception as e:
-            print(f"Error fetching academic content for '{search_term}': {e}")
-            continue
-    
-    return {"status": "success", "message": "Academic content processed"}
+            data = await search_papers(search_term, offset, min(ACADEMIC_PAGE_SIZE, ACADEMIC_MAX_RESULTS - offset), min_year)
+        except AcademicFetchError:
+            # Pages already stored are kept. Sync state is left as it was, so the
+            # next run retries the whole window; run_source records the failure.
+            print(f"Inserted {inserted} academic papers for '{search_term}' before the search failed")
+            if inserted:
+                await response_cache.invalidate()
+            raise
+
+        papers = data.get('data') or []
+        fetched += len(papers)
+        max_year = max([max_year or 0] + [paper['year'] for paper in papers if paper.get('year')]) or None
+
+        new_papers = await select_new_items(
+            collection,
+            [
+                (paper.get('url') or f"https://www.semanticscholar.org/paper/{paper.get('paperId', '')}", paper)
+                for paper in papers
+                # Papers without an abstract have nothing to summarize
+                if paper.get('abstract')
+            ],
+        )
+        inserted += await store_new_items(
+            collection,
+            [paper_fields(paper_url, paper) for paper_url, paper in new_papers],
+            enrichment_mode,
+        )
 
-async def fetch_podcast_content(collection: AsyncIOMotorCollection):
+        if not papers or data.get('next') is None:
+            break
+        offset = data['next']
+
+    await save_sync_state(database, search_term, max_year, fetched)
+    print(f"Inserted {inserted} academic papers for '{search_term}' ({fetched} results)")
+    return inserted
+
+async def fetch_podcast_content(collection: AsyncIOMotorCollection, enrichment_mode: str = ENRICHMENT_MODE):
     """Fetches and processes podcast content with speech-to-text."""
     print("Fetching podcast content...")
-    
-    for podcast_url in PODCAST_FEEDS:
-        try:
-            feed = feedparser.parse(podcast_url)
-            
-            for entry in feed.entries[:3]:  # Limit to 3 most recent episodes
-                # Check if episode already exists
-                existing_content = await collection.find_one({"url": entry.link})
-                if existing_content:
-                    continue
-                
-                # Look for audio enclosure
-                audio_url = None
-                for enclosure in getattr(entry, 'enclosures', []):
-                    if enclosure.type and 'audio' in enclosure.type:
-                        audio_url = enclosure.href
-                        break
-                
-                if audio_url:
-                    # Get transcript using speech-to-text
-                    transcript = await transcribe_audio(audio_url)
-                    
-                    if transcript:
-                        ai_summary = await get_summary(transcript[:2000])  # Limit text for API
-                        ai_category = await get_category(transcript[:2000])
-                        
-                        content_item = Content(
-                            url=entry.link,
-                            title=entry.title,
-                            summary=[ai_summary],
-                            source=f"Podcast - {feed.feed.title}",
-                            content_type=ContentType.PODCAST,
-                            category=ai_category,
-                            published_at=datetime(*entry.published_parsed[:6]) if hasattr(entry, 'published_parsed') else datetime.now(),
-                            metadata={"audio_url": audio_url, "transcript_preview": transcript[:500]}
-                        )
-                        
-                        content_dict = content_item.dict(by_alias=True, exclude_none=True)
-                        content_dict['url'] = str(content_item.url)
-                        
-                        result = await collection.insert_one(content_dict)
-                        print(f"Inserted podcast content: {entry.title}")
-                
-                # Rate limiting
-                await asyncio.sleep(2)
-                
-        except Exception as e:
-            print(f"Error processing podcast feed {podcast_url}: {e}")
-            continue
-    
-    return {"status": "success", "message": "Podcast content processed"}
 
-async def run_complete_pipeline(collection: AsyncIOMotorCollection):
+    results = await asyncio.gather(*(
+        run_source(collection, url, lambda url=url: process_podcast_feed(collection, url, enrichment_mode))
+        for url in PODCAST_FEEDS
+    ))
+
+    return {
+        "status": "success",
+        "message": "Podcast content processed",
+        "inserted": sum(results),
+    }
+
+async def process_podcast_feed(collection: AsyncIOMotorCollection, podcast_url: str, enrichment_mode: str = ENRICHMENT_MODE) -> int:
+    """Fetches a single podcast feed and transcribes its new episodes. Returns the number inserted."""
+    state_collection = get_feed_state_collection(collection)
+    feed, feed_state = await fetch_feed(podcast_url, state_collection)
+    if feed is None:
+        return 0
+
+    new_episodes = await select_new_items(
+        collection,
+        # Limit to 3 most recent episodes
+        [(entry.link, entry) for entry in feed.entries[:3] if entry.get('link')],
+    )
+
+    content_items = []
+    for episode_url, entry in new_episodes:
+        # Look for audio enclosure
+        audio_url = None
+        for enclosure in getattr(entry, 'enclosures', []):
+            if enclosure.get('type') and 'audio' in enclosure.type:
+                audio_url = enclosure.href
+                break
+
+        if audio_url:
+            # Get transcript using speech-to-text
+            transcript = await transcribe_audio(audio_url)
+
+            if transcript:
+                content_items.append((transcript[:TRANSCRIPT_ENRICHMENT_CHARS], dict(
+                    url=episode_url,
+                    title=entry.title,
+                    transcript=transcript,
+                    source=f"Podcast - {feed.feed.get('title', podcast_url)}",
+                    content_type=ContentType.PODCAST,
+                    published_at=datetime(*entry.published_parsed[:6]) if entry.get('published_parsed') else datetime.now(),
+                    metadata={"audio_url": audio_url, "transcript_preview": transcript[:500]}
+                )))
+
+            # Rate limiting
+            await asyncio.sleep(2)
+
+    inserted = await store_new_items(collection, content_items, enrichment_mode)
+    print(f"Inserted {inserted} podcast episodes from {podcast_url}")
+
+    await save_feed_state(state_collection, podcast_url, feed_state)
+    return inserted
+
+async def run_complete_pipeline(collection: AsyncIOMotorCollection, enrichment_mode: str = ENRICHMENT_MODE):
     """Runs the complete content pipeline including RSS, academic, and podcast sources."""
     print("Starting complete content pipeline...")
     
-    results = []
-    
-    # Run all pipeline components
-    rss_result = await fetch_and_store_feeds(collection)
-    results.append(rss_result)
-    
-    academic_result = await fetch_academic_content(collection)
-    results.append(academic_result)
-    
-    podcast_result = await fetch_podcast_content(collection)
-    results.append(podcast_result)
-    
+    # Run all pipeline components concurrently; each one handles its own errors.
+    results = await asyncio.gather(
+        fetch_and_store_feeds(collection, enrichment_mode),
+        fetch_academic_content(collection, enrichment_mode),
+        fetch_podcast_content(collection, enrichment_mode),
+    )
+
     return {
         "status": "success",
         "message": "Complete pipeline executed",
-        "results": results
+        "results": list(results)
+    }
+
+async def run_sources(collection: AsyncIOMotorCollection, sources, on_result=None, enrichment_mode: str = ENRICHMENT_MODE):
+    """Runs only the given sources, e.g. those the scheduler found due."""
+    kinds = all_sources()
+
+    def processor(source: str):
+        kind = kinds.get(source)
+        if kind == "rss":
+            return lambda: process_rss_feed(collection, source, enrichment_mode)
+        if kind == "podcast":
+            return lambda: process_podcast_feed(collection, source, enrichment_mode)
+        if kind == "academic":
+            search_term = source[len(ACADEMIC_SOURCE_PREFIX):]
+            return lambda: process_academic_term(collection, search_term, enrichment_mode)
+        return None
+
+    runnable = []
+    for source in sources:
+        process = processor(source)
+        if process is None:
+            print(f"Skipping unknown source: {source}")
+            continue
+        runnable.append((source, process))
+
+    # Search terms share the academic rate limiter; this bounds how many run at once.
+    academic_semaphore = asyncio.Semaphore(ACADEMIC_TERM_CONCURRENCY)
+
+    async def run(source: str, process) -> int:
+        if kinds[source] != "academic":
+            return await run_source(collection, source, process, on_result)
+        async with academic_semaphore:
+            return await run_source(collection, source, process, on_result)
+
+    results = await asyncio.gather(*(run(source, process) for source, process in runnable))
+
+    return {
+        "status": "success",
+        "message": f"{len(results)} sources processed",
+        "inserted": sum(results),
     }
@@ -0,0 +1,208 @@
+"""
+Local relevance pre-filter that runs before any LLM call.
+
+A logistic regression over hashed word unigrams and bigrams, trained with
+NumPy on curator decisions (approved vs rejected). Items scoring below the
+threshold are stored with status filtered and never enriched; curators can
+still find and approve them, which feeds back into the next training run.
+
+The model is stored in Mongo and picked up by every pipeline process:
+
+    python -m app.prefilter train
+"""
+import os
+import re
+import sys
+import zlib
+import time
+import asyncio
+from datetime import datetime
+from typing import List, Optional, Tuple
+import numpy as np
+from bson import Binary
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from .ai_cache import normalize_text
+from .models import ContentStatus
+
+PREFILTER_COLLECTION = "prefilter_models"
+CONTENT_COLLECTION = "content"
+MODEL_ID = "relevance"
+
+PREFILTER_ENABLED = os.getenv("PREFILTER_ENABLED", "true").lower() == "true"
+# Overrides the calibrated threshold when set.
+PREFILTER_THRESHOLD = os.getenv("PREFILTER_THRESHOLD")
+# The calibrated threshold keeps this share of held-out approved items.
+PREFILTER_TARGET_RECALL = float(os.getenv("PREFILTER_TARGET_RECALL", "0.95"))
+PREFILTER_MIN_SAMPLES = int(os.getenv("PREFILTER_MIN_SAMPLES", "50"))
+PREFILTER_RELOAD_SECONDS = float(os.getenv("PREFILTER_RELOAD_SECONDS", "600"))
+
+FEATURE_BITS = 18
+N_FEATURES = 1 << FEATURE_BITS
+# Every document gets this feature, so none is ever empty.
+_CONSTANT_FEATURE = 0
+
+TRAIN_EPOCHS = 300
+LEARNING_RATE = 2.0
+L2_PENALTY = 1e-5
+HOLDOUT_FRACTION = 0.2
+# Enough of a transcript to judge the topic.
+TEXT_CHARS = 4000
+
+def featurize(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Hashed unigram and bigram features as (indices, values), log-scaled and L2-normalized."""
+    words = re.findall(r"\w+", normalize_text(text).lower())
+    tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    hashed = [zlib.crc32(token.encode("utf-8")) & (N_FEATURES - 1) for token in tokens]
+    indices, counts = np.unique(np.array(hashed + [_CONSTANT_FEATURE], dtype=np.int64), return_counts=True)
+    values = np.log1p(counts).astype(np.float32)
+    return indices, values / np.linalg.norm(values)
+
+def _stack(texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Concatenates documents into flat (indices, values) with each entry's document number."""
+    features = [featurize(text) for text in texts]
+    indices = np.concatenate([f[0] for f in features])
+    values = np.concatenate([f[1] for f in features])
+    rows = np.repeat(np.arange(len(features)), [len(f[0]) for f in features])
+    return indices, values, rows
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+class RelevanceModel:
+    def __init__(self, weights: np.ndarray, threshold: float, trained_at: datetime = None, stats: dict = None):
+        self.weights = weights
+        self.threshold = threshold
+        self.trained_at = trained_at
+        self.stats = stats or {}
+
+    def score_many(self, texts: List[str]) -> np.ndarray:
+        """Probability that each text would be approved by a curator."""
+        if not texts:
+            return np.zeros(0)
+        indices, values, rows = _stack(texts)
+        z = np.bincount(rows, weights=self.weights[indices] * values, minlength=len(texts))
+        return _sigmoid(z)
+
+    def to_document(self) -> dict:
+        return {
+            "_id": MODEL_ID,
+            "weights": Binary(self.weights.astype(np.float32).tobytes()),
+            "threshold": self.threshold,
+            "trained_at": self.trained_at,
+            "stats": self.stats,
+        }
+
+    @classmethod
+    def from_document(cls, doc: dict) -> "RelevanceModel":
+        weights = np.frombuffer(doc["weights"], dtype=np.float32).copy()
+        return cls(weights, doc["threshold"], doc.get("trained_at"), doc.get("stats"))
+
+def train_weights(texts: List[str], labels: np.ndarray) -> np.ndarray:
+    """Full-batch gradient descent on class-balanced logistic loss over sparse features."""
+    indices, values, rows = _stack(texts)
+    n = len(texts)
+    positives = labels.sum()
+    # Balance the classes so a mostly-rejected history does not teach "reject everything".
+    sample_weights = np.where(labels == 1, n / (2 * max(positives, 1)), n / (2 * max(n - positives, 1)))
+
+    weights = np.zeros(N_FEATURES, dtype=np.float64)
+    for _ in range(TRAIN_EPOCHS):
+        z = np.bincount(rows, weights=weights[indices] * values, minlength=n)
+        errors = (_sigmoid(z) - labels) * sample_weights
+        gradient = np.bincount(indices, weights=errors[rows] * values, minlength=N_FEATURES) / n
+        weights -= LEARNING_RATE * (gradient + L2_PENALTY * weights)
+    return weights.astype(np.float32)
+
+def calibrate_threshold(scores: np.ndarray, labels: np.ndarray) -> float:
+    """Highest threshold that still keeps PREFILTER_TARGET_RECALL of the approved items."""
+    approved = np.sort(scores[labels == 1])
+    if len(approved) == 0:
+        return 0.5
+    return float(approved[int(np.floor((1 - PREFILTER_TARGET_RECALL) * len(approved)))])
+
+def content_text(doc: dict) -> str:
+    """What the pre-filter reads: the title and the start of the item's text."""
+    body = doc.get("original_text") or doc.get("transcript") or ""
+    return f"{doc.get('title', '')}\n{body[:TEXT_CHARS]}"
+
+async def train(database: AsyncIOMotorDatabase) -> Optional[RelevanceModel]:
+    """
+    Trains on every approved and rejected item, calibrates the threshold on a
+    held-out split, then refits on all of it and stores the model.
+    Returns None if there are too few decisions of either kind.
+    """
+    cursor = database.get_collection(CONTENT_COLLECTION).find(
+        {"status": {"$in": [ContentStatus.APPROVED.value, ContentStatus.REJECTED.value]}},
+        {"title": 1, "original_text": 1, "transcript": 1, "status": 1},
+    )
+    texts, labels = [], []
+    async for doc in cursor:
+        texts.append(content_text(doc))
+        labels.append(1 if doc["status"] == ContentStatus.APPROVED.value else 0)
+    labels = np.array(labels, dtype=np.float64)
+
+    positives, negatives = int(labels.sum()), int(len(labels) - labels.sum())
+    if min(positives, negatives) < PREFILTER_MIN_SAMPLES:
+        print(f"Not enough curator decisions to train: {positives} approved, {negatives} rejected")
+        return None
+
+    order = np.random.default_rng(0).permutation(len(texts))
+    holdout = order[:int(len(texts) * HOLDOUT_FRACTION)]
+    train_rows = order[len(holdout):]
+
+    loop = asyncio.get_running_loop()
+    weights = await loop.run_in_executor(
+        None, train_weights, [texts[i] for i in train_rows], labels[train_rows]
+    )
+    held_out_scores = RelevanceModel(weights, 0.5).score_many([texts[i] for i in holdout])
+    threshold = calibrate_threshold(held_out_scores, labels[holdout])
+
+    held_out_labels = labels[holdout]
+    kept = held_out_scores >= threshold
+    stats = {
+        "approved": positives,
+        "rejected": negatives,
+        "holdout_recall": float(kept[held_out_labels == 1].mean()) if (held_out_labels == 1).any() else None,
+        "holdout_rejected_filtered": float((~kept)[held_out_labels == 0].mean()) if (held_out_labels == 0).any() else None,
+    }
+
+    weights = await loop.run_in_executor(None, train_weights, texts, labels)
+    model = RelevanceModel(weights, threshold, datetime.now(), stats)
+    await database.get_collection(PREFILTER_COLLECTION).replace_one(
+        {"_id": MODEL_ID}, model.to_document(), upsert=True
+    )
+    print(f"Trained pre-filter: threshold {threshold:.3f}, {stats}")
+    return model
+
+_model: Optional[RelevanceModel] = None
+_loaded_at = 0.0
+
+async def get_prefilter(database: AsyncIOMotorDatabase) -> Optional[RelevanceModel]:
+    """The current model, reloaded from Mongo at most every PREFILTER_RELOAD_SECONDS. None until one is trained."""
+    global _model, _loaded_at
+    if not PREFILTER_ENABLED:
+        return None
+    if time.monotonic() - _loaded_at > PREFILTER_RELOAD_SECONDS:
+        _loaded_at = time.monotonic()
+        try:
+            doc = await database.get_collection(PREFILTER_COLLECTION).find_one({"_id": MODEL_ID})
+            _model = RelevanceModel.from_document(doc) if doc else None
+        except Exception as e:
+            print(f"Error loading pre-filter model: {e}")
+    if _model is not None and PREFILTER_THRESHOLD:
+        _model.threshold = float(PREFILTER_THRESHOLD)
+    return _model
+
+async def main(command: str):
+    from .db import connect_to_mongo, close_mongo_connection, get_database
+    await connect_to_mongo()
+    try:
+        if command == "train":
+            await train(get_database())
+        else:
+            raise SystemExit(f"Unknown command: {command}")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "train"))
@@ -0,0 +1,110 @@
+"""
+Filters and sort orders for the content endpoints.
+
+main.py builds its queries from these functions and indexes.py explains the
+same ones, so the query-plan check always covers what the API actually runs.
+"""
+import base64
+from typing import List, Optional, Tuple
+from bson import json_util
+from .models import ContentStatus, ContentSummary
+
+Query = Tuple[dict, List[tuple]]
+
+# Response header carrying the cursor of the next page.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Fields fetched for list endpoints, so heavy fields never leave the database
+# for a page that does not show them. Includes every sort key used for cursors.
+SUMMARY_PROJECTION = {field.alias or name: 1 for name, field in ContentSummary.model_fields.items()}
+
+# Every sort ends in _id so that the order is total and a cursor identifies
+# exactly one position, even when many items share a timestamp.
+
+def recent_content_query() -> Query:
+    return {}, [("created_at", -1), ("_id", -1)]
+
+# Statuses curators work through: enriched items waiting for review, and items
+# the pre-filter held back, so its false negatives can still be approved.
+CURATION_STATUSES = (ContentStatus.PENDING, ContentStatus.FILTERED)
+
+def pending_content_query(status: ContentStatus = ContentStatus.PENDING) -> Query:
+    return {"status": status.value}, [("created_at", -1), ("_id", -1)]
+
+def approved_content_query(category: Optional[str] = None) -> Query:
+    find_filter = {"status": ContentStatus.APPROVED.value}
+    if category:
+        find_filter["category"] = category
+    return find_filter, [("published_at", -1), ("_id", -1)]
+
+def bulk_curation_query(
+    status: ContentStatus = ContentStatus.PENDING,
+    source: Optional[str] = None,
+    category: Optional[str] = None,
+    content_type: Optional[str] = None,
+    min_relevance: Optional[float] = None,
+) -> Query:
+    """Items a bulk-curation filter applies to, in curation queue order."""
+    find_filter, sort = pending_content_query(status)
+    for field, value in (("source", source), ("category", category), ("content_type", content_type)):
+        if value:
+            find_filter[field] = value
+    if min_relevance is not None:
+        find_filter["relevance_score"] = {"$gte": min_relevance}
+    return find_filter, sort
+
+def search_content_query(query: str, category: Optional[str] = None, content_type: Optional[str] = None) -> Query:
+    search_filter = {
+        "status": ContentStatus.APPROVED.value,
+        "$text": {"$search": query}
+    }
+    if category:
+        search_filter["category"] = category
+    if content_type:
+        search_filter["content_type"] = content_type
+    return search_filter, [("published_at", -1), ("_id", -1)]
+
+def text_candidates_query(query: str, category: Optional[str] = None, content_type: Optional[str] = None) -> Query:
+    """Best $text matches, the text half of hybrid search's candidate pool."""
+    search_filter, _ = search_content_query(query, category, content_type)
+    return search_filter, [("score", {"$meta": "textScore"})]
+
+def encode_cursor(doc: dict, sort: List[tuple]) -> str:
+    """Opaque cursor holding the sort key of the last item on a page."""
+    values = [doc[field] for field, _ in sort]
+    return base64.urlsafe_b64encode(json_util.dumps(values).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str, sort: List[tuple]) -> list:
+    """Raises ValueError if the cursor is malformed or was issued for a different sort."""
+    try:
+        values = json_util.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise ValueError("Invalid cursor")
+    return values
+
+def paginate(query: Query, cursor: Optional[str]) -> Query:
+    """
+    Restricts a query to the items after cursor in its sort order (keyset
+    pagination), so every page is an index seek no matter how deep it is.
+    """
+    find_filter, sort = query
+    if not cursor:
+        return find_filter, sort
+    values = decode_cursor(cursor, sort)
+
+    # (a, b) after (va, vb) in descending order: a < va, or a == va and b < vb.
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {prev_field: values[j] for j, (prev_field, _) in enumerate(sort[:i])}
+        clause[field] = {"$lt" if direction < 0 else "$gt": values[i]}
+        clauses.append(clause)
+    return {**find_filter, "$or": clauses}, sort
+
+def next_page(contents: List[dict], limit: int, sort: List[tuple]) -> Tuple[List[dict], Optional[str]]:
+    """Trims a limit + 1 fetch to one page and returns the cursor for the next, if any."""
+    if len(contents) <= limit:
+        return contents, None
+    contents = contents[:limit]
+    return contents, encode_cursor(contents[-1], sort)
@@ -0,0 +1,223 @@
+"""
+Response cache for the public read endpoints.
+
+Entries are stored as rendered JSON bodies with an ETag, so a hit costs no
+Mongo query and no model validation, and a client holding the current ETag
+gets a 304 without a body. Invalidation is generation based: every write that
+changes public data bumps a single counter, and entries rendered under an
+older generation are treated as misses.
+
+The in-process backend is the default. Its entries are per process, but the
+generation counter is a document in Mongo: invalidate() increments it and
+every process re-reads it at most every RESPONSE_CACHE_GENERATION_CHECK_SECONDS,
+so writes made by the pipeline worker reach the API within that interval.
+Set RESPONSE_CACHE_URL to a redis:// URL (requires the optional redis
+package) to share the entries as well.
+"""
+import os
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from fastapi import Request, Response
+from pymongo import ReturnDocument
+from .db import get_database
+
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL")
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "60"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1000"))
+RESPONSE_CACHE_GENERATION_CHECK_SECONDS = float(os.getenv("RESPONSE_CACHE_GENERATION_CHECK_SECONDS", "2"))
+
+GENERATION_COLLECTION = "response_cache"
+
+GENERATION_KEY = "response_cache:generation"
+KEY_PREFIX = "response_cache:entry:"
+
+# (rendered JSON body, extra response headers)
+Rendered = Tuple[bytes, Dict[str, str]]
+
+class MemoryBackend:
+    """
+    Per-process LRU with per-entry expiry. The generation is shared through a
+    counter document in Mongo, or kept in process when there is no database.
+    """
+
+    def __init__(self, max_size: int, check_interval: float):
+        self.max_size = max_size
+        self.check_interval = check_interval
+        self.entries = OrderedDict()
+        self.generation = 0
+        self.next_check = 0.0
+
+    def _collection(self):
+        database = get_database()
+        if database is None:
+            return None
+        return database.get_collection(GENERATION_COLLECTION)
+
+    def _adopt(self, generation: int):
+        if generation != self.generation:
+            self.generation = generation
+            self.entries.clear()
+
+    async def _refresh_generation(self):
+        now = time.monotonic()
+        if now < self.next_check:
+            return
+        # Set before awaiting so concurrent requests do not all hit Mongo.
+        self.next_check = now + self.check_interval
+        collection = self._collection()
+        if collection is None:
+            return
+        try:
+            doc = await collection.find_one({"_id": GENERATION_KEY})
+        except Exception as e:
+            print(f"Error reading response cache generation: {e}")
+            return
+        self._adopt(doc["value"] if doc else 0)
+
+    async def get(self, key: str) -> Tuple[Optional[dict], int]:
+        """Returns the entry stored at key (or None) and the current generation."""
+        await self._refresh_generation()
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self.entries.move_to_end(key)
+                return value, self.generation
+            del self.entries[key]
+        return None, self.generation
+
+    async def set(self, key: str, value: dict, ttl: float):
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    async def bump_generation(self):
+        collection = self._collection()
+        if collection is None:
+            self._adopt(self.generation + 1)
+            return
+        try:
+            doc = await collection.find_one_and_update(
+                {"_id": GENERATION_KEY},
+                {"$inc": {"value": 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except Exception:
+            # Other processes miss this invalidation, but this one must not serve stale entries.
+            self.entries.clear()
+            raise
+        self._adopt(doc["value"])
+
+class RedisBackend:
+    """Shared backend; the generation counter lives next to the entries so one MGET serves a lookup."""
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_URL is set but the redis package is not installed")
+        self.client = redis.from_url(url)
+
+    async def get(self, key: str) -> Tuple[Optional[dict], int]:
+        raw_entry, raw_generation = await self.client.mget(KEY_PREFIX + key, GENERATION_KEY)
+        entry = json.loads(raw_entry) if raw_entry else None
+        return entry, int(raw_generation or 0)
+
+    async def set(self, key: str, value: dict, ttl: float):
+        await self.client.set(KEY_PREFIX + key, json.dumps(value), px=int(ttl * 1000))
+
+    async def bump_generation(self):
+        await self.client.incr(GENERATION_KEY)
+
+class ResponseCache:
+    def __init__(self, backend, default_ttl: float):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.errors = 0
+
+    @staticmethod
+    def request_key(namespace: str, request: Request) -> str:
+        params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+        return f"{namespace}?{params}"
+
+    async def _lookup(self, key: str) -> Tuple[Optional[dict], int]:
+        # A cache outage must never take the endpoint down with it; fall through to Mongo.
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            self.errors += 1
+            print(f"Error reading response cache: {e}")
+            return None, -1
+
+    async def respond(
+        self,
+        request: Request,
+        namespace: str,
+        render: Callable[[], Awaitable[Rendered]],
+        ttl: Optional[float] = None,
+    ) -> Response:
+        """
+        Serves the cached rendering of this request if it is current, otherwise
+        renders it and stores the result. Answers 304 when If-None-Match holds
+        the current ETag.
+        """
+        key = self.request_key(namespace, request)
+        entry, generation = await self._lookup(key)
+        if entry is not None and entry["generation"] == generation:
+            self.hits += 1
+        else:
+            self.misses += 1
+            body, headers = await render()
+            entry = {
+                "generation": generation,
+                "body": body.decode("utf-8"),
+                "etag": f'"{hashlib.sha1(body).hexdigest()}"',
+                "headers": headers,
+            }
+            if generation >= 0:
+                try:
+                    await self.backend.set(key, entry, ttl or self.default_ttl)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Error writing response cache: {e}")
+
+        headers = {**entry["headers"], "ETag": entry["etag"], "Cache-Control": "no-cache"}
+        if_none_match = request.headers.get("if-none-match", "")
+        if entry["etag"] in (tag.strip() for tag in if_none_match.split(",")):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry["body"], media_type="application/json", headers=headers)
+
+    async def invalidate(self):
+        """Marks every cached response stale. Called after writes that change public data."""
+        try:
+            await self.backend.bump_generation()
+        except Exception as e:
+            self.errors += 1
+            print(f"Error invalidating response cache: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+def _create_backend():
+    if RESPONSE_CACHE_URL:
+        return RedisBackend(RESPONSE_CACHE_URL)
+    return MemoryBackend(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_GENERATION_CHECK_SECONDS)
+
+response_cache = ResponseCache(_create_backend(), RESPONSE_CACHE_TTL_SECONDS)
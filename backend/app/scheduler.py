@@ -0,0 +1,120 @@
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument, UpdateOne
+from .jobs import enqueue_job
+from .pipeline import all_sources
+
+SCHEDULE_COLLECTION = "source_schedule"
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+SCHEDULER_TICK_SECONDS = float(os.getenv("SCHEDULER_TICK_SECONDS", "60"))
+
+# Starting, shortest and longest polling interval per source kind, in seconds.
+# Busy news feeds start at 30 minutes; weekly podcasts and paper searches far less often.
+INTERVALS = {
+    "rss": {"initial": 30 * 60, "min": 10 * 60, "max": 12 * 3600},
+    "podcast": {"initial": 6 * 3600, "min": 3600, "max": 7 * 24 * 3600},
+    "academic": {"initial": 24 * 3600, "min": 6 * 3600, "max": 7 * 24 * 3600},
+}
+
+# How the interval adapts after each run: shrink when a source produced new
+# items, grow when it produced nothing. Errors back off exponentially.
+SPEEDUP_FACTOR = 0.75
+SLOWDOWN_FACTOR = 1.5
+MAX_ERROR_BACKOFF_SECONDS = 24 * 3600
+
+def next_interval(kind: str, interval: float, inserted: int) -> float:
+    """Adapts a source's polling interval to how often it actually yields new items."""
+    bounds = INTERVALS[kind]
+    factor = SPEEDUP_FACTOR if inserted > 0 else SLOWDOWN_FACTOR
+    return max(bounds["min"], min(bounds["max"], interval * factor))
+
+def error_backoff(interval: float, consecutive_errors: int) -> float:
+    return min(MAX_ERROR_BACKOFF_SECONDS, interval * 2 ** consecutive_errors)
+
+async def sync_schedule(database: AsyncIOMotorDatabase):
+    """Adds schedule entries for newly configured sources; existing entries keep their state."""
+    now = datetime.now()
+    operations = [
+        UpdateOne(
+            {"_id": source},
+            {
+                "$setOnInsert": {
+                    "interval_seconds": INTERVALS[kind]["initial"],
+                    "next_run_at": now,
+                    "consecutive_errors": 0,
+                },
+                "$set": {"kind": kind},
+            },
+            upsert=True,
+        )
+        for source, kind in all_sources().items()
+    ]
+    if operations:
+        await database.get_collection(SCHEDULE_COLLECTION).bulk_write(operations, ordered=False)
+
+async def claim_due_sources(database: AsyncIOMotorDatabase) -> List[str]:
+    """
+    Returns the sources whose next run is due, pushing each one's next_run_at
+    forward by its interval so other workers' ticks do not claim it again.
+    """
+    schedule = database.get_collection(SCHEDULE_COLLECTION)
+    configured = set(all_sources())
+    now = datetime.now()
+    claimed = []
+    async for entry in schedule.find({"next_run_at": {"$lte": now}}, {"_id": 1, "interval_seconds": 1}):
+        if entry["_id"] not in configured:
+            continue
+        claimed_entry = await schedule.find_one_and_update(
+            {"_id": entry["_id"], "next_run_at": {"$lte": now}},
+            {"$set": {"next_run_at": now + timedelta(seconds=entry["interval_seconds"])}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if claimed_entry is not None:
+            claimed.append(entry["_id"])
+    return claimed
+
+async def record_result(database: AsyncIOMotorDatabase, source: str, inserted: int, error: Optional[str]):
+    """Updates a source's interval and next run from the outcome of running it."""
+    schedule = database.get_collection(SCHEDULE_COLLECTION)
+    entry = await schedule.find_one({"_id": source})
+    if entry is None:
+        return
+    kind = entry.get("kind", "rss")
+    now = datetime.now()
+
+    if error:
+        errors = entry.get("consecutive_errors", 0) + 1
+        interval = entry["interval_seconds"]
+        update = {
+            "consecutive_errors": errors,
+            "last_error": error,
+            "next_run_at": now + timedelta(seconds=error_backoff(interval, errors)),
+        }
+    else:
+        interval = next_interval(kind, entry["interval_seconds"], inserted)
+        update = {
+            "consecutive_errors": 0,
+            "last_error": None,
+            "last_inserted": inserted,
+            "interval_seconds": interval,
+            "next_run_at": now + timedelta(seconds=interval),
+        }
+    update["last_run_at"] = now
+    await schedule.update_one({"_id": source}, {"$set": update})
+
+async def schedule_tick(database: AsyncIOMotorDatabase) -> Optional[dict]:
+    """Queues a job for the sources that are due, if any. Returns the job."""
+    await sync_schedule(database)
+    due = await claim_due_sources(database)
+    if not due:
+        return None
+    job, _ = await enqueue_job(database, "scheduled", {"sources": sorted(due)})
+    print(f"Scheduled {len(due)} due sources in job {job['_id']}")
+    return job
+
+async def get_schedule(database: AsyncIOMotorDatabase) -> List[dict]:
+    entries = await database.get_collection(SCHEDULE_COLLECTION).find().sort("next_run_at", 1).to_list(None)
+    return [{"source": entry.pop("_id"), **entry} for entry in entries]
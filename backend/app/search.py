@@ -0,0 +1,83 @@
+"""
+Semantic and hybrid ranking for /content/search.
+
+Semantic mode ranks approved items by embedding similarity to the query, or
+to another item for "more like this". Hybrid mode blends that similarity with
+MongoDB's $text score, each normalized to [0, 1].
+"""
+import os
+from typing import List, Optional
+import numpy as np
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from .ai import embed_query
+from .models import ContentStatus
+from .vector_index import vector_index, from_binary
+from . import queries
+
+# Share of the hybrid score that comes from embedding similarity; the rest is the text score.
+HYBRID_SEMANTIC_WEIGHT = float(os.getenv("HYBRID_SEMANTIC_WEIGHT", "0.6"))
+# Candidates taken from each ranking before filters and blending, per requested result.
+CANDIDATE_FACTOR = 5
+
+class SemanticSearchUnavailable(Exception):
+    """Raised when a query cannot be embedded (no API key or the API failed)."""
+
+async def _query_vector(collection: AsyncIOMotorCollection, query: Optional[str], like: Optional[ObjectId]) -> Optional[np.ndarray]:
+    if like is not None:
+        vector = vector_index.vector(like)
+        if vector is None:
+            doc = await collection.find_one({"_id": like}, {"embedding": 1})
+            vector = from_binary(doc["embedding"]) if doc and doc.get("embedding") else None
+        return vector
+    embedding = await embed_query(query)
+    return np.asarray(embedding, dtype=np.float32) if embedding is not None else None
+
+async def ranked_search(
+    collection: AsyncIOMotorCollection,
+    query: Optional[str],
+    mode: str,
+    category: Optional[str] = None,
+    content_type: Optional[str] = None,
+    limit: int = 20,
+    like: Optional[ObjectId] = None,
+) -> List[dict]:
+    """
+    Returns up to limit approved items as summary documents, best first.
+    mode is "semantic" or "hybrid"; like searches for items similar to that one.
+    """
+    await vector_index.refresh(collection)
+    pool = limit * CANDIDATE_FACTOR
+
+    vector = await _query_vector(collection, query, like)
+    if vector is None and (mode == "semantic" or like is not None):
+        raise SemanticSearchUnavailable()
+
+    scores = {}
+    if vector is not None:
+        weight = HYBRID_SEMANTIC_WEIGHT if mode == "hybrid" else 1.0
+        for content_id, similarity in vector_index.search(vector, pool, exclude=like):
+            # Cosine similarity mapped from [-1, 1] onto [0, 1]
+            scores[content_id] = weight * (similarity + 1) / 2
+
+    if mode == "hybrid" and query:
+        text_filter, text_sort = queries.text_candidates_query(query, category, content_type)
+        text_hits = await collection.find(
+            text_filter, {"score": {"$meta": "textScore"}}
+        ).sort(text_sort).limit(pool).to_list(pool)
+        best_text = max((hit["score"] for hit in text_hits), default=0) or 1
+        text_weight = 1.0 - HYBRID_SEMANTIC_WEIGHT if vector is not None else 1.0
+        for hit in text_hits:
+            scores[hit["_id"]] = scores.get(hit["_id"], 0.0) + text_weight * hit["score"] / best_text
+
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    find_filter = {"_id": {"$in": ranked}, "status": ContentStatus.APPROVED.value}
+    if category:
+        find_filter["category"] = category
+    if content_type:
+        find_filter["content_type"] = content_type
+    docs = {
+        doc["_id"]: doc
+        async for doc in collection.find(find_filter, queries.SUMMARY_PROJECTION)
+    }
+    return [docs[content_id] for content_id in ranked if content_id in docs][:limit]
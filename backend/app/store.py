@@ -0,0 +1,144 @@
+"""
+Content storage: canonical URL keys, batched existence lookups and inserts.
+
+Content stored before URLs were canonicalized keeps the raw entry link as
+its url. Rewrite those to their canonical form once, so lookups and the
+unique index on url see one key per article:
+
+    python -m app.store canonicalize
+"""
+import sys
+import asyncio
+from typing import Iterable, List, Set
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pydantic import HttpUrl, TypeAdapter
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from .models import Content
+from .content_stats import count_inserted
+from .metrics import span
+
+# Query parameters that only track where a click came from and never change the page.
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "cmpid"}
+
+DUPLICATE_KEY_ERROR = 11000
+CANONICALIZE_CHUNK = 1000
+
+_http_url = TypeAdapter(HttpUrl)
+
+def canonical_url(url: str) -> str:
+    """
+    Normalizes a URL so the same article found through different feeds or
+    tracking links maps to a single key in the content collection.
+    """
+    parts = urlsplit(url.strip())
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ]
+    cleaned = urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        parts.path,
+        urlencode(query),
+        "",  # Fragments never identify a different document
+    ))
+    # Round-trip through HttpUrl so the key matches what Content stores.
+    return str(_http_url.validate_python(cleaned))
+
+async def find_existing_urls(collection: AsyncIOMotorCollection, urls: Iterable[str]) -> Set[str]:
+    """Returns the subset of urls already stored, using a single $in query."""
+    urls = list(set(urls))
+    if not urls:
+        return set()
+    cursor = collection.find({"url": {"$in": urls}}, {"url": 1, "_id": 0})
+    return {doc["url"] async for doc in cursor}
+
+def content_to_document(content_item: Content) -> dict:
+    """Converts a Content model into a BSON-encodable document."""
+    content_dict = content_item.dict(by_alias=True, exclude_none=True)
+    # Manually convert types that are not BSON-encodable
+    content_dict['url'] = str(content_item.url)
+    # Excluded from API output, but stored
+    if content_item.embedding is not None:
+        content_dict['embedding'] = content_item.embedding
+    return content_dict
+
+async def insert_content_documents(collection: AsyncIOMotorCollection, items: List[Content]) -> List[dict]:
+    """
+    Inserts a batch of new content with one unordered insert_many and counts
+    the inserted items in the content stats. Items whose URL was stored
+    concurrently by another run are rejected by the unique index on url
+    (see indexes.py) and silently skipped. Returns the documents inserted.
+    """
+    if not items:
+        return []
+    documents = [content_to_document(item) for item in items]
+    with span("db_write") as write_span:
+        try:
+            await collection.insert_many(documents, ordered=False)
+            inserted = documents
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            unexpected = [err for err in errors if err.get("code") != DUPLICATE_KEY_ERROR]
+            if unexpected:
+                print(f"Error inserting content batch: {unexpected}")
+            rejected = {err["index"] for err in errors}
+            inserted = [doc for i, doc in enumerate(documents) if i not in rejected]
+        await count_inserted(collection.database, inserted)
+        write_span["items"] = len(inserted)
+    return inserted
+
+async def canonicalize_stored_urls(collection: AsyncIOMotorCollection) -> dict:
+    """
+    Rewrites stored urls to canonical_url in unordered bulk writes. A document
+    whose canonical url is already taken by another one is left as it is and
+    counted as a collision; invalid urls are counted and skipped.
+    """
+    counts = {"updated": 0, "collisions": 0, "invalid": 0}
+
+    async def flush(requests):
+        try:
+            result = await collection.bulk_write(requests, ordered=False)
+            counts["updated"] += result.modified_count
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            unexpected = [err for err in errors if err.get("code") != DUPLICATE_KEY_ERROR]
+            if unexpected:
+                print(f"Error canonicalizing urls: {unexpected}")
+            counts["updated"] += e.details.get("nModified", 0)
+            counts["collisions"] += len(errors) - len(unexpected)
+
+    requests = []
+    async for doc in collection.find({}, {"url": 1}):
+        try:
+            url = canonical_url(doc["url"])
+        except ValueError:
+            counts["invalid"] += 1
+            continue
+        if url == doc["url"]:
+            continue
+        requests.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"url": url}}))
+        if len(requests) >= CANONICALIZE_CHUNK:
+            await flush(requests)
+            requests = []
+    if requests:
+        await flush(requests)
+    return counts
+
+async def main(command: str):
+    from .db import connect_to_mongo, close_mongo_connection, get_database
+    await connect_to_mongo()
+    try:
+        if command == "canonicalize":
+            counts = await canonicalize_stored_urls(get_database().get_collection("content"))
+            print(f"Canonicalized urls: {counts}")
+        else:
+            raise SystemExit(f"Unknown command: {command}")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "canonicalize"))
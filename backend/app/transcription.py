@@ -0,0 +1,199 @@
+import os
+import re
+import shutil
+import asyncio
+import tempfile
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+from .http_client import get_session
+from .metrics import span
+
+# Whisper rejects uploads over 25 MB; segments stay comfortably below that.
+WHISPER_MAX_BYTES = 25 * 1024 * 1024
+SEGMENT_MAX_BYTES = int(os.getenv("TRANSCRIPTION_SEGMENT_MAX_BYTES", str(20 * 1024 * 1024)))
+SEGMENT_SECONDS = int(os.getenv("TRANSCRIPTION_SEGMENT_SECONDS", "600"))
+# How far from the target cut point we look for a silence to cut on.
+SILENCE_SEARCH_SECONDS = int(os.getenv("TRANSCRIPTION_SILENCE_SEARCH_SECONDS", "60"))
+TRANSCRIPTION_CONCURRENCY = int(os.getenv("TRANSCRIPTION_CONCURRENCY", "4"))
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+
+AUDIO_EXTENSIONS = {".mp3", ".m4a", ".mp4", ".mpeg", ".mpga", ".wav", ".webm", ".ogg", ".flac"}
+
+_silence_end = re.compile(r"silence_end: ([0-9.]+)")
+_duration = re.compile(r"Duration: (\d+):(\d+):([0-9.]+)")
+
+def audio_extension(audio_url: str) -> str:
+    """Whisper infers the format from the file name, so keep the enclosure's extension."""
+    ext = os.path.splitext(urlsplit(audio_url).path)[1].lower()
+    return ext if ext in AUDIO_EXTENSIONS else ".mp3"
+
+async def download_audio(audio_url: str, dest_path: str) -> bool:
+    """Streams the enclosure to disk in fixed-size chunks. Returns False on HTTP errors."""
+    session = get_session()
+    async with session.get(audio_url) as response:
+        if response.status != 200:
+            print(f"Failed to download audio from {audio_url}: HTTP {response.status}")
+            return False
+        with open(dest_path, "wb") as f:
+            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_BYTES):
+                f.write(chunk)
+    return True
+
+async def _run_ffmpeg(*args: str) -> str:
+    """Runs ffmpeg and returns its stderr, where it reports durations and silences."""
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-hide_banner", "-nostdin", "-nostats", *args,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    _, stderr = await process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with {process.returncode}")
+    return stderr.decode("utf-8", errors="replace")
+
+def choose_cut_points(
+    duration: float,
+    silences: List[float],
+    segment_seconds: float = SEGMENT_SECONDS,
+    search_seconds: float = SILENCE_SEARCH_SECONDS,
+) -> List[float]:
+    """Picks one cut near every segment_seconds, snapping to the closest silence if there is one."""
+    cuts = []
+    target = segment_seconds
+    while target < duration - search_seconds:
+        nearby = [s for s in silences if abs(s - target) <= search_seconds and (not cuts or s > cuts[-1])]
+        cut = min(nearby, key=lambda s: abs(s - target)) if nearby else target
+        cuts.append(cut)
+        target = cut + segment_seconds
+    return cuts
+
+def segment_length(duration: float, size: int) -> Tuple[float, float]:
+    """
+    (segment_seconds, search_seconds) for a file of this duration and size. A
+    segment can run search_seconds past its target, so both shrink until that
+    longest segment fits SEGMENT_MAX_BYTES at the file's average bitrate.
+    """
+    segment_seconds, search_seconds = SEGMENT_SECONDS, SILENCE_SEARCH_SECONDS
+    bytes_per_second = size / duration if duration > 0 else 0
+    if bytes_per_second * (segment_seconds + search_seconds) > SEGMENT_MAX_BYTES:
+        max_seconds = SEGMENT_MAX_BYTES / bytes_per_second
+        search_seconds = min(search_seconds, max_seconds / 10)
+        segment_seconds = max_seconds - search_seconds
+    return segment_seconds, search_seconds
+
+async def split_on_silence(path: str, workdir: str, ext: str) -> List[str]:
+    """Splits audio into pieces of at most SEGMENT_MAX_BYTES at silence boundaries using ffmpeg, without re-encoding."""
+    report = await _run_ffmpeg("-i", path, "-af", "silencedetect=noise=-30dB:d=0.5", "-f", "null", "-")
+    match = _duration.search(report)
+    if not match:
+        raise RuntimeError("Could not determine audio duration")
+    hours, minutes, seconds = match.groups()
+    duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    silences = [float(value) for value in _silence_end.findall(report)]
+
+    cuts = choose_cut_points(duration, silences, *segment_length(duration, os.path.getsize(path)))
+    if not cuts:
+        return await asyncio.to_thread(resplit_oversized, [path], workdir, ext)
+
+    pattern = os.path.join(workdir, f"segment_%04d{ext}")
+    await _run_ffmpeg(
+        "-i", path, "-f", "segment",
+        "-segment_times", ",".join(f"{cut:.3f}" for cut in cuts),
+        "-c", "copy", "-reset_timestamps", "1", pattern,
+    )
+    segments = sorted(
+        os.path.join(workdir, name) for name in os.listdir(workdir) if name.startswith("segment_")
+    )
+    return await asyncio.to_thread(resplit_oversized, segments, workdir, ext)
+
+def _next_frame_sync(f, position: int, limit: int = 64 * 1024) -> int:
+    """Finds the next MPEG audio frame header at or after position, so byte splits stay decodable."""
+    f.seek(position)
+    window = f.read(limit)
+    for i in range(len(window) - 1):
+        if window[i] == 0xFF and window[i + 1] & 0xE0 == 0xE0:
+            return position + i
+    return position
+
+def split_by_size(path: str, workdir: str, ext: str, max_bytes: int = WHISPER_MAX_BYTES) -> List[str]:
+    """
+    Fallback when ffmpeg is unavailable: cuts files over max_bytes on frame
+    boundaries by size, streaming.
+    """
+    size = os.path.getsize(path)
+    if size <= max_bytes:
+        return [path]
+
+    segments = []
+    with open(path, "rb") as source:
+        start = 0
+        while start < size:
+            end = size if size - start <= SEGMENT_MAX_BYTES else _next_frame_sync(source, start + SEGMENT_MAX_BYTES)
+            segment_path = os.path.join(workdir, f"segment_{len(segments):04d}{ext}")
+            source.seek(start)
+            with open(segment_path, "wb") as out:
+                remaining = end - start
+                while remaining > 0:
+                    block = source.read(min(DOWNLOAD_CHUNK_BYTES, remaining))
+                    if not block:
+                        break
+                    out.write(block)
+                    remaining -= len(block)
+            segments.append(segment_path)
+            start = end
+    return segments
+
+def resplit_oversized(segments: List[str], workdir: str, ext: str) -> List[str]:
+    """
+    Size-splits any segment still over SEGMENT_MAX_BYTES, which variable
+    bitrate audio denser than its average can produce.
+    """
+    result = []
+    for index, segment in enumerate(segments):
+        if os.path.getsize(segment) <= SEGMENT_MAX_BYTES:
+            result.append(segment)
+            continue
+        parts_dir = os.path.join(workdir, f"parts_{index:04d}")
+        os.makedirs(parts_dir, exist_ok=True)
+        result.extend(split_by_size(segment, parts_dir, ext, max_bytes=SEGMENT_MAX_BYTES))
+    return result
+
+async def split_audio(path: str, workdir: str, ext: str) -> List[str]:
+    """Returns transcription-sized segment files, in playback order."""
+    if shutil.which("ffmpeg"):
+        try:
+            return await split_on_silence(path, workdir, ext)
+        except Exception as e:
+            print(f"Silence-based split failed, falling back to size-based split: {e}")
+            for name in os.listdir(workdir):
+                if name.startswith("segment_"):
+                    os.unlink(os.path.join(workdir, name))
+                elif name.startswith("parts_"):
+                    shutil.rmtree(os.path.join(workdir, name))
+    return await asyncio.to_thread(split_by_size, path, workdir, ext)
+
+async def transcribe_url(llm, audio_url: str, model: str) -> Optional[str]:
+    """
+    Streams an episode to disk, splits it into segments and transcribes them
+    concurrently, returning the stitched transcript. Memory use does not grow
+    with episode length. Returns None if the audio could not be downloaded.
+    """
+    ext = audio_extension(audio_url)
+    with tempfile.TemporaryDirectory(prefix="transcribe_") as workdir:
+        audio_path = os.path.join(workdir, f"episode{ext}")
+        with span("transcription_download", items=1):
+            if not await download_audio(audio_url, audio_path):
+                return None
+
+        segments = await split_audio(audio_path, workdir, ext)
+        semaphore = asyncio.Semaphore(TRANSCRIPTION_CONCURRENCY)
+
+        async def transcribe_segment(segment_path: str) -> str:
+            async with semaphore:
+                text = await llm.transcribe_file(segment_path, model=model, response_format="text")
+                return (text or "").strip()
+
+        parts = await asyncio.gather(*(transcribe_segment(segment) for segment in segments))
+        if len(segments) > 1:
+            print(f"Transcribed {audio_url} in {len(segments)} segments")
+        return " ".join(part for part in parts if part)
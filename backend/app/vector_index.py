@@ -0,0 +1,175 @@
+"""
+In-process vector index over the embeddings of approved content.
+
+Embeddings are stored on each content document as float32 bytes. The index
+keeps them as one normalized NumPy matrix, so a query is a single
+matrix-vector product plus a partial sort: about 5 ms for 100k items at 256
+dimensions. It is loaded at startup and kept current by re-reading only the
+documents whose updated_at moved since the last refresh.
+
+Items stored before embeddings existed can be embedded with:
+
+    python -m app.vector_index backfill
+"""
+import os
+import sys
+import time
+import asyncio
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+from bson import Binary, ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import UpdateOne
+from .ai import embed_texts, EMBEDDING_DIMENSIONS
+from .models import ContentStatus
+
+VECTOR_REFRESH_SECONDS = float(os.getenv("VECTOR_REFRESH_SECONDS", "30"))
+# Refreshes re-read a little before the last one started, so writes racing it are not missed.
+REFRESH_OVERLAP = timedelta(seconds=5)
+BACKFILL_BATCH_SIZE = 100
+
+def to_binary(embedding: Iterable[float]) -> Binary:
+    return Binary(np.asarray(embedding, dtype=np.float32).tobytes())
+
+def from_binary(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.float32)
+
+def embedding_text(title: str, text: str) -> str:
+    return f"{title}\n{text}"
+
+class VectorIndex:
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+        self.ids: List[ObjectId] = []
+        self.positions = {}
+        self.vectors = np.zeros((1024, dimensions), dtype=np.float32)
+        self.synced_at: Optional[datetime] = None
+        self.checked_at = 0.0
+        self._lock = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def upsert(self, content_id: ObjectId, vector: np.ndarray):
+        if vector.shape != (self.dimensions,):
+            return  # Embedded with a different model configuration
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return
+        position = self.positions.get(content_id)
+        if position is None:
+            position = len(self.ids)
+            if position == len(self.vectors):
+                self.vectors = np.concatenate([self.vectors, np.zeros_like(self.vectors)])
+            self.ids.append(content_id)
+            self.positions[content_id] = position
+        self.vectors[position] = vector / norm
+
+    def remove(self, content_id: ObjectId):
+        position = self.positions.pop(content_id, None)
+        if position is None:
+            return
+        # Move the last row into the gap so the live rows stay contiguous.
+        last = len(self.ids) - 1
+        if position != last:
+            moved = self.ids[last]
+            self.ids[position] = moved
+            self.positions[moved] = position
+            self.vectors[position] = self.vectors[last]
+        self.ids.pop()
+
+    def vector(self, content_id: ObjectId) -> Optional[np.ndarray]:
+        position = self.positions.get(content_id)
+        return None if position is None else self.vectors[position]
+
+    def search(self, query: np.ndarray, k: int, exclude: Optional[ObjectId] = None) -> List[Tuple[ObjectId, float]]:
+        """The k most similar items by cosine similarity, best first."""
+        size = len(self.ids)
+        norm = np.linalg.norm(query)
+        if size == 0 or norm == 0:
+            return []
+        similarities = self.vectors[:size] @ (query.astype(np.float32) / norm)
+        fetch = min(k + (1 if exclude is not None else 0), size)
+        top = np.argpartition(-similarities, fetch - 1)[:fetch]
+        top = top[np.argsort(-similarities[top])]
+        return [(self.ids[i], float(similarities[i])) for i in top if self.ids[i] != exclude][:k]
+
+    def _apply(self, doc: dict):
+        if doc.get("status") == ContentStatus.APPROVED.value and doc.get("embedding"):
+            self.upsert(doc["_id"], from_binary(doc["embedding"]))
+        else:
+            self.remove(doc["_id"])
+
+    async def refresh(self, collection: AsyncIOMotorCollection, force: bool = False):
+        """
+        Loads the index on first use, then applies changes made since the last
+        refresh, at most once every VECTOR_REFRESH_SECONDS unless forced.
+        """
+        if not force and time.monotonic() - self.checked_at < VECTOR_REFRESH_SECONDS:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not force and time.monotonic() - self.checked_at < VECTOR_REFRESH_SECONDS:
+                return
+            started_at = datetime.now()
+            projection = {"status": 1, "embedding": 1}
+            if self.synced_at is None:
+                find_filter = {"status": ContentStatus.APPROVED.value, "embedding": {"$exists": True}}
+            else:
+                find_filter = {"updated_at": {"$gte": self.synced_at - REFRESH_OVERLAP}}
+            async for doc in collection.find(find_filter, projection):
+                self._apply(doc)
+            self.synced_at = started_at
+            self.checked_at = time.monotonic()
+
+vector_index = VectorIndex(EMBEDDING_DIMENSIONS)
+
+async def embed_items(items: List[Tuple[str, str]]) -> List[Optional[Binary]]:
+    """Embeds (title, text) pairs in one call; entries are None if embedding is unavailable."""
+    embeddings = await embed_texts([embedding_text(title, text) for title, text in items])
+    if embeddings is None:
+        return [None] * len(items)
+    return [to_binary(embedding) for embedding in embeddings]
+
+async def backfill(collection: AsyncIOMotorCollection) -> int:
+    """Embeds stored items that have none yet, approved items first. Returns the number embedded."""
+    embedded = 0
+    for status in (ContentStatus.APPROVED, ContentStatus.PENDING):
+        while True:
+            docs = await collection.find(
+                {"status": status.value, "embedding": {"$exists": False}},
+                {"title": 1, "original_text": 1, "transcript": 1},
+            ).limit(BACKFILL_BATCH_SIZE).to_list(BACKFILL_BATCH_SIZE)
+            if not docs:
+                break
+            vectors = await embed_items([
+                (doc.get("title", ""), doc.get("original_text") or doc.get("transcript") or "") for doc in docs
+            ])
+            if all(vector is None for vector in vectors):
+                print("Embedding failed; stopping backfill")
+                return embedded
+            now = datetime.now()
+            # updated_at moves so running API processes pick the vectors up on their next refresh.
+            result = await collection.bulk_write([
+                UpdateOne({"_id": doc["_id"]}, {"$set": {"embedding": vector, "updated_at": now}})
+                for doc, vector in zip(docs, vectors)
+            ], ordered=False)
+            embedded += result.modified_count
+            print(f"Embedded {embedded} items")
+    return embedded
+
+async def main(command: str):
+    from .db import connect_to_mongo, close_mongo_connection, get_database
+    await connect_to_mongo()
+    try:
+        if command == "backfill":
+            await backfill(get_database().get_collection("content"))
+        else:
+            raise SystemExit(f"Unknown command: {command}")
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "backfill"))
@@ -0,0 +1,137 @@
+"""
+Background worker that executes queued pipeline jobs.
+
+Usage:
+    python -m app.worker
+
+Run as many workers as needed; jobs are claimed atomically and each source
+is processed under a lease, so concurrent workers never duplicate work.
+Unless SCHEDULER_ENABLED=false, each worker also queues sources as their
+polling intervals come due (see scheduler.py). Pipeline metrics are served
+in the Prometheus format on WORKER_METRICS_PORT (0 disables it).
+"""
+import os
+import socket
+import asyncio
+from . import pipeline
+from . import batch
+from .db import connect_to_mongo, close_mongo_connection, get_database
+from .http_client import close_session
+from .scheduler import schedule_tick, record_result, SCHEDULER_ENABLED, SCHEDULER_TICK_SECONDS
+from .jobs import (
+    claim_next_job, finish_job, heartbeat, requeue_stale_jobs,
+    current_job, JOB_STALE_SECONDS,
+)
+from .indexes import ensure_indexes
+from .llm import get_llm_stats
+from .metrics import RunSummary, current_run, serve_metrics, WORKER_METRICS_PORT
+
+WORKER_POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", "5"))
+HEARTBEAT_SECONDS = max(1, JOB_STALE_SECONDS // 5)
+
+# Job kind -> coroutine function taking (collection, params).
+JOB_HANDLERS = {
+    "rss": lambda collection, params: pipeline.fetch_and_store_feeds(collection),
+    "complete": lambda collection, params: pipeline.run_complete_pipeline(collection),
+    # Queued by curation when a pre-filtered item is approved.
+    "enrich": lambda collection, params: batch.enrich_pending(collection),
+    "scheduled": lambda collection, params: pipeline.run_sources(
+        collection,
+        params["sources"],
+        on_result=lambda source, inserted, error: record_result(collection.database, source, inserted, error),
+    ),
+}
+
+def _llm_gauges() -> dict:
+    stats = get_llm_stats()
+    return {f"llm_{name}": stats.get(name, 0) for name in ("queued", "in_flight", "completed", "failed", "retries")}
+
+async def _heartbeat_loop(database, job_id):
+    while True:
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        await heartbeat(database, job_id)
+
+async def _scheduler_loop(database, stop: asyncio.Event):
+    """Queues due sources every tick, independently of how long jobs take."""
+    while not stop.is_set():
+        try:
+            await schedule_tick(database)
+        except Exception as e:
+            print(f"Scheduler tick failed: {e}")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=SCHEDULER_TICK_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+async def run_job(database, job: dict):
+    """Executes one claimed job and records its outcome."""
+    handler = JOB_HANDLERS.get(job["kind"])
+    if handler is None:
+        await finish_job(database, job["_id"], error=f"Unknown job kind: {job['kind']}")
+        return
+
+    print(f"Running job {job['_id']} ({job['kind']})")
+    token = current_job.set(job)
+    summary = RunSummary()
+    run_token = current_run.set(summary)
+    beat = asyncio.create_task(_heartbeat_loop(database, job["_id"]))
+    try:
+        result = await handler(database.get_collection("content"), job.get("params", {}))
+        await finish_job(database, job["_id"], result=result, metrics=summary.to_document())
+        print(f"Job {job['_id']} succeeded")
+    except Exception as e:
+        print(f"Job {job['_id']} failed: {e}")
+        await finish_job(database, job["_id"], error=str(e), metrics=summary.to_document())
+    finally:
+        beat.cancel()
+        current_run.reset(run_token)
+        current_job.reset(token)
+
+async def run_worker(stop: asyncio.Event = None):
+    """Claims and runs jobs until stop is set."""
+    stop = stop or asyncio.Event()
+    database = get_database()
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    await ensure_indexes(database)
+    print(f"Worker {worker_id} started")
+
+    scheduler = asyncio.create_task(_scheduler_loop(database, stop)) if SCHEDULER_ENABLED else None
+    metrics_server = None
+    if WORKER_METRICS_PORT:
+        try:
+            metrics_server = await serve_metrics(WORKER_METRICS_PORT, gauges=_llm_gauges)
+            print(f"Serving worker metrics on port {WORKER_METRICS_PORT}")
+        except OSError as e:
+            # Several workers on one host: only the first gets the port.
+            print(f"Worker metrics disabled: {e}")
+
+    while not stop.is_set():
+        requeued = await requeue_stale_jobs(database)
+        if requeued:
+            print(f"Requeued {requeued} stale jobs")
+
+        job = await claim_next_job(database, worker_id)
+        if job is None:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=WORKER_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        await run_job(database, job)
+
+    if scheduler:
+        scheduler.cancel()
+    if metrics_server:
+        await metrics_server.cleanup()
+
+async def main():
+    await connect_to_mongo()
+    try:
+        await run_worker()
+    finally:
+        await close_session()
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
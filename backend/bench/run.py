@@ -0,0 +1,230 @@
+"""
+Offline end-to-end benchmark of run_complete_pipeline.
+
+Starts the stub servers from bench/stubs.py in a separate process, points
+the pipeline at them and at a scratch database on a local MongoDB, runs the
+complete pipeline once and reports:
+
+- items stored per second, overall and by status;
+- p50 / p99 / max duration of every pipeline stage (see app/metrics.py);
+- peak RSS of the benchmark process;
+- MongoDB round-trips by command, counted with a pymongo command listener.
+
+Run from backend/:
+
+    DATABASE_URL=mongodb://localhost:27017 python -m bench.run --json results.json
+    python -m bench.run --baseline results.json --max-regression 0.15
+
+With --baseline the run exits non-zero if throughput drops, or DB round
+trips grow, by more than --max-regression compared to the baseline file.
+The scratch database (DATABASE_NAME, default human_rights_ai_monitor_bench)
+is dropped before and after the run.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+import multiprocessing
+from collections import Counter
+from dataclasses import asdict, fields
+from pymongo import monitoring
+from .stubs import StubConfig, serve_forever
+
+BENCH_DATABASE_NAME = "human_rights_ai_monitor_bench"
+
+class RoundTripCounter(monitoring.CommandListener):
+    """Counts every command sent to MongoDB, by command name."""
+
+    def __init__(self):
+        self.commands = Counter()
+
+    def started(self, event):
+        self.commands[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+def percentile(samples, fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark")
+    defaults = StubConfig()
+    for field in fields(StubConfig):
+        parser.add_argument(
+            f"--{field.name.replace('_', '-')}",
+            type=type(getattr(defaults, field.name)),
+            default=getattr(defaults, field.name),
+        )
+    parser.add_argument("--terms", type=int, default=6, help="Academic search terms")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.15)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database afterwards")
+    return parser.parse_args()
+
+def start_stubs(config: StubConfig):
+    """Runs the stubs in their own process, so they use neither our event loop nor our memory."""
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=serve_forever, args=(config, sender), daemon=True)
+    process.start()
+    if not receiver.poll(30):
+        process.terminate()
+        raise SystemExit("Stub servers did not start")
+    return process, receiver.recv()
+
+def configure_environment(urls: dict):
+    """Points the app at the stubs. Must run before any app module is imported."""
+    os.environ["OPENAI_API_KEY"] = "bench"
+    os.environ["OPENAI_BASE_URL"] = f"{urls['openai']}/v1"
+    os.environ["SEMANTIC_SCHOLAR_API_URL"] = f"{urls['scholar']}/graph/v1"
+    os.environ.setdefault("DATABASE_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DATABASE_NAME", BENCH_DATABASE_NAME)
+    os.environ["ENRICHMENT_MODE"] = "inline"
+
+async def run_benchmark(args, config: StubConfig, urls: dict) -> dict:
+    from app import pipeline
+    from app.db import connect_to_mongo, close_mongo_connection, get_database, DATABASE_NAME
+    from app.http_client import close_session
+    from app.indexes import ensure_indexes
+    from app.metrics import RunSummary, current_run
+
+    if DATABASE_NAME == "human_rights_ai_monitor":
+        raise SystemExit("Refusing to benchmark against the application database")
+
+    class StageSamples(RunSummary):
+        """RunSummary that also keeps every span's duration, for percentiles."""
+
+        def __init__(self):
+            super().__init__()
+            self.samples = {}
+
+        def add_span(self, stage, seconds, items, failed):
+            super().add_span(stage, seconds, items, failed)
+            self.samples.setdefault(stage, []).append(seconds)
+
+    round_trips = RoundTripCounter()
+    monitoring.register(round_trips)
+    await connect_to_mongo()
+    database = get_database()
+    collection = database.get_collection("content")
+    try:
+        await database.client.drop_database(DATABASE_NAME)
+        await ensure_indexes(database)
+
+        pipeline.RSS_FEEDS = [f"{urls['feeds']}/rss/{i}.xml" for i in range(config.feeds)]
+        pipeline.PODCAST_FEEDS = [f"{urls['feeds']}/podcasts/{i}.xml" for i in range(config.podcasts)]
+        pipeline.ACADEMIC_SEARCH_TERMS = pipeline.ACADEMIC_SEARCH_TERMS[:args.terms]
+
+        round_trips.commands.clear()
+        summary = StageSamples()
+        token = current_run.set(summary)
+        rss_before = peak_rss_mb()
+        started = time.perf_counter()
+        try:
+            await pipeline.run_complete_pipeline(collection)
+        finally:
+            current_run.reset(token)
+        elapsed = time.perf_counter() - started
+        commands = dict(round_trips.commands)
+
+        by_status = {
+            doc["_id"]: doc["count"]
+            async for doc in collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}])
+        }
+    finally:
+        await close_session()
+        if not args.keep:
+            await database.client.drop_database(DATABASE_NAME)
+        await close_mongo_connection()
+
+    stored = sum(by_status.values())
+    document = summary.to_document()
+    return {
+        "config": dict(asdict(config), terms=args.terms),
+        "seconds": round(elapsed, 3),
+        "items": stored,
+        "items_per_second": round(stored / elapsed, 3) if elapsed else 0.0,
+        "by_status": by_status,
+        "stages": {
+            stage: {
+                "count": len(samples),
+                "items": document["stages"][stage]["items"],
+                "errors": document["stages"][stage]["errors"],
+                "p50": round(percentile(samples, 0.5), 4),
+                "p99": round(percentile(samples, 0.99), 4),
+                "max": round(max(samples), 4),
+            }
+            for stage, samples in sorted(summary.samples.items())
+        },
+        "tokens": document["tokens"],
+        "cost_dollars": document["cost_dollars"],
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "rss_before_run_mb": round(rss_before, 1),
+        "db_round_trips": sum(commands.values()),
+        "db_commands": commands,
+    }
+
+def print_report(results: dict):
+    print()
+    print(f"Stored {results['items']} items in {results['seconds']}s: {results['items_per_second']} items/s")
+    print(f"By status: {results['by_status']}")
+    print(f"Peak RSS: {results['peak_rss_mb']} MB ({results['rss_before_run_mb']} MB before the run)")
+    print(f"DB round trips: {results['db_round_trips']} {results['db_commands']}")
+    print(f"LLM tokens: {results['tokens']}, estimated cost ${results['cost_dollars']}")
+    print()
+    print(f"{'stage':<24}{'count':>8}{'items':>8}{'errors':>8}{'p50 s':>10}{'p99 s':>10}{'max s':>10}")
+    for stage, row in results["stages"].items():
+        print(
+            f"{stage:<24}{row['count']:>8}{row['items']:>8}{row['errors']:>8}"
+            f"{row['p50']:>10.4f}{row['p99']:>10.4f}{row['max']:>10.4f}"
+        )
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    """Gated metrics that are worse than the baseline by more than tolerance."""
+    found = []
+    if results["items_per_second"] < baseline["items_per_second"] * (1 - tolerance):
+        found.append(f"items/s {results['items_per_second']} vs baseline {baseline['items_per_second']}")
+    if results["db_round_trips"] > baseline["db_round_trips"] * (1 + tolerance):
+        found.append(f"DB round trips {results['db_round_trips']} vs baseline {baseline['db_round_trips']}")
+    if baseline.get("config") != results["config"]:
+        print("Warning: baseline was recorded with a different configuration")
+    return found
+
+def main():
+    args = parse_args()
+    config = StubConfig(**{field.name: getattr(args, field.name) for field in fields(StubConfig)})
+    process, urls = start_stubs(config)
+    try:
+        configure_environment(urls)
+        results = asyncio.run(run_benchmark(args, config, urls))
+    finally:
+        process.terminate()
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.max_regression)
+        if found:
+            raise SystemExit("Regression: " + "; ".join(found))
+        print(f"No regression beyond {args.max_regression:.0%} of the baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Local stand-ins for everything the pipeline talks to over HTTP:
+
+- a feed server with synthetic RSS and podcast feeds, and audio enclosures;
+- the OpenAI stub from stubs/openai_stub.py, with added latency and 429s;
+- the Semantic Scholar paper search endpoint.
+
+Content is generated from fixed seeds, so every run sees the same items.
+A share of articles repeats a story from another feed with a little
+rewording, the way syndicated wire stories do, so near-duplicate detection
+has work to do.
+"""
+import zlib
+import asyncio
+import random
+from dataclasses import dataclass
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from xml.sax.saxutils import escape
+from aiohttp import web
+from stubs.openai_stub import create_app as create_openai_app
+
+TOPIC_WORDS = (
+    "artificial intelligence human rights surveillance privacy algorithmic bias discrimination "
+    "facial recognition accountability transparency regulation policy oversight data protection "
+    "civil liberties due process freedom expression automated decision making fairness audit "
+    "machine learning model deployment government police border migrants workers researchers"
+).split()
+FILLER_WORDS = (
+    "the a of to and in that for on with as by at from this which their new said report "
+    "according year week officials people public system systems use used could would also "
+    "while more than about after before under over into its were has have been will"
+).split()
+
+@dataclass
+class StubConfig:
+    feeds: int = 6
+    items_per_feed: int = 50
+    words_per_item: int = 120
+    # Share of articles that are reworded copies of another feed's story.
+    duplicate_share: float = 0.2
+    podcasts: int = 3
+    episodes_per_podcast: int = 3
+    audio_bytes: int = 256 * 1024
+    papers_per_term: int = 5
+    # Latency of OpenAI chat and embedding calls, and of each transcription call.
+    openai_latency: float = 0.3
+    transcription_latency: float = 2.0
+    latency_jitter: float = 0.5
+    # Share of OpenAI calls answered with 429 and a short Retry-After.
+    rate_limit_share: float = 0.02
+    retry_after: float = 0.5
+    seed: int = 1
+
+def _text(rng: random.Random, words: int) -> str:
+    # About a third topic words, so texts look relevant and share vocabulary.
+    return " ".join(
+        rng.choice(TOPIC_WORDS) if rng.random() < 0.35 else rng.choice(FILLER_WORDS)
+        for _ in range(words)
+    )
+
+def _reword(rng: random.Random, text: str) -> str:
+    words = text.split()
+    for _ in range(max(1, len(words) // 25)):
+        words[rng.randrange(len(words))] = rng.choice(FILLER_WORDS)
+    return " ".join(words)
+
+def _rfc822(index: int) -> str:
+    return format_datetime(datetime(2024, 6, 1, tzinfo=timezone.utc) - timedelta(hours=index))
+
+class FeedStub:
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.articles = self._articles()
+
+    def _articles(self):
+        """Every feed's items as (title, text), generated once so all requests agree."""
+        config = self.config
+        rng = random.Random(config.seed)
+        feeds = []
+        originals = []
+        for feed in range(config.feeds):
+            items = []
+            for item in range(config.items_per_feed):
+                # Copies come from earlier feeds only, as a wire story picked up elsewhere.
+                if feeds and rng.random() < config.duplicate_share:
+                    title, text = rng.choice(originals)
+                    items.append((title, _reword(rng, text)))
+                else:
+                    items.append((f"Story {feed}-{item}: {_text(rng, 6)}", _text(rng, config.words_per_item)))
+            originals.extend(items)
+            feeds.append(items)
+        return feeds
+
+    def _base(self, request: web.Request) -> str:
+        return f"http://{request.host}"
+
+    async def rss(self, request: web.Request) -> web.Response:
+        feed = int(request.match_info["feed"])
+        if feed >= self.config.feeds:
+            raise web.HTTPNotFound()
+        base = self._base(request)
+        items = "".join(
+            f"<item><title>{escape(title)}</title><link>{base}/articles/{feed}/{index}</link>"
+            f"<description>{escape(text)}</description><pubDate>{_rfc822(index)}</pubDate></item>"
+            for index, (title, text) in enumerate(self.articles[feed])
+        )
+        body = (
+            '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>Bench feed {feed}</title><link>{base}/</link>"
+            f"<description>Synthetic feed</description>{items}</channel></rss>"
+        )
+        return web.Response(text=body, content_type="application/rss+xml")
+
+    async def podcast(self, request: web.Request) -> web.Response:
+        show = int(request.match_info["show"])
+        if show >= self.config.podcasts:
+            raise web.HTTPNotFound()
+        base = self._base(request)
+        items = "".join(
+            f"<item><title>Episode {show}-{episode}</title><link>{base}/episodes/{show}/{episode}</link>"
+            f'<enclosure url="{base}/audio/{show}/{episode}.mp3" length="{self.config.audio_bytes}" type="audio/mpeg"/>'
+            f"<pubDate>{_rfc822(episode)}</pubDate></item>"
+            for episode in range(self.config.episodes_per_podcast)
+        )
+        body = (
+            '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>Bench podcast {show}</title><link>{base}/</link>{items}</channel></rss>"
+        )
+        return web.Response(text=body, content_type="application/rss+xml")
+
+    async def audio(self, request: web.Request) -> web.StreamResponse:
+        # MPEG frame sync bytes followed by padding: enough for size-based splitting.
+        frame = b"\xff\xfb\x90\x00" + bytes(413)
+        response = web.StreamResponse(headers={"Content-Type": "audio/mpeg"})
+        response.content_length = self.config.audio_bytes
+        await response.prepare(request)
+        remaining = self.config.audio_bytes
+        chunk = frame * 256
+        while remaining > 0:
+            await response.write(chunk[:remaining])
+            remaining -= len(chunk)
+        await response.write_eof()
+        return response
+
+    def routes(self):
+        return [
+            web.get("/rss/{feed}.xml", self.rss),
+            web.get("/podcasts/{show}.xml", self.podcast),
+            web.get("/audio/{show}/{episode}.mp3", self.audio),
+        ]
+
+class ScholarStub:
+    def __init__(self, config: StubConfig):
+        self.config = config
+
+    async def search(self, request: web.Request) -> web.Response:
+        query = request.query.get("query", "")
+        offset = int(request.query.get("offset", "0"))
+        limit = int(request.query.get("limit", "10"))
+        # Only the "2020-" form of the year filter, which the harvester sends.
+        min_year = int(request.query.get("year", "0-").rstrip("-") or 0)
+        rng = random.Random(f"{self.config.seed}:{query}")
+        matches = []
+        for index in range(self.config.papers_per_term):
+            # Drawn for every index so a paper is the same whatever page it is on.
+            title, abstract, year = _text(rng, 8), _text(rng, 150), rng.randint(2015, 2024)
+            if year >= min_year:
+                matches.append((index, title, abstract, year))
+        total = len(matches)
+        papers = []
+        for index, title, abstract, year in matches[offset:offset + limit]:
+            paper_id = f"{zlib.crc32(query.encode('utf-8')):010d}{index:04d}"
+            papers.append({
+                "paperId": paper_id,
+                "url": f"https://www.semanticscholar.org/paper/{paper_id}",
+                "title": title.capitalize(),
+                "abstract": abstract,
+                "authors": [{"name": f"Author {index}"}],
+                "year": year,
+                "venue": "Bench Conference",
+            })
+        body = {"total": total, "offset": offset, "data": papers}
+        if offset + limit < total:
+            body["next"] = offset + limit
+        return web.json_response(body)
+
+    def routes(self):
+        return [web.get("/graph/v1/paper/search", self.search)]
+
+def openai_app(config: StubConfig) -> web.Application:
+    """The OpenAI stub, slowed to the configured latency and failing a share of calls with 429."""
+    rng = random.Random(config.seed)
+
+    @web.middleware
+    async def latency_and_rate_limits(request: web.Request, handler):
+        if rng.random() < config.rate_limit_share:
+            return web.json_response(
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                status=429,
+                headers={"retry-after": str(config.retry_after)},
+            )
+        latency = config.transcription_latency if request.path.endswith("/transcriptions") else config.openai_latency
+        await asyncio.sleep(latency * (1 + rng.uniform(-config.latency_jitter, config.latency_jitter)))
+        return await handler(request)
+
+    app = create_openai_app()
+    app.middlewares.append(latency_and_rate_limits)
+    return app
+
+async def start(config: StubConfig, host: str = "127.0.0.1") -> dict:
+    """Starts the three stub servers on free ports. Returns their base URLs and runners."""
+    feed_app = web.Application()
+    feed_app.add_routes(FeedStub(config).routes())
+    scholar_app = web.Application()
+    scholar_app.add_routes(ScholarStub(config).routes())
+
+    servers = {}
+    for name, app in (("feeds", feed_app), ("openai", openai_app(config)), ("scholar", scholar_app)):
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, 0).start()
+        port = runner.addresses[0][1]
+        servers[name] = (f"http://{host}:{port}", runner)
+    return servers
+
+def serve_forever(config: StubConfig, ready):
+    """Process entry point: starts the stubs and sends their base URLs through ready."""
+    async def run():
+        servers = await start(config)
+        ready.send({name: url for name, (url, _) in servers.items()})
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
@@ -0,0 +1,196 @@
+"""
+A local stand-in for the parts of the OpenAI API the backend uses:
+chat completions, embeddings, audio transcriptions, files and batches.
+
+Run it and point the backend at it:
+    python stubs/openai_stub.py --port 8100
+    OPENAI_BASE_URL=http://localhost:8100/v1 OPENAI_API_KEY=stub python -m app.batch run
+
+Batches complete immediately; every request in the input file is answered
+with the same canned enrichment the chat endpoint returns.
+"""
+import json
+import math
+import time
+import uuid
+import base64
+import struct
+import zlib
+import argparse
+from aiohttp import web
+
+CATEGORIES = ["Risk-focused", "Opportunity-focused"]
+
+def _id(prefix: str) -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:24]}"
+
+def fake_enrichment(text: str) -> dict:
+    """Deterministic enrichment so repeated runs produce identical results."""
+    words = text.split()
+    return {
+        "summary": " ".join(words[:30]) or "No content.",
+        "category": CATEGORIES[len(words) % 2],
+        "relevance_score": round((len(text) % 100) / 100, 2),
+    }
+
+def fake_embedding(text: str, dimensions: int) -> list:
+    """Hashed bag of words, so texts sharing words get similar vectors."""
+    vector = [0.0] * dimensions
+    for word in text.lower().split():
+        h = zlib.crc32(word.encode("utf-8"))
+        vector[h % dimensions] += 1.0 if h & 0x80000000 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+def chat_completion_body(request_body: dict) -> dict:
+    messages = request_body.get("messages", [])
+    user_text = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    content = json.dumps(fake_enrichment(user_text))
+    prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+    completion_tokens = len(content) // 4
+    return {
+        "id": _id("chatcmpl"),
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request_body.get("model", "gpt-3.5-turbo"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+class OpenAIStub:
+    def __init__(self):
+        self.files = {}
+        self.batches = {}
+
+    def _file_object(self, file_id: str, purpose: str, size: int) -> dict:
+        return {
+            "id": file_id,
+            "object": "file",
+            "bytes": size,
+            "created_at": int(time.time()),
+            "filename": f"{file_id}.jsonl",
+            "purpose": purpose,
+            "status": "processed",
+        }
+
+    async def chat_completions(self, request: web.Request) -> web.Response:
+        return web.json_response(chat_completion_body(await request.json()))
+
+    async def embeddings(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        inputs = body.get("input", [])
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        dimensions = body.get("dimensions") or 1536
+        data = []
+        for index, text in enumerate(inputs):
+            vector = fake_embedding(text, dimensions)
+            if body.get("encoding_format") == "base64":
+                # The official client asks for base64 float32 by default.
+                vector = base64.b64encode(struct.pack(f"<{dimensions}f", *vector)).decode("ascii")
+            data.append({"object": "embedding", "index": index, "embedding": vector})
+        tokens = sum(len(text) for text in inputs) // 4
+        return web.json_response({
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "text-embedding-3-small"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+    async def transcriptions(self, request: web.Request) -> web.Response:
+        # Drain the upload so the client sees a normal request cycle.
+        size = 0
+        reader = await request.multipart()
+        async for part in reader:
+            while chunk := await part.read_chunk():
+                size += len(chunk)
+        return web.Response(text=f"Stub transcript of {size} bytes of audio about AI and human rights.")
+
+    async def create_file(self, request: web.Request) -> web.Response:
+        purpose = "batch"
+        data = b""
+        reader = await request.multipart()
+        async for part in reader:
+            if part.name == "purpose":
+                purpose = (await part.read()).decode()
+            elif part.name == "file":
+                data = await part.read()
+        file_id = _id("file")
+        self.files[file_id] = data
+        return web.json_response(self._file_object(file_id, purpose, len(data)))
+
+    async def file_content(self, request: web.Request) -> web.Response:
+        data = self.files.get(request.match_info["file_id"])
+        if data is None:
+            return web.json_response({"error": {"message": "No such file"}}, status=404)
+        return web.Response(body=data, content_type="application/octet-stream")
+
+    async def create_batch(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        input_data = self.files.get(body["input_file_id"], b"")
+        output_lines = []
+        for line in input_data.decode().splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            output_lines.append(json.dumps({
+                "id": _id("batch_req"),
+                "custom_id": item["custom_id"],
+                "response": {"status_code": 200, "request_id": _id("req"), "body": chat_completion_body(item["body"])},
+                "error": None,
+            }))
+        output_file_id = _id("file")
+        self.files[output_file_id] = ("\n".join(output_lines) + "\n").encode()
+
+        batch_id = _id("batch")
+        now = int(time.time())
+        self.batches[batch_id] = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body["endpoint"],
+            "input_file_id": body["input_file_id"],
+            "completion_window": body.get("completion_window", "24h"),
+            "status": "completed",
+            "output_file_id": output_file_id,
+            "error_file_id": None,
+            "created_at": now,
+            "completed_at": now,
+            "request_counts": {"total": len(output_lines), "completed": len(output_lines), "failed": 0},
+        }
+        return web.json_response(self.batches[batch_id])
+
+    async def retrieve_batch(self, request: web.Request) -> web.Response:
+        batch = self.batches.get(request.match_info["batch_id"])
+        if batch is None:
+            return web.json_response({"error": {"message": "No such batch"}}, status=404)
+        return web.json_response(batch)
+
+    def routes(self):
+        return [
+            web.post("/v1/chat/completions", self.chat_completions),
+            web.post("/v1/embeddings", self.embeddings),
+            web.post("/v1/audio/transcriptions", self.transcriptions),
+            web.post("/v1/files", self.create_file),
+            web.get("/v1/files/{file_id}/content", self.file_content),
+            web.post("/v1/batches", self.create_batch),
+            web.get("/v1/batches/{batch_id}", self.retrieve_batch),
+        ]
+
+def create_app() -> web.Application:
+    app = web.Application(client_max_size=1024 ** 3)
+    app.add_routes(OpenAIStub().routes())
+    return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OpenAI API stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+    web.run_app(create_app(), host=args.host, port=args.port)
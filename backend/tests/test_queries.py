@@ -0,0 +1,87 @@
+"""
+Keyset pagination and cursors (queries.py), checked without a database:
+pages are fetched from an in-memory list by a small matcher for the filters
+paginate builds.
+"""
+from datetime import datetime
+import pytest
+
+pytest.importorskip("bson")
+
+from bson import ObjectId
+from app import queries
+
+SORT = [("created_at", -1), ("_id", -1)]
+
+def _matches(doc: dict, find_filter: dict) -> bool:
+    """Evaluates the equality, $lt/$gt and $or clauses paginate produces."""
+    for field, condition in find_filter.items():
+        if field == "$or":
+            if not any(_matches(doc, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict) and "$lt" in condition:
+            if not doc[field] < condition["$lt"]:
+                return False
+        elif isinstance(condition, dict) and "$gt" in condition:
+            if not doc[field] > condition["$gt"]:
+                return False
+        elif doc[field] != condition:
+            return False
+    return True
+
+def _fetch(docs, query, limit):
+    """Runs a (filter, sort) query against docs the way main.py does: limit + 1, then next_page."""
+    find_filter, sort = query
+    matched = [doc for doc in docs if _matches(doc, find_filter)]
+    for field, direction in reversed(sort):
+        matched.sort(key=lambda doc: doc[field], reverse=direction < 0)
+    return queries.next_page(matched[:limit + 1], limit, sort)
+
+def _all_pages(docs, limit):
+    pages, cursor = [], None
+    while True:
+        page, cursor = _fetch(docs, queries.paginate(({}, SORT), cursor), limit)
+        pages.append(page)
+        if cursor is None:
+            return pages
+
+def test_pages_split_ties_on_the_sort_key():
+    shared = datetime(2024, 6, 1, 12, 0)
+    docs = [{"_id": ObjectId(), "created_at": shared} for _ in range(5)]
+    docs.append({"_id": ObjectId(), "created_at": datetime(2024, 5, 1)})
+
+    pages = _all_pages(docs, limit=2)
+
+    seen = [doc["_id"] for page in pages for doc in page]
+    assert len(seen) == len(set(seen)) == len(docs)
+    assert seen[-1] == docs[-1]["_id"]
+
+def test_last_page_has_no_next_cursor():
+    docs = [{"_id": ObjectId(), "created_at": datetime(2024, 6, day)} for day in range(1, 5)]
+
+    pages = _all_pages(docs, limit=2)
+
+    assert [len(page) for page in pages] == [2, 2]
+    _, cursor = queries.next_page(pages[-1], 2, SORT)
+    assert cursor is None
+
+def test_cursor_round_trips_sort_values():
+    doc = {"_id": ObjectId(), "created_at": datetime(2024, 6, 1, 12, 30)}
+
+    values = queries.decode_cursor(queries.encode_cursor(doc, SORT), SORT)
+
+    assert values == [doc["created_at"], doc["_id"]]
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "bm90IGpzb24=", queries.encode_cursor({"a": 1}, [("a", -1)])])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        queries.paginate(({}, SORT), cursor)
+
+def test_malformed_cursor_is_a_400():
+    pytest.importorskip("motor")
+    from fastapi import HTTPException
+    from app.main import paginated_query
+
+    with pytest.raises(HTTPException) as error:
+        paginated_query(queries.pending_content_query(), "not a cursor")
+    assert error.value.status_code == 400
@@ -0,0 +1,45 @@
+"""
+Every content query the API issues must be served by an index.
+
+Ensures the registered indexes on a scratch database and explains each
+endpoint query against it; a COLLSCAN in any winning plan fails the test.
+Skipped when no MongoDB is reachable at DATABASE_URL (default
+mongodb://localhost:27017). Run from backend/:
+
+    python -m pytest tests
+"""
+import os
+import asyncio
+import pytest
+
+pytest.importorskip("motor")
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
+from app.indexes import CONTENT_COLLECTION, ensure_indexes, check_query_plans
+
+DATABASE_URL = os.getenv("DATABASE_URL") or "mongodb://localhost:27017"
+TEST_DATABASE_NAME = "human_rights_ai_monitor_test"
+
+async def _check_plans():
+    client = AsyncIOMotorClient(DATABASE_URL, serverSelectionTimeoutMS=2000)
+    try:
+        try:
+            await client.admin.command("ping")
+        except PyMongoError as e:
+            pytest.skip(f"No MongoDB reachable at {DATABASE_URL}: {e}")
+        await client.drop_database(TEST_DATABASE_NAME)
+        database = client[TEST_DATABASE_NAME]
+        try:
+            # The collection must exist for explain; an empty one still plans against its indexes.
+            await database.create_collection(CONTENT_COLLECTION)
+            await ensure_indexes(database)
+            return await check_query_plans(database)
+        finally:
+            await client.drop_database(TEST_DATABASE_NAME)
+    finally:
+        client.close()
+
+def test_endpoint_queries_use_indexes():
+    failures = asyncio.run(_check_plans())
+    assert failures == [], f"Queries planned as COLLSCAN: {failures}"
@@ -0,0 +1,44 @@
+"""
+Cut-point planning for splitting long audio (transcription.py): where the
+cuts fall and how long segments may be, checked without ffmpeg.
+"""
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from app import transcription
+from app.transcription import choose_cut_points, segment_length
+
+def test_cuts_fall_on_targets_without_silences():
+    assert choose_cut_points(2500, [], segment_seconds=600, search_seconds=60) == [600, 1200, 1800, 2400]
+
+def test_cuts_snap_to_the_nearest_silence():
+    cuts = choose_cut_points(2000, [570, 590, 1250, 1900], segment_seconds=600, search_seconds=60)
+
+    # 1250 is 60s from the second target (590 + 600): still in the search window.
+    assert cuts == [590, 1250, 1900]
+
+def test_file_shorter_than_one_segment_is_not_cut():
+    assert choose_cut_points(300, [100, 200], segment_seconds=600, search_seconds=60) == []
+    # Within search_seconds of the end, a cut would only leave a sliver.
+    assert choose_cut_points(650, [], segment_seconds=600, search_seconds=60) == []
+
+def test_segment_length_is_unchanged_at_the_size_limit():
+    duration = transcription.SEGMENT_SECONDS + transcription.SILENCE_SEARCH_SECONDS
+    size = transcription.SEGMENT_MAX_BYTES
+
+    assert segment_length(duration, size) == (transcription.SEGMENT_SECONDS, transcription.SILENCE_SEARCH_SECONDS)
+
+def test_segment_length_shrinks_past_the_size_limit():
+    duration = 3600
+    size = transcription.SEGMENT_MAX_BYTES * 20
+    bytes_per_second = size / duration
+
+    segment_seconds, search_seconds = segment_length(duration, size)
+
+    assert segment_seconds < transcription.SEGMENT_SECONDS
+    # The longest segment (a cut search_seconds late) lands exactly on the limit.
+    assert bytes_per_second * (segment_seconds + search_seconds) == pytest.approx(transcription.SEGMENT_MAX_BYTES)
+
+def test_segment_length_of_an_empty_duration():
+    assert segment_length(0, 1024) == (transcription.SEGMENT_SECONDS, transcription.SILENCE_SEARCH_SECONDS)
@@ -1,5 +1,6 @@
 import { useState, useEffect, useCallback } from 'react';
 import './CurationDashboard.css';
+import useContentStream from './useContentStream';
 
 const API_BASE_URL = 'http://localhost:8000';
 
@@ -7,28 +8,47 @@ function CurationDashboard() {
   const [articles, setArticles] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  // 'pending' for the review queue, 'filtered' for items the relevance pre-filter held back.
+  const [queue, setQueue] = useState('pending');
 
-  const fetchPendingArticles = useCallback(async () => {
+  // Without a cursor this reloads the first page; with one it appends the next page.
+  const fetchPendingArticles = useCallback(async (cursor = null) => {
     try {
       setLoading(true);
       setError(null);
-      const response = await fetch(`${API_BASE_URL}/content/pending`);
+      const params = new URLSearchParams({ status: queue });
+      if (cursor) {
+        params.append('cursor', cursor);
+      }
+      const response = await fetch(`${API_BASE_URL}/content/pending?${params.toString()}`);
       if (!response.ok) {
         throw new Error(`HTTP error! status: ${response.status}`);
       }
       const data = await response.json();
-      setArticles(data);
+      setArticles(prev => (cursor ? [...prev, ...data] : data));
+      setNextCursor(response.headers.get('X-Next-Cursor'));
     } catch (e) {
       setError(e.message);
     } finally {
       setLoading(false);
     }
-  }, []);
+  }, [queue]);
 
   useEffect(() => {
     fetchPendingArticles();
   }, [fetchPendingArticles]);
 
+  // New items in this queue appear at the top; items curated elsewhere drop out.
+  const handleContentUpdate = useCallback((item) => {
+    setArticles(prev => {
+      const others = prev.filter(article => article._id !== item._id);
+      return item.status === queue ? [item, ...others] : others;
+    });
+  }, [queue]);
+
+  useContentStream(API_BASE_URL, handleContentUpdate, fetchPendingArticles);
+
   const handleCuration = async (articleId, action) => {
     try {
       const response = await fetch(`${API_BASE_URL}/content/curate`, {
@@ -42,8 +62,8 @@ function CurationDashboard() {
         throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
       }
       
-      // Refresh the list after curation
-      fetchPendingArticles();
+      // Drop the item right away; other dashboards hear about it from the stream.
+      setArticles(prev => prev.filter(article => article._id !== articleId));
 
     } catch (e) {
       console.error(`Failed to ${action} article:`, e);
@@ -56,11 +76,15 @@ function CurationDashboard() {
       <div className="curation-header">
         <h2>Content Curation</h2>
         <p>Review and approve or reject articles from the ingestion pipeline.</p>
+        <select value={queue} onChange={(e) => setQueue(e.target.value)} className="category-select">
+          <option value="pending">Pending review</option>
+          <option value="filtered">Held back by pre-filter</option>
+        </select>
       </div>
 
-      {loading && <div className="loader">Loading pending articles...</div>}
+      {loading && articles.length === 0 && <div className="loader">Loading pending articles...</div>}
       {error && <div className="error-message">Error: {error}</div>}
-      {!loading && !error && (
+      {!(loading && articles.length === 0) && !error && (
         <div className="articles-grid">
           {articles.length > 0 ? (
             articles.map(article => (
@@ -86,10 +110,17 @@ function CurationDashboard() {
               </article>
             ))
           ) : (
-            <p className="no-articles">No pending articles to review.</p>
+            <p className="no-articles">No {queue} articles to review.</p>
           )}
         </div>
       )}
+      {nextCursor && !error && (
+        <div className="load-more">
+          <button onClick={() => fetchPendingArticles(nextCursor)} disabled={loading}>
+            {loading ? 'Loading...' : 'Load more'}
+          </button>
+        </div>
+      )}
     </main>
   );
 }
@@ -1,5 +1,6 @@
 import { useState, useEffect, useCallback } from 'react';
 import './Dashboard.css';
+import useContentStream from './useContentStream';
 
 const API_BASE_URL = 'http://127.0.0.1:8000';
 
@@ -66,6 +67,24 @@ function Dashboard() {
     fetchArticles();
   }, [fetchArticles]);
 
+  // Newly approved items are placed by publication date, matching /content/approved.
+  // Search results are ranked by the server, so they only lose items that leave approval.
+  const handleContentUpdate = useCallback((item) => {
+    setArticles(prev => {
+      const others = prev.filter(article => article._id !== item._id);
+      if (searchQuery) {
+        return item.status === 'approved' ? prev : others;
+      }
+      if (item.status !== 'approved' || (selectedCategory && item.category !== selectedCategory)) {
+        return others;
+      }
+      const index = others.findIndex(article => article.published_at < item.published_at);
+      return index === -1 ? [...others, item] : [...others.slice(0, index), item, ...others.slice(index)];
+    });
+  }, [searchQuery, selectedCategory]);
+
+  useContentStream(API_BASE_URL, handleContentUpdate, fetchArticles);
+
   return (
     <main className="content-area">
       <div className="dashboard-header">
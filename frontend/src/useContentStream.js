@@ -0,0 +1,34 @@
+import { useEffect, useRef } from 'react';
+
+// Subscribes to the server-sent content updates from /content/stream.
+// onContent receives each new or changed item; onResync is called when
+// updates may have been missed (the stream fell behind or reconnected)
+// and the list should be fetched again.
+function useContentStream(apiBaseUrl, onContent, onResync) {
+  const handlers = useRef({ onContent, onResync });
+  handlers.current = { onContent, onResync };
+
+  useEffect(() => {
+    const source = new EventSource(`${apiBaseUrl}/content/stream`);
+    let disconnected = false;
+
+    source.addEventListener('content', (event) => {
+      handlers.current.onContent(JSON.parse(event.data).content);
+    });
+    source.addEventListener('resync', () => handlers.current.onResync());
+    source.onerror = () => {
+      // EventSource reconnects on its own; catch up once it does.
+      disconnected = true;
+    };
+    source.onopen = () => {
+      if (disconnected) {
+        disconnected = false;
+        handlers.current.onResync();
+      }
+    };
+
+    return () => source.close();
+  }, [apiBaseUrl]);
+}
+
+export default useContentStream;